@@ -1,3 +1,4 @@
+import atexit
 import os
 from flask import Flask, jsonify, send_from_directory
 from flask_cors import CORS
@@ -12,10 +13,23 @@ from routes.wishlist import wishlist_bp
 from routes.orders import orders_bp
 from routes.addresses import addresses_bp
 from routes.analytics import analytics_bp
+from utils.analytics_counter import analytics_counter
+from utils.analytics_events import event_pipeline
+from utils.analytics_sketches import sketch_store
+from utils.guest_carts import guest_cart_pruner
+from utils import query_budget
+from utils.catalog_cache import catalog_cache
+from utils.product_search import product_search
+from utils.facet_index import facet_index
+from utils.product_suggest import product_suggest
+from utils.fuzzy_index import fuzzy_index
+from utils.json_provider import init_json
+from utils.compression import response_compression
 
 def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
+    init_json(app)
     
     # Initialize extensions with CORS configuration from environment
     cors_origins = app.config.get('CORS_ORIGINS', ['*'])
@@ -23,11 +37,22 @@ def create_app():
          origins=cors_origins,
          supports_credentials=app.config.get('CORS_SUPPORTS_CREDENTIALS', True),
          max_age=app.config.get('CORS_MAX_AGE', 3600),
-         allow_headers=['Content-Type', 'Authorization', 'X-Requested-With', 'Accept', 'Origin'],
+         allow_headers=['Content-Type', 'Authorization', 'X-Requested-With', 'Accept', 'Origin', 'X-Guest-Cart'],
          methods=['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS', 'PATCH'])
     
     db.init_app(app)
     JWTManager(app)
+    analytics_counter.init_app(app)
+    event_pipeline.init_app(app)
+    sketch_store.init_app(app)
+    guest_cart_pruner.init_app(app)
+    query_budget.init_app(app)
+    catalog_cache.init_app(app)
+    product_search.init_app(app)
+    facet_index.init_app(app)
+    product_suggest.init_app(app)
+    fuzzy_index.init_app(app)
+    response_compression.init_app(app)
     
     # Log CORS configuration in debug mode
     if app.config.get('DEBUG'):
@@ -106,10 +131,10 @@ def create_app():
     
     # Public sections endpoint
     @app.route('/api/sections')
+    @catalog_cache.cached
     def get_sections():
-        from models import Section
-        sections = Section.query.filter_by(is_active=True).order_by(Section.display_order).all()
-        return jsonify([section.to_dict() for section in sections])
+        from utils.section_index import section_index
+        return jsonify(section_index.all())
     
     # Error handlers
     @app.errorhandler(404)
@@ -129,4 +154,7 @@ if __name__ == '__main__':
     with app.app_context():
         db.create_all()
         print("Database tables created successfully!")
+    # Gunicorn flushes in worker_exit; the dev server does it at interpreter exit
+    for buffer in (analytics_counter, event_pipeline, sketch_store):
+        atexit.register(buffer.shutdown)
     app.run(debug=True, host='0.0.0.0', port=5000)
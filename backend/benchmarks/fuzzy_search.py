@@ -0,0 +1,120 @@
+"""
+Benchmark the trigram fuzzy index (utils/fuzzy_index.py) on synthetic catalogs
+
+Builds the index from generated titles (no database needed) and times
+misspelled queries against it, next to a naive scan that scores every title,
+which is what a fuzzy search without an index would have to do.
+
+Usage (from backend/):
+    python benchmarks/fuzzy_search.py
+    python benchmarks/fuzzy_search.py --sizes 10000 100000 --queries 200 --scan-max 100000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.fuzzy_index import FuzzyIndex, tokenize, trigrams  # noqa: E402
+
+ADJECTIVES = ['cotton', 'linen', 'denim', 'classic', 'slim', 'oversized', 'vintage', 'printed', 'striped',
+              'hooded', 'knitted', 'organic', 'relaxed', 'cropped', 'waterproof', 'leather', 'woolen']
+COLORS = ['black', 'white', 'navy', 'olive', 'maroon', 'beige', 'charcoal', 'mustard', 'teal', 'rust']
+NOUNS = ['tshirt', 'hoodie', 'jacket', 'sweater', 'jeans', 'trousers', 'shorts', 'shirt', 'kurta', 'dress',
+         'skirt', 'blazer', 'cardigan', 'joggers', 'sneakers', 'sandals', 'scarf', 'beanie', 'polo', 'vest']
+QUERIES = ['tshrt', 'hoodi', 'jaket', 'sweter', 'jens', 'trousrs', 'blazr', 'cardign', 'sneekers',
+           'cotton tshrt', 'blak hoodi', 'vintge jaket', 'navy polo', 'olve kurta', 'leathr jakcet']
+
+
+def make_titles(count, seed=7):
+    rng = random.Random(seed)
+    # Brand-like filler words grow the vocabulary with the catalog, as real titles do
+    brands = [''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randint(4, 9)))
+              for _ in range(max(50, count // 20))]
+    for product_id in range(1, count + 1):
+        yield product_id, ' '.join((
+            rng.choice(brands).title(), rng.choice(ADJECTIVES).title(), rng.choice(COLORS).title(),
+            rng.choice(NOUNS).title(), str(rng.randint(1, 999))
+        ))
+
+
+def scan_search(titles, term, threshold=0.3, limit=200):
+    """Baseline: trigram-score every title's words against the query"""
+    query = [trigrams(token) for token in tokenize(term)]
+    scored = []
+    for product_id, title in titles:
+        words = [trigrams(word) for word in tokenize(title)]
+        total = 0.0
+        for grams in query:
+            best = max((len(grams & w) / len(grams | w) for w in words), default=0.0)
+            if best < threshold:
+                break
+            total += best
+        else:
+            scored.append((total / len(query), product_id))
+    scored.sort(reverse=True)
+    return scored[:limit]
+
+
+def percentile(samples, pct):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+
+def bench(size, query_count, scan_max):
+    titles = list(make_titles(size))
+    index = FuzzyIndex()
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    index.build(titles)
+    build_seconds = time.perf_counter() - started
+    memory_mb = tracemalloc.get_traced_memory()[0] / 1e6
+    tracemalloc.stop()
+
+    queries = [QUERIES[i % len(QUERIES)] for i in range(query_count)]
+    timings, hits = [], 0
+    for term in queries:
+        started = time.perf_counter()
+        results = index.search(term, ensure_fresh=False)
+        timings.append((time.perf_counter() - started) * 1000)
+        hits += bool(results)
+
+    print(f"\n{size:,} products ({len(index._word_ids):,} distinct words)")
+    print(f"  build: {build_seconds:.2f}s, ~{memory_mb:.0f} MB")
+    print(f"  index: p50 {statistics.median(timings):.2f} ms, p95 {percentile(timings, 95):.2f} ms, "
+          f"max {max(timings):.2f} ms, {hits}/{len(queries)} queries matched")
+
+    if size <= scan_max:
+        scan_timings = []
+        for term in QUERIES:
+            started = time.perf_counter()
+            scan_search(titles, term)
+            scan_timings.append((time.perf_counter() - started) * 1000)
+        print(f"  scan:  p50 {statistics.median(scan_timings):.1f} ms, max {max(scan_timings):.1f} ms")
+    else:
+        print(f"  scan:  skipped (--scan-max {scan_max:,})")
+
+    for term in ('tshrt', 'blak hoodi'):
+        top = index.search(term, limit=3, ensure_fresh=False)
+        print(f"  {term!r} -> " + ', '.join(f"{titles[pid - 1][1]} ({score:.2f})" for pid, score in top))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--queries', type=int, default=300)
+    parser.add_argument('--scan-max', type=int, default=100_000,
+                        help='skip the full-scan baseline above this catalog size')
+    args = parser.parse_args()
+    for size in args.sizes:
+        bench(size, args.queries, args.scan_max)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+Compare JSON encode time of the stdlib and orjson providers (utils/json_provider.py)
+
+Builds product and admin order pages from real model `to_dict()` output
+(transient objects, no database) and times `app.json.response(payload)`,
+which is what `jsonify` does, for each provider and page size.
+
+Usage (from backend/):
+    python benchmarks/json_encode.py
+    python benchmarks/json_encode.py --sizes 20 100 500 --repeat 200
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask  # noqa: E402
+from flask.json.provider import DefaultJSONProvider  # noqa: E402
+
+from models import Address, Order, OrderItem, PaymentDetail, Product, Section, User  # noqa: E402
+from utils.json_provider import OrjsonProvider, orjson  # noqa: E402
+
+NOW = datetime(2024, 6, 1, 12, 30, 15, 123456)
+
+
+def make_products(count):
+    section = Section(id=1, name='Men', slug='men')
+    products = []
+    for i in range(count):
+        product = Product(
+            id=i + 1, sku=f'SKU{i:06d}', title=f'Classic Cotton Tshirt {i}', slug=f'classic-cotton-tshirt-{i}',
+            description='Soft, breathable cotton tee with a relaxed fit. ' * 4, price=499.0 + i,
+            original_price=699.0 + i, is_on_sale=i % 3 == 0, stock=i % 40, section=section, section_id=1,
+            is_active=True, created_at=NOW - timedelta(hours=i), updated_at=NOW
+        )
+        product.images = [f'https://cdn.example.com/products/{i}/{n}.jpg' for n in range(4)]
+        product.sizes = ['S', 'M', 'L', 'XL']
+        product.colors = ['Black', 'White', 'Navy']
+        products.append(product)
+    return products
+
+
+def make_orders(count, products):
+    orders = []
+    for i in range(count):
+        user = User(id=i + 1, name='Asha Verma', email=f'user{i}@example.com', phone='9876543210',
+                    role='customer', is_active=True, created_at=NOW, updated_at=NOW, last_login_at=NOW)
+        address = Address(id=i + 1, user_id=user.id, full_name='Asha Verma', phone='9876543210',
+                          address_line1='12 MG Road', city='Pune', state='Maharashtra', pincode='411001',
+                          is_default=True, created_at=NOW)
+        order = Order(id=i + 1, order_number=f'ORD{i:08d}', receipt_number=f'RCP{i:08d}', total_amount=1497.0,
+                      status='confirmed', payment_method='upi', payment_status='paid', user=user,
+                      address=address, created_at=NOW - timedelta(minutes=i), updated_at=NOW)
+        order.order_items = [
+            OrderItem(id=i * 3 + n, product=products[(i + n) % len(products)], product_id=(i + n) % len(products),
+                      quantity=1 + n, price=499.0, size='M', color='Black')
+            for n in range(3)
+        ]
+        order.payment_details = PaymentDetail(id=i + 1, order_id=order.id, payment_method='upi',
+                                              upi_id='asha@upi', upi_name='Asha Verma', created_at=NOW)
+        orders.append(order)
+    return orders
+
+
+def time_response(app, payload, repeat):
+    with app.app_context():
+        app.json.response(payload)
+        started = time.perf_counter()
+        for _ in range(repeat):
+            app.json.response(payload)
+        return (time.perf_counter() - started) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[20, 100, 500])
+    parser.add_argument('--repeat', type=int, default=100)
+    args = parser.parse_args()
+
+    if orjson is None:
+        print('orjson is not installed; pip install orjson to compare')
+        return
+
+    providers = {}
+    for name, provider_class in (('stdlib', DefaultJSONProvider), ('orjson', OrjsonProvider)):
+        app = Flask(name)
+        app.json = provider_class(app)
+        providers[name] = app
+
+    products = make_products(max(args.sizes))
+    orders = make_orders(max(args.sizes), products)
+
+    print(f"{'page':<18}{'items':>6}{'bytes':>10}{'stdlib ms':>12}{'orjson ms':>12}{'speedup':>9}")
+    for label, build in (
+        ('products', lambda n: {'products': [p.to_dict() for p in products[:n]], 'total': n, 'pages': 1}),
+        ('admin orders', lambda n: {'orders': [o.to_dict(include_user=True) for o in orders[:n]], 'total': n}),
+    ):
+        for size in args.sizes:
+            payload = build(size)
+            timings = {name: time_response(app, payload, args.repeat) for name, app in providers.items()}
+            with providers['orjson'].app_context():
+                size_bytes = len(providers['orjson'].json.response(payload).get_data())
+            print(f"{label:<18}{size:>6}{size_bytes:>10,}{timings['stdlib']:>12.3f}{timings['orjson']:>12.3f}"
+                  f"{timings['stdlib'] / timings['orjson']:>8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""
+Per-row cost of ORM `to_dict()` vs compiled row serializers (utils/row_serializers.py)
+
+Seeds an in-memory SQLite database and times each listing both ways:
+- orm:      query ORM instances (eager loads as the routes used to) + to_dict()
+- compiled: column-projected query + compiled serializer, related rows by IN query
+plus the pure serialization step (already-loaded instances vs fetched tuples).
+
+Usage (from backend/):
+    python benchmarks/row_serializers.py
+    python benchmarks/row_serializers.py --products 5000 --orders 2000 --repeat 10
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask  # noqa: E402
+
+from models import db, Address, Order, OrderItem, PaymentDetail, Product, Section, User  # noqa: E402
+from utils.order_rows import order_dicts, order_query  # noqa: E402
+from utils.product_fields import full_fieldset  # noqa: E402
+from utils.row_serializers import user_row  # noqa: E402
+
+
+def seed(products, orders):
+    section = Section(name='Men', slug='men')
+    db.session.add(section)
+    db.session.flush()
+    for i in range(products):
+        product = Product(sku=f'SKU{i}', title=f'Classic Cotton Tshirt {i}', slug=f'tshirt-{i}',
+                          description='Soft cotton tee. ' * 8, price=499.0 + i, original_price=699.0,
+                          is_on_sale=i % 3 == 0, stock=i % 40, section_id=section.id)
+        product.images = [f'https://cdn.example.com/{i}/{n}.jpg' for n in range(3)]
+        product.sizes = ['S', 'M', 'L']
+        product.colors = ['Black', 'Navy']
+        db.session.add(product)
+    users = []
+    for i in range(max(1, orders // 5)):
+        user = User(name=f'User {i}', email=f'user{i}@example.com', phone='9876543210', password_hash='x')
+        user.addresses.append(Address(full_name=f'User {i}', phone='9876543210', address_line1='12 MG Road',
+                                      city='Pune', state='Maharashtra', pincode='411001'))
+        users.append(user)
+    db.session.add_all(users)
+    db.session.flush()
+    for i in range(orders):
+        user = users[i % len(users)]
+        order = Order(order_number=f'ORD{i}', receipt_number=f'R{i}', user_id=user.id,
+                      address_id=user.addresses[0].id, total_amount=1497.0, status='confirmed', payment_method='upi')
+        order.order_items = [OrderItem(product_id=1 + (i + n) % products, quantity=1, price=499.0, size='M')
+                             for n in range(3)]
+        order.payment_details = PaymentDetail(payment_method='upi', upi_id='user@upi', upi_name='User')
+        db.session.add(order)
+    db.session.commit()
+
+
+def timed(fn, repeat):
+    fn()
+    best = float('inf')
+    for _ in range(repeat):
+        db.session.expunge_all()
+        started = time.perf_counter()
+        count = len(fn())
+        best = min(best, time.perf_counter() - started)
+    return best, count
+
+
+def report(label, orm, compiled, repeat):
+    (orm_seconds, rows), (compiled_seconds, _) = timed(orm, repeat), timed(compiled, repeat)
+    print(f"{label:<26}{rows:>6}{orm_seconds / rows * 1e6:>13.1f}{compiled_seconds / rows * 1e6:>17.1f}"
+          f"{orm_seconds / compiled_seconds:>9.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--products', type=int, default=2000)
+    parser.add_argument('--orders', type=int, default=1000)
+    parser.add_argument('--page', type=int, default=500, help='rows per listing query')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        seed(args.products, args.orders)
+        page = args.page
+        fieldset = full_fieldset()
+
+        print(f"{'listing':<26}{'rows':>6}{'orm us/row':>13}{'compiled us/row':>17}{'speedup':>9}")
+        report('products (query+dicts)',
+               lambda: [p.to_dict() for p in Product.query.options(db.joinedload(Product.section)).limit(page)],
+               lambda: fieldset.serialize(fieldset.prepare(Product.query).limit(page).all()), args.repeat)
+        report('users (query+dicts)',
+               lambda: [u.to_dict() for u in User.query.limit(page)],
+               lambda: user_row.many(db.session.execute(user_row.select().limit(page))), args.repeat)
+        report('admin orders (query+dicts)',
+               lambda: [o.to_dict(include_user=True) for o in Order.query.options(
+                   db.joinedload(Order.user), db.joinedload(Order.address),
+                   db.joinedload(Order.order_items).joinedload(OrderItem.product).joinedload(Product.section)
+               ).limit(page)],
+               lambda: order_dicts(order_query(Order.query).limit(page).all(), include_user=True), args.repeat)
+
+        # Serialization alone: instances / tuples already in memory
+        users = User.query.limit(page).all()
+        rows = db.session.execute(user_row.select().limit(page)).all()
+        report('users (dicts only)', lambda: [u.to_dict() for u in users], lambda: user_row.many(rows), args.repeat * 20)
+
+
+if __name__ == '__main__':
+    main()
@@ -104,6 +104,75 @@ class Config:
     ITEMS_PER_PAGE = int(os.getenv('ITEMS_PER_PAGE', 20))
     SESSION_TIMEOUT = int(os.getenv('SESSION_TIMEOUT', 60))
     
+    # Analytics Settings
+    # Counter increments are buffered per worker and flushed every N ms or M events
+    ANALYTICS_FLUSH_INTERVAL_MS = int(os.getenv('ANALYTICS_FLUSH_INTERVAL_MS', 1000))
+    ANALYTICS_FLUSH_MAX_EVENTS = int(os.getenv('ANALYTICS_FLUSH_MAX_EVENTS', 500))
+    # Read path: counts are cached per worker; SSE streams are recycled so clients reconnect
+    ANALYTICS_CACHE_TTL = float(os.getenv('ANALYTICS_CACHE_TTL', 2))
+    ANALYTICS_STREAM_POLL_SECONDS = float(os.getenv('ANALYTICS_STREAM_POLL_SECONDS', 1))
+    ANALYTICS_STREAM_MAX_SECONDS = int(os.getenv('ANALYTICS_STREAM_MAX_SECONDS', 300))
+    # SSE streams hold a gthread worker thread each; past this many per worker they get a 503
+    ANALYTICS_STREAM_MAX_PER_WORKER = int(os.getenv('ANALYTICS_STREAM_MAX_PER_WORKER', 4))
+    # Per-product/section event pipeline: buffered beacons, periodic rollup compaction
+    ANALYTICS_EVENT_MAX_BATCH = int(os.getenv('ANALYTICS_EVENT_MAX_BATCH', 100))
+    ANALYTICS_EVENT_BUFFER_SIZE = int(os.getenv('ANALYTICS_EVENT_BUFFER_SIZE', 1000))
+    ANALYTICS_ROLLUP_INTERVAL = int(os.getenv('ANALYTICS_ROLLUP_INTERVAL', 60))
+    ANALYTICS_ROLLUP_BATCH_SIZE = int(os.getenv('ANALYTICS_ROLLUP_BATCH_SIZE', 5000))
+    ANALYTICS_EVENT_RETENTION_DAYS = int(os.getenv('ANALYTICS_EVENT_RETENTION_DAYS', 30))
+    # Unique-visitor / top-K sketches are merged into per-day rows this often
+    ANALYTICS_SKETCH_FLUSH_SECONDS = float(os.getenv('ANALYTICS_SKETCH_FLUSH_SECONDS', 10))
+    
+    # Catalog response cache: 'memory' (per-worker LRU), 'sqlite' (shared on-disk) or 'none'
+    CATALOG_CACHE_BACKEND = os.getenv('CATALOG_CACHE_BACKEND', 'memory').lower()
+    CATALOG_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                     os.getenv('CATALOG_CACHE_DIR', 'cache'))
+    CATALOG_CACHE_MAX_ENTRIES = int(os.getenv('CATALOG_CACHE_MAX_ENTRIES', 512))
+    CATALOG_CACHE_TTL = int(os.getenv('CATALOG_CACHE_TTL', 300))
+    
+    # Product search: 'auto' (MySQL FULLTEXT / SQLite FTS5) or 'like'
+    SEARCH_BACKEND = os.getenv('SEARCH_BACKEND', 'auto').lower()
+    # The index comes from migrate.py; until it exists workers use LIKE and re-check this often
+    SEARCH_INDEX_RECHECK = int(os.getenv('SEARCH_INDEX_RECHECK', 60))
+    
+    # Cursor pagination (?cursor=): per_page is clamped to 1..CURSOR_MAX_PER_PAGE
+    CURSOR_MAX_PER_PAGE = int(os.getenv('CURSOR_MAX_PER_PAGE', 100))
+    
+    # Batch product lookup (/api/products/batch): max ids per request
+    PRODUCT_BATCH_MAX_IDS = int(os.getenv('PRODUCT_BATCH_MAX_IDS', 300))
+    
+    # Typeahead (/api/products/suggest): ranked by views+clicks over the last N days
+    SUGGEST_MAX_LIMIT = int(os.getenv('SUGGEST_MAX_LIMIT', 20))
+    SUGGEST_POPULARITY_DAYS = int(os.getenv('SUGGEST_POPULARITY_DAYS', 30))
+    SUGGEST_POPULARITY_REFRESH = int(os.getenv('SUGGEST_POPULARITY_REFRESH', 600))
+    
+    # Server-side guest carts (X-Guest-Cart token): lines untouched this long are
+    # pruned by a background thread every interval seconds, in batches
+    GUEST_CART_TTL_DAYS = int(os.getenv('GUEST_CART_TTL_DAYS', 30))
+    GUEST_CART_PRUNE_INTERVAL = int(os.getenv('GUEST_CART_PRUNE_INTERVAL', 3600))
+    GUEST_CART_PRUNE_BATCH_SIZE = int(os.getenv('GUEST_CART_PRUNE_BATCH_SIZE', 1000))
+    
+    # Trigram fallback when full-text search finds nothing ("tshrt" -> "tshirt")
+    FUZZY_SEARCH_ENABLED = os.getenv('FUZZY_SEARCH_ENABLED', 'True').lower() == 'true'
+    FUZZY_SEARCH_THRESHOLD = float(os.getenv('FUZZY_SEARCH_THRESHOLD', 0.3))
+    FUZZY_SEARCH_MAX_CANDIDATES = int(os.getenv('FUZZY_SEARCH_MAX_CANDIDATES', 5000))
+    FUZZY_SEARCH_MAX_RESULTS = int(os.getenv('FUZZY_SEARCH_MAX_RESULTS', 200))
+    
+    # Response compression (gzip, or brotli when installed) for text/JSON bodies above the threshold
+    COMPRESSION_ENABLED = os.getenv('COMPRESSION_ENABLED', 'True').lower() == 'true'
+    COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', 1024))
+    COMPRESSION_LEVEL = int(os.getenv('COMPRESSION_LEVEL', 6))
+    COMPRESSION_BROTLI_QUALITY = int(os.getenv('COMPRESSION_BROTLI_QUALITY', 5))
+    COMPRESSION_ENCODINGS = [e.strip() for e in os.getenv('COMPRESSION_ENCODINGS', 'br,gzip').split(',') if e.strip()]
+    
+    # JSON encoding: 'auto' (orjson when installed), 'orjson' or 'stdlib'
+    JSON_PROVIDER = os.getenv('JSON_PROVIDER', 'auto').lower()
+    JSON_SORT_KEYS = os.getenv('JSON_SORT_KEYS', 'True').lower() == 'true'
+    
+    # Query budgets: raise instead of warn when a listing exceeds its query count
+    QUERY_BUDGET_STRICT = os.getenv('QUERY_BUDGET_STRICT', 'False').lower() == 'true'
+    QUERY_COUNT_HEADER = os.getenv('QUERY_COUNT_HEADER', 'False').lower() == 'true'
+    
     # Logging Settings
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
     LOG_FILE = os.getenv('LOG_FILE', 'logs/peckup.log')
@@ -0,0 +1,30 @@
+"""
+Gunicorn server hooks for Peckup
+
+Gunicorn picks this file up automatically from the working directory; the
+worker settings themselves stay on the command line (see systemd service).
+"""
+
+
+def post_worker_init(worker):
+    """Build the in-memory indexes and check for the full-text index before the worker takes requests"""
+    from app import app
+    from utils.product_suggest import product_suggest
+    from utils.fuzzy_index import fuzzy_index
+    from utils.facet_index import facet_index
+    from utils.product_search import product_search
+    with app.app_context():
+        product_search.warm()
+        product_suggest.warm()
+        fuzzy_index.warm()
+        facet_index.warm()
+
+
+def worker_exit(server, worker):
+    """Flush buffered analytics counters, events and sketches before the worker goes away"""
+    from utils.analytics_counter import analytics_counter
+    from utils.analytics_events import event_pipeline
+    from utils.analytics_sketches import sketch_store
+    analytics_counter.shutdown()
+    event_pipeline.shutdown()
+    sketch_store.shutdown()
@@ -1,20 +1,24 @@
 """
 Initialize Peckup Database and Create Admin User
 
-This script creates all database tables and sets up the default admin user.
-Run this script once to set up the database.
+This script creates all database tables, applies pending schema migrations
+(so existing databases are upgraded before the models query them) and sets
+up the default admin user. Run this script once to set up the database.
 """
 
 from app import create_app
 from models import db, User
+from utils.migrations import run_migrations
 
 def init_database():
     app = create_app()
     
     with app.app_context():
-        # Create all tables
-        db.create_all()
+        # Create missing tables and bring existing ones up to the current models
+        applied = run_migrations()
         print("✓ Database tables created successfully!")
+        if applied:
+            print(f"✓ Applied migration(s): {', '.join(map(str, applied))}")
         
         # Check if admin user exists
         admin_email = 'admin@peckup.in'
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Apply Schema Migrations
+Creates missing tables and applies pending migrations from utils/migrations.py.
+Safe to run repeatedly; `--status` lists applied and pending versions only.
+"""
+
+import sys
+
+from app import create_app
+from utils.migrations import MIGRATIONS, applied_versions, run_migrations
+
+
+def show_status():
+    applied = applied_versions()
+    for version, description, _ in sorted(MIGRATIONS):
+        mark = '✅' if version in applied else '⏳'
+        print(f"{mark} {version:>4}  {description}")
+
+
+def main():
+    app = create_app()
+    with app.app_context():
+        if '--status' in sys.argv:
+            show_status()
+            return True
+
+        print("🔧 Applying schema migrations...")
+        try:
+            applied = run_migrations()
+        except Exception as e:
+            print(f"❌ Migration failed: {e}")
+            return False
+
+        if applied:
+            print(f"✅ Applied {len(applied)} migration(s): {', '.join(map(str, applied))}")
+        else:
+            print("ℹ️  Database schema is up to date")
+        return True
+
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
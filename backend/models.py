@@ -25,6 +25,11 @@ class User(db.Model):
     last_login_at = db.Column(db.DateTime)
     login_count = db.Column(db.Integer, default=0)
     
+    # Bumped on every cart/wishlist/address write; used as ETag validators
+    cart_version = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    wishlist_version = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    address_version = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    
     # Timestamps
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -111,7 +116,8 @@ class Section(db.Model):
     # Relationships
     products = db.relationship('Product', backref='section', lazy=True)
     
-    def to_dict(self):
+    def to_dict(self, product_count):
+        # Counts come from one grouped query in utils.section_index, never per section
         return {
             'id': self.id,
             'name': self.name,
@@ -119,11 +125,16 @@ class Section(db.Model):
             'description': self.description,
             'display_order': self.display_order,
             'is_active': self.is_active,
-            'product_count': len(self.products)
+            'product_count': product_count
         }
 
 class Product(db.Model):
     __tablename__ = 'products'
+    __table_args__ = (
+        db.Index('ix_products_active_created', 'is_active', 'created_at'),
+        db.Index('ix_products_section_active', 'section_id', 'is_active'),
+        db.Index('ix_products_sale_active', 'is_on_sale', 'is_active'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     sku = db.Column(db.String(50), unique=True, nullable=False, index=True)
@@ -135,15 +146,49 @@ class Product(db.Model):
     is_on_sale = db.Column(db.Boolean, default=False)
     stock = db.Column(db.Integer, default=0)
     section_id = db.Column(db.Integer, db.ForeignKey('sections.id'), nullable=False)
-    images = db.Column(db.Text)  # JSON string of image URLs
-    sizes = db.Column(db.Text)  # JSON string of sizes
-    colors = db.Column(db.Text)  # JSON string of colors
     is_active = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Loaded with one extra query per collection for a whole page of products
+    image_rows = db.relationship('ProductImage', order_by='ProductImage.position', lazy='selectin',
+                                 cascade='all, delete-orphan')
+    variant_rows = db.relationship('ProductVariant', order_by='ProductVariant.position', lazy='selectin',
+                                   cascade='all, delete-orphan')
+    
+    @property
+    def images(self):
+        return [image.url for image in self.image_rows]
+    
+    @images.setter
+    def images(self, urls):
+        self.image_rows = [ProductImage(url=url, position=i) for i, url in enumerate(urls or [])]
+    
+    @property
+    def sizes(self):
+        return self._variant_values('size')
+    
+    @sizes.setter
+    def sizes(self, values):
+        self._set_variant_values('size', values)
+    
+    @property
+    def colors(self):
+        return self._variant_values('color')
+    
+    @colors.setter
+    def colors(self, values):
+        self._set_variant_values('color', values)
+    
+    def _variant_values(self, kind):
+        return [variant.value for variant in self.variant_rows if variant.kind == kind]
+    
+    def _set_variant_values(self, kind, values):
+        kept = [variant for variant in self.variant_rows if variant.kind != kind]
+        added = [ProductVariant(kind=kind, value=value, position=i) for i, value in enumerate(values or [])]
+        self.variant_rows = kept + added
+    
     def to_dict(self):
-        import json
         return {
             'id': self.id,
             'sku': self.sku,
@@ -156,21 +201,48 @@ class Product(db.Model):
             'stock': self.stock,
             'section_id': self.section_id,
             'category': self.section.slug if self.section else None,
-            'images': json.loads(self.images) if self.images else [],
-            'sizes': json.loads(self.sizes) if self.sizes else [],
-            'colors': json.loads(self.colors) if self.colors else [],
+            'images': self.images,
+            'sizes': self.sizes,
+            'colors': self.colors,
             'is_active': self.is_active
         }
 
+class ProductImage(db.Model):
+    __tablename__ = 'product_images'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False, index=True)
+    position = db.Column(db.Integer, default=0, nullable=False)
+    url = db.Column(db.String(500), nullable=False)
+
+class ProductVariant(db.Model):
+    """One size or color option of a product"""
+    __tablename__ = 'product_variants'
+    __table_args__ = (
+        db.Index('ix_product_variants_product', 'product_id', 'kind'),
+        db.Index('ix_product_variants_kind_value', 'kind', 'value', 'product_id'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
+    kind = db.Column(db.String(10), nullable=False)  # 'size' or 'color'
+    value = db.Column(db.String(50), nullable=False)
+    position = db.Column(db.Integer, default=0, nullable=False)
+
 class CartItem(db.Model):
     __tablename__ = 'cart_items'
+    __table_args__ = (
+        # One line per variant; the leading columns also serve user and (user, product) lookups
+        db.Index('uq_cart_items_variant', 'user_id', 'product_id', 'size', 'color', unique=True),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
     quantity = db.Column(db.Integer, default=1)
-    size = db.Column(db.String(50))
-    color = db.Column(db.String(50))
+    # '' means "no size/color": NULLs never collide in a unique index
+    size = db.Column(db.String(50), nullable=False, default='', server_default='')
+    color = db.Column(db.String(50), nullable=False, default='', server_default='')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     product = db.relationship('Product', backref='cart_items')
@@ -180,12 +252,43 @@ class CartItem(db.Model):
             'id': self.id,
             'product': self.product.to_dict() if self.product else None,
             'quantity': self.quantity,
-            'size': self.size,
-            'color': self.color
+            'size': self.size or None,
+            'color': self.color or None
+        }
+
+class GuestCartItem(db.Model):
+    """Cart line of a signed-out visitor, keyed by the opaque X-Guest-Cart token"""
+    __tablename__ = 'guest_cart_items'
+    __table_args__ = (
+        db.Index('uq_guest_cart_items_variant', 'guest_token', 'product_id', 'size', 'color', unique=True),
+        db.Index('ix_guest_cart_items_updated_at', 'updated_at'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    guest_token = db.Column(db.String(64), nullable=False)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
+    quantity = db.Column(db.Integer, default=1)
+    size = db.Column(db.String(50), nullable=False, default='', server_default='')
+    color = db.Column(db.String(50), nullable=False, default='', server_default='')
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    product = db.relationship('Product')
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'product': self.product.to_dict() if self.product else None,
+            'quantity': self.quantity,
+            'size': self.size or None,
+            'color': self.color or None
         }
 
 class WishlistItem(db.Model):
     __tablename__ = 'wishlist_items'
+    __table_args__ = (
+        db.Index('ix_wishlist_items_user_product', 'user_id', 'product_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -202,6 +305,10 @@ class WishlistItem(db.Model):
 
 class Order(db.Model):
     __tablename__ = 'orders'
+    __table_args__ = (
+        db.Index('ix_orders_user_created', 'user_id', 'created_at'),
+        db.Index('ix_orders_status_created', 'status', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     order_number = db.Column(db.String(50), unique=True, nullable=False, index=True)
@@ -316,3 +423,67 @@ class Analytics(db.Model):
             'count': self.count,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
+
+
+class AnalyticsEvent(db.Model):
+    """Append-only raw view/click events, compacted into AnalyticsRollup"""
+    __tablename__ = 'analytics_events'
+    __table_args__ = (
+        db.Index('ix_analytics_events_compacted', 'compacted', 'id'),
+    )
+    
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True)
+    event_type = db.Column(db.String(20), nullable=False)  # 'view' or 'click'
+    product_id = db.Column(db.Integer)
+    section_id = db.Column(db.Integer)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    # Set in the same transaction that adds the event to the rollups
+    compacted = db.Column(db.Boolean, default=False, nullable=False, server_default=db.false())
+
+class AnalyticsRollup(db.Model):
+    """Pre-aggregated event counts per hour/day bucket and product/section"""
+    __tablename__ = 'analytics_rollups'
+    __table_args__ = (
+        db.UniqueConstraint('granularity', 'dimension', 'event_type', 'bucket_start', 'dimension_id',
+                            name='uq_analytics_rollups_bucket'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    granularity = db.Column(db.String(10), nullable=False)  # 'hour' or 'day'
+    bucket_start = db.Column(db.DateTime, nullable=False)
+    dimension = db.Column(db.String(20), nullable=False)  # 'product' or 'section'
+    dimension_id = db.Column(db.Integer, nullable=False)
+    event_type = db.Column(db.String(20), nullable=False)
+    count = db.Column(db.Integer, default=0, nullable=False)
+    
+    def to_dict(self):
+        return {
+            'granularity': self.granularity,
+            'bucket_start': self.bucket_start.isoformat() if self.bucket_start else None,
+            'dimension': self.dimension,
+            'dimension_id': self.dimension_id,
+            'event_type': self.event_type,
+            'count': self.count
+        }
+
+class AnalyticsSketch(db.Model):
+    """Serialized per-day HyperLogLog / top-K sketch (see utils/sketches.py)"""
+    __tablename__ = 'analytics_sketches'
+    __table_args__ = (
+        db.UniqueConstraint('day', 'name', name='uq_analytics_sketches_day_name'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False)
+    name = db.Column(db.String(50), nullable=False)  # 'visitors', 'products', 'search_terms'
+    kind = db.Column(db.String(20), nullable=False)  # 'hll' or 'topk'
+    data = db.Column(db.LargeBinary(length=16777215), nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class SchemaMigration(db.Model):
+    """Applied schema migration versions (see utils/migrations.py)"""
+    __tablename__ = 'schema_migrations'
+    
+    version = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    description = db.Column(db.String(255), nullable=False)
+    applied_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -1,6 +1,8 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models import db, Address
+from utils import user_versions
+from utils.row_serializers import address_row
 
 addresses_bp = Blueprint('addresses', __name__)
 
@@ -11,13 +13,16 @@ def get_user_id():
 
 @addresses_bp.route('', methods=['GET'])
 @jwt_required()
+@user_versions.conditional('addresses')
 def get_addresses():
     """Get all addresses for current user"""
     user_id = get_user_id()
     
-    addresses = Address.query.filter_by(user_id=user_id).all()
+    addresses = db.session.execute(
+        address_row.select().where(Address.user_id == user_id).order_by(Address.id)
+    ).all()
     return jsonify({
-        'addresses': [address.to_dict() for address in addresses]
+        'addresses': address_row.many(addresses)
     }), 200
 
 @addresses_bp.route('/<int:address_id>', methods=['GET'])
@@ -64,6 +69,7 @@ def create_address():
     )
     
     db.session.add(address)
+    user_versions.bump(user_id, 'addresses')
     db.session.commit()
     
     return jsonify({
@@ -102,6 +108,7 @@ def update_address(address_id):
         Address.query.filter_by(user_id=user_id, is_default=True).update({'is_default': False})
         address.is_default = True
     
+    user_versions.bump(user_id, 'addresses')
     db.session.commit()
     
     return jsonify({
@@ -122,6 +129,7 @@ def delete_address(address_id):
     was_default = address.is_default
     
     db.session.delete(address)
+    user_versions.bump(user_id, 'addresses')
     db.session.commit()
     
     # If deleted address was default, make another one default
@@ -129,6 +137,7 @@ def delete_address(address_id):
         other_address = Address.query.filter_by(user_id=user_id).first()
         if other_address:
             other_address.is_default = True
+            user_versions.bump(user_id, 'addresses')
             db.session.commit()
     
     return jsonify({'message': 'Address deleted successfully'}), 200
@@ -147,6 +156,7 @@ def set_default_address(address_id):
     Address.query.filter_by(user_id=user_id, is_default=True).update({'is_default': False})
     
     address.is_default = True
+    user_versions.bump(user_id, 'addresses')
     db.session.commit()
     
     return jsonify({
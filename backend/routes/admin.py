@@ -1,10 +1,18 @@
 from flask import Blueprint, request, jsonify, current_app, send_from_directory, send_file
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models import db, User, Section, Product
+from utils.query_budget import query_budget
+from utils.catalog_cache import catalog_cache
+from utils import catalog_sync
+from utils.product_search import product_search
+from utils.pagination import keyset_paginate, InvalidCursor
+from utils.section_index import section_index
+from utils.product_fields import full_fieldset
+from utils.row_serializers import user_row
+from utils.order_rows import order_query, order_dicts
 from functools import wraps
 from werkzeug.utils import secure_filename
 from datetime import datetime
-import json
 import os
 import uuid
 from PIL import Image
@@ -111,8 +119,8 @@ def upload_image():
 @admin_bp.route('/users', methods=['GET'])
 @admin_required
 def get_users():
-    users = User.query.all()
-    return jsonify({'users': [user.to_dict() for user in users]}), 200
+    users = db.session.execute(user_row.select().order_by(User.id)).all()
+    return jsonify({'users': user_row.many(users)}), 200
 
 @admin_bp.route('/users/<int:user_id>', methods=['GET'])
 @admin_required
@@ -256,8 +264,7 @@ def delete_user(user_id):
 @admin_bp.route('/sections', methods=['GET'])
 @admin_required
 def get_sections():
-    sections = Section.query.order_by(Section.display_order).all()
-    return jsonify({'sections': [section.to_dict() for section in sections]}), 200
+    return jsonify({'sections': section_index.all(active_only=False)}), 200
 
 @admin_bp.route('/sections', methods=['POST'])
 @admin_required
@@ -280,8 +287,9 @@ def create_section():
     
     db.session.add(section)
     db.session.commit()
+    catalog_sync.sections_changed()
     
-    return jsonify({'message': 'Section created successfully', 'section': section.to_dict()}), 201
+    return jsonify({'message': 'Section created successfully', 'section': section_index.get_by_id(section.id)}), 201
 
 @admin_bp.route('/sections/<int:section_id>', methods=['PUT'])
 @admin_required
@@ -307,7 +315,8 @@ def update_section(section_id):
         section.is_active = data['is_active']
     
     db.session.commit()
-    return jsonify({'message': 'Section updated successfully', 'section': section.to_dict()}), 200
+    catalog_sync.sections_changed()
+    return jsonify({'message': 'Section updated successfully', 'section': section_index.get_by_id(section.id)}), 200
 
 @admin_bp.route('/sections/<int:section_id>', methods=['DELETE'])
 @admin_required
@@ -319,6 +328,7 @@ def delete_section(section_id):
         return jsonify({'error': 'Section not found'}), 404
     
     force = request.args.get('force', 'false').lower() == 'true'
+    moved = list(section.products)
     
     if section.products and not force:
         return jsonify({'error': 'Cannot delete section with products'}), 400
@@ -344,6 +354,9 @@ def delete_section(section_id):
     
     db.session.delete(section)
     db.session.commit()
+    catalog_sync.sections_changed()
+    if moved:
+        catalog_sync.products_changed(moved)
     
     return jsonify({'message': 'Section deleted successfully'}), 200
 
@@ -356,38 +369,49 @@ def toggle_section_status(section_id):
     
     section.is_active = not section.is_active
     db.session.commit()
+    catalog_sync.sections_changed()
     
-    return jsonify({'message': 'Section status updated successfully', 'section': section.to_dict()}), 200
+    return jsonify({'message': 'Section status updated successfully', 'section': section_index.get_by_id(section.id)}), 200
 
 # Product Management
 @admin_bp.route('/products', methods=['GET'])
 @admin_required
+@query_budget(5)  # page, count, images, variants; +1 full-text index probe on a fresh worker
 def get_all_products():
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 20, type=int)
     section_id = request.args.get('section_id', type=int)
     search = request.args.get('search', '')
+    cursor = request.args.get('cursor')
     
+    fieldset = full_fieldset()
     query = Product.query
     
     if section_id:
         query = query.filter_by(section_id=section_id)
     
+    if cursor is not None:
+        if search:
+            query = product_search.apply(query, search, include_sku=True, rank=False)
+        try:
+            items, next_cursor = keyset_paginate(fieldset.prepare(query), Product, cursor, per_page)
+        except InvalidCursor as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify({
+            'products': fieldset.serialize(items),
+            'next_cursor': next_cursor,
+            'has_more': next_cursor is not None
+        }), 200
+    
     if search:
-        query = query.filter(
-            db.or_(
-                Product.title.contains(search),
-                Product.sku.contains(search),
-                Product.description.contains(search)
-            )
-        )
+        query = product_search.apply(query, search, include_sku=True)
     
-    products = query.order_by(Product.created_at.desc()).paginate(
+    products = fieldset.prepare(query).order_by(Product.created_at.desc()).paginate(
         page=page, per_page=per_page, error_out=False
     )
     
     return jsonify({
-        'products': [product.to_dict() for product in products.items],
+        'products': fieldset.serialize(products.items),
         'total': products.total,
         'pages': products.pages,
         'current_page': page
@@ -430,14 +454,15 @@ def create_product():
         is_on_sale=data.get('is_on_sale', False),
         stock=data.get('stock', 0),
         section_id=data['section_id'],
-        images=json.dumps(data.get('images', [])),
-        sizes=json.dumps(data.get('sizes', [])),
-        colors=json.dumps(data.get('colors', [])),
+        images=data.get('images', []),
+        sizes=data.get('sizes', []),
+        colors=data.get('colors', []),
         is_active=data.get('is_active', True)
     )
     
     db.session.add(product)
     db.session.commit()
+    catalog_sync.products_changed([product])
     
     return jsonify({'message': 'Product created successfully', 'product': product.to_dict()}), 201
 
@@ -480,15 +505,16 @@ def update_product(product_id):
             return jsonify({'error': 'Section not found'}), 404
         product.section_id = data['section_id']
     if 'images' in data:
-        product.images = json.dumps(data['images'])
+        product.images = data['images']
     if 'sizes' in data:
-        product.sizes = json.dumps(data['sizes'])
+        product.sizes = data['sizes']
     if 'colors' in data:
-        product.colors = json.dumps(data['colors'])
+        product.colors = data['colors']
     if 'is_active' in data:
         product.is_active = data['is_active']
     
     db.session.commit()
+    catalog_sync.products_changed([product])
     return jsonify({'message': 'Product updated successfully', 'product': product.to_dict()}), 200
 
 @admin_bp.route('/products/<int:product_id>/toggle-status', methods=['POST'])
@@ -500,12 +526,19 @@ def toggle_product_status(product_id):
     
     product.is_active = not product.is_active
     db.session.commit()
+    catalog_sync.products_changed([product])
     
     return jsonify({
         'message': f'Product {"activated" if product.is_active else "deactivated"} successfully',
         'product': product.to_dict()
     }), 200
 
+# Catalog cache statistics (per worker for the memory backend)
+@admin_bp.route('/cache/stats', methods=['GET'])
+@admin_required
+def get_cache_stats():
+    return jsonify({'catalog_cache': catalog_cache.stats()}), 200
+
 # Dashboard Stats
 @admin_bp.route('/stats', methods=['GET'])
 @admin_required
@@ -533,20 +566,19 @@ def delete_product(product_id):
     
     # Delete associated image files
     try:
-        if product.images:
-            images = json.loads(product.images)
-            for image_url in images:
-                if '/uploads/' in image_url:
-                    # Extract filename from URL
-                    filename = image_url.split('/uploads/')[-1]
-                    file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-                    if os.path.exists(file_path):
-                        os.remove(file_path)
+        for image_url in product.images:
+            if '/uploads/' in image_url:
+                # Extract filename from URL
+                filename = image_url.split('/uploads/')[-1]
+                file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
+                if os.path.exists(file_path):
+                    os.remove(file_path)
     except Exception as e:
         print(f"Error deleting image files: {e}")
     
     db.session.delete(product)
     db.session.commit()
+    catalog_sync.product_removed(product_id)
     
     return jsonify({'message': 'Product deleted successfully'}), 200
 
@@ -610,6 +642,7 @@ def bulk_upload_products():
             'errors': [],
             'created_products': []
         }
+        created_products = []
         
         print(f"Processing {len(df)} rows...")
         
@@ -628,9 +661,9 @@ def bulk_upload_products():
                 
                 # Find section
                 section_slug = str(row['section_slug']).strip().lower()
-                section = Section.query.filter_by(slug=section_slug).first()
+                section = section_index.get(section_slug, active_only=False)
                 if not section:
-                    available_sections = [s.slug for s in Section.query.all()]
+                    available_sections = [s['slug'] for s in section_index.all(active_only=False)]
                     error_msg = f"Row {index + 2}: Section '{section_slug}' not found. Available: {available_sections}"
                     results['errors'].append(error_msg)
                     continue
@@ -695,14 +728,15 @@ def bulk_upload_products():
                     original_price=float(row['original_price']) if not pd.isna(row.get('original_price')) and row.get('original_price') != '' else None,
                     is_on_sale=bool(row.get('is_on_sale', False)) if not pd.isna(row.get('is_on_sale')) else False,
                     stock=int(row.get('stock', 0)) if not pd.isna(row.get('stock')) else 0,
-                    section_id=section.id,
-                    images=json.dumps(image_urls),
-                    sizes=json.dumps([s.strip() for s in str(row.get('sizes', '')).split(',') if s.strip()]) if not pd.isna(row.get('sizes')) else json.dumps([]),
-                    colors=json.dumps([c.strip() for c in str(row.get('colors', '')).split(',') if c.strip()]) if not pd.isna(row.get('colors')) else json.dumps([]),
+                    section_id=section['id'],
+                    images=image_urls,
+                    sizes=[s.strip() for s in str(row.get('sizes', '')).split(',') if s.strip()] if not pd.isna(row.get('sizes')) else [],
+                    colors=[c.strip() for c in str(row.get('colors', '')).split(',') if c.strip()] if not pd.isna(row.get('colors')) else [],
                     is_active=bool(row.get('is_active', True)) if not pd.isna(row.get('is_active')) else True
                 )
                 
                 db.session.add(product)
+                created_products.append(product)
                 results['success'] += 1
                 results['created_products'].append({
                     'sku': product.sku,
@@ -716,6 +750,7 @@ def bulk_upload_products():
         # Commit all changes
         if results['success'] > 0:
             db.session.commit()
+            catalog_sync.products_changed(created_products)
         
         return jsonify({
             'message': f'Bulk upload completed. {results["success"]} products created.',
@@ -829,19 +864,16 @@ def bulk_upload_images():
 # Order Management
 @admin_bp.route('/orders', methods=['GET'])
 @admin_required
+@query_budget(9)
 def get_all_orders():
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 20, type=int)
     status = request.args.get('status')
     search = request.args.get('search', '')
     
-    from models import Order, User, OrderItem, Product
+    from models import Order, User
     
-    query = Order.query.options(
-        db.joinedload(Order.user),
-        db.joinedload(Order.address),
-        db.joinedload(Order.order_items).joinedload(OrderItem.product)
-    )
+    query = order_query(Order.query)
     
     if status:
         query = query.filter_by(status=status)
@@ -856,12 +888,24 @@ def get_all_orders():
             )
         )
     
+    cursor = request.args.get('cursor')
+    if cursor is not None:
+        try:
+            items, next_cursor = keyset_paginate(query, Order, cursor, per_page)
+        except InvalidCursor as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify({
+            'orders': order_dicts(items, include_user=True),
+            'next_cursor': next_cursor,
+            'has_more': next_cursor is not None
+        }), 200
+    
     orders = query.order_by(Order.created_at.desc()).paginate(
         page=page, per_page=per_page, error_out=False
     )
     
     return jsonify({
-        'orders': [order.to_dict(include_user=True) for order in orders.items],
+        'orders': order_dicts(orders.items, include_user=True),
         'total': orders.total,
         'pages': orders.pages,
         'current_page': page
@@ -875,7 +919,7 @@ def get_admin_order(order_id):
     order = Order.query.options(
         db.joinedload(Order.user),
         db.joinedload(Order.address),
-        db.joinedload(Order.order_items).joinedload(OrderItem.product)
+        db.joinedload(Order.order_items).joinedload(OrderItem.product).joinedload(Product.section)
     ).filter_by(id=order_id).first()
     
     if not order:
@@ -945,7 +989,7 @@ def download_admin_receipt(order_id):
     order = Order.query.options(
         db.joinedload(Order.user),
         db.joinedload(Order.address),
-        db.joinedload(Order.order_items).joinedload(OrderItem.product)
+        db.joinedload(Order.order_items).joinedload(OrderItem.product).joinedload(Product.section)
     ).filter_by(id=order_id).first()
     
     if not order:
@@ -1,8 +1,16 @@
-from flask import Blueprint, request, jsonify
-from models import db, Analytics
+from flask import Blueprint, Response, current_app, request, jsonify
+from models import db, Analytics, AnalyticsRollup, Product, Section
 from functools import wraps
+from datetime import datetime, timedelta
+import json
+import threading
+import time
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models import User
+from utils.analytics_counter import analytics_counter
+from utils.analytics_events import event_pipeline, bucket_start, EVENT_TYPES, GRANULARITIES, DIMENSIONS
+from utils.analytics_sketches import sketch_store
+import hashlib
 
 analytics_bp = Blueprint('analytics', __name__)
 
@@ -25,71 +33,258 @@ def admin_required(fn):
         return fn(*args, **kwargs)
     return wrapper
 
+def _positive_int(value):
+    # bool is an int subclass: {"product_id": true} must not count as product 1
+    return isinstance(value, int) and not isinstance(value, bool) and value > 0
+
+def get_visitor_id():
+    """Client-supplied visitor id, or a hash of client address and user agent"""
+    data = request.get_json(force=True, silent=True)
+    visitor_id = data.get('visitor_id') if isinstance(data, dict) else None
+    if isinstance(visitor_id, str) and visitor_id:
+        return visitor_id[:64]
+    client_ip = request.headers.get('X-Forwarded-For', request.remote_addr or '').split(',')[0].strip()
+    fingerprint = f"{client_ip}|{request.headers.get('User-Agent', '')}"
+    return hashlib.sha256(fingerprint.encode('utf-8')).hexdigest()
+
 # Public endpoint to get analytics
 @analytics_bp.route('/analytics', methods=['GET'])
 def get_analytics():
-    """Get current analytics counts"""
+    """Get current analytics counts (cached per worker, supports ETag/304)"""
     try:
-        views = Analytics.query.filter_by(metric_name='views').first()
-        clicks = Analytics.query.filter_by(metric_name='clicks').first()
+        counts = analytics_counter.snapshot()
         
-        # Initialize if not exists
-        if not views:
-            views = Analytics(metric_name='views', count=0)
-            db.session.add(views)
-            db.session.commit()
-        
-        if not clicks:
-            clicks = Analytics(metric_name='clicks', count=0)
-            db.session.add(clicks)
-            db.session.commit()
-        
-        return jsonify({
-            'views': views.count,
-            'clicks': clicks.count
-        }), 200
+        response = jsonify(counts)
+        response.set_etag(f"{counts['views']}-{counts['clicks']}", weak=True)
+        response.cache_control.public = True
+        response.cache_control.max_age = int(current_app.config.get('ANALYTICS_CACHE_TTL', 2))
+        return response.make_conditional(request)
     except Exception as e:
         print(f"Error getting analytics: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+# Open SSE streams in this worker; each one holds a worker thread until it ends
+_open_streams = 0
+_open_streams_lock = threading.Lock()
+
+def _release_stream():
+    global _open_streams
+    with _open_streams_lock:
+        _open_streams -= 1
+
+# Public Server-Sent Events stream pushing count changes (the storefront polls GET /analytics instead)
+@analytics_bp.route('/analytics/stream', methods=['GET'])
+def stream_analytics():
+    """Push analytics counts to the client whenever they change"""
+    global _open_streams
+    poll_interval = current_app.config.get('ANALYTICS_STREAM_POLL_SECONDS', 1.0)
+    max_duration = current_app.config.get('ANALYTICS_STREAM_MAX_SECONDS', 300)
+    max_streams = current_app.config.get('ANALYTICS_STREAM_MAX_PER_WORKER', 4)
+    heartbeat_interval = 15
+    
+    # Refuse fast rather than let streams take every thread the API has
+    with _open_streams_lock:
+        if _open_streams >= max_streams:
+            response = jsonify({'error': 'Too many open analytics streams, poll /api/analytics instead'})
+            response.status_code = 503
+            response.headers['Retry-After'] = '30'
+            return response
+        _open_streams += 1
+    
+    def generate():
+        # Every stream in the worker reads the same cached snapshot, so open
+        # tabs add no database load beyond the per-worker TTL refresh.
+        started = last_sent_at = time.monotonic()
+        last_counts = None
+        yield 'retry: 5000\n\n'
+        while time.monotonic() - started < max_duration:
+            counts = analytics_counter.snapshot()
+            now = time.monotonic()
+            if counts != last_counts:
+                yield f"event: analytics\ndata: {json.dumps(counts)}\n\n"
+                last_counts = counts
+                last_sent_at = now
+            elif now - last_sent_at >= heartbeat_interval:
+                yield ': keep-alive\n\n'
+                last_sent_at = now
+            time.sleep(poll_interval)
+    
+    response = Response(generate(), mimetype='text/event-stream')
+    response.call_on_close(_release_stream)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
 # Public endpoint to increment view count
 @analytics_bp.route('/analytics/view', methods=['POST'])
 def increment_view():
-    """Increment view count"""
+    """Increment view count (buffered, flushed in batches)"""
     try:
-        views = Analytics.query.filter_by(metric_name='views').first()
-        if not views:
-            views = Analytics(metric_name='views', count=1)
-            db.session.add(views)
-        else:
-            views.count += 1
-        
-        db.session.commit()
-        return jsonify({'views': views.count}), 200
+        analytics_counter.increment('views')
+        sketch_store.record_visitor(get_visitor_id())
+        return jsonify({'views': analytics_counter.value('views')}), 200
     except Exception as e:
         print(f"Error incrementing view: {str(e)}")
-        db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 # Public endpoint to increment click count
 @analytics_bp.route('/analytics/click', methods=['POST'])
 def increment_click():
-    """Increment click count"""
+    """Increment click count (buffered, flushed in batches)"""
     try:
-        clicks = Analytics.query.filter_by(metric_name='clicks').first()
-        if not clicks:
-            clicks = Analytics(metric_name='clicks', count=1)
-            db.session.add(clicks)
-        else:
-            clicks.count += 1
-        
-        db.session.commit()
-        return jsonify({'clicks': clicks.count}), 200
+        analytics_counter.increment('clicks')
+        return jsonify({'clicks': analytics_counter.value('clicks')}), 200
     except Exception as e:
         print(f"Error incrementing click: {str(e)}")
-        db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+# Public beacon endpoint for batched per-product/per-section events
+@analytics_bp.route('/analytics/events', methods=['POST'])
+def ingest_events():
+    """Accept a batch of view/click events; they are buffered and bulk-inserted"""
+    # sendBeacon posts text/plain, so parse the body regardless of content type
+    data = request.get_json(force=True, silent=True)
+    events = data.get('events') if isinstance(data, dict) else data
+    if not isinstance(events, list):
+        return jsonify({'error': 'Expected a list of events'}), 400
+    
+    max_batch = current_app.config.get('ANALYTICS_EVENT_MAX_BATCH', 100)
+    if len(events) > max_batch:
+        return jsonify({'error': f'At most {max_batch} events per request'}), 413
+    received = len(events)
+    
+    # Resolve section slugs and check ids against the catalog with one query per table
+    events = [e for e in events if isinstance(e, dict) and e.get('type') in EVENT_TYPES]
+    slugs = {e['section'] for e in events if isinstance(e.get('section'), str)}
+    requested_sections = {e['section_id'] for e in events if _positive_int(e.get('section_id'))}
+    requested_products = {e['product_id'] for e in events if _positive_int(e.get('product_id'))}
+    section_ids, known_sections, known_products = {}, set(), set()
+    if slugs or requested_sections:
+        for section_id, slug in db.session.query(Section.id, Section.slug).filter(
+            db.or_(Section.slug.in_(slugs), Section.id.in_(requested_sections))
+        ):
+            section_ids[slug] = section_id
+            known_sections.add(section_id)
+    if requested_products:
+        known_products = set(db.session.scalars(db.select(Product.id).where(Product.id.in_(requested_products))))
+    
+    now = datetime.utcnow()
+    accepted = []
+    for event in events:
+        product_id = event.get('product_id')
+        section_id = event.get('section_id')
+        if section_id is None and event.get('section') is not None:
+            section_id = section_ids.get(event['section'], 0)
+        # Unknown ids would show up in the rollups and top-K sketch without a name
+        if product_id is not None and not (_positive_int(product_id) and product_id in known_products):
+            continue
+        if section_id is not None and not (_positive_int(section_id) and section_id in known_sections):
+            continue
+        if product_id is None and section_id is None:
+            continue
+        accepted.append({
+            'event_type': event['type'],
+            'product_id': product_id,
+            'section_id': section_id,
+            'created_at': now
+        })
+    
+    if accepted:
+        event_pipeline.record(accepted)
+        for event in accepted:
+            if event['event_type'] == 'view' and event['product_id'] is not None:
+                sketch_store.record_product(event['product_id'])
+    
+    return jsonify({'accepted': len(accepted), 'rejected': received - len(accepted)}), 202
+
+# Admin endpoint reading pre-aggregated event rollups
+@analytics_bp.route('/admin/analytics/rollups', methods=['GET', 'OPTIONS'])
+@admin_required
+def get_analytics_rollups():
+    """Time series and top items from the hourly/daily rollup tables"""
+    granularity = request.args.get('granularity', 'day')
+    dimension = request.args.get('dimension', 'product')
+    event_type = request.args.get('event_type', 'view')
+    days = min(request.args.get('days', 7, type=int), 365)
+    limit = min(request.args.get('limit', 10, type=int), 100)
+    
+    if granularity not in GRANULARITIES or dimension not in DIMENSIONS or event_type not in EVENT_TYPES:
+        return jsonify({'error': 'Invalid granularity, dimension or event_type'}), 400
+    
+    end = datetime.utcnow()
+    start = bucket_start(end - timedelta(days=days), granularity)
+    window = db.and_(
+        AnalyticsRollup.granularity == granularity,
+        AnalyticsRollup.dimension == dimension,
+        AnalyticsRollup.event_type == event_type,
+        AnalyticsRollup.bucket_start >= start
+    )
+    
+    series = db.session.query(
+        AnalyticsRollup.bucket_start,
+        db.func.sum(AnalyticsRollup.count)
+    ).filter(window).group_by(AnalyticsRollup.bucket_start).order_by(AnalyticsRollup.bucket_start).all()
+    
+    total = db.func.sum(AnalyticsRollup.count).label('total')
+    top = db.session.query(
+        AnalyticsRollup.dimension_id,
+        total
+    ).filter(window).group_by(AnalyticsRollup.dimension_id).order_by(total.desc()).limit(limit).all()
+    
+    names = {}
+    ids = [dimension_id for dimension_id, _ in top]
+    if ids:
+        if dimension == 'product':
+            names = dict(db.session.query(Product.id, Product.title).filter(Product.id.in_(ids)).all())
+        else:
+            names = dict(db.session.query(Section.id, Section.name).filter(Section.id.in_(ids)).all())
+    
+    return jsonify({
+        'granularity': granularity,
+        'dimension': dimension,
+        'event_type': event_type,
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'series': [
+            {'bucket_start': bucket.isoformat(), 'count': int(count or 0)}
+            for bucket, count in series
+        ],
+        'top': [
+            {'id': dimension_id, 'name': names.get(dimension_id), 'count': int(count or 0)}
+            for dimension_id, count in top
+        ]
+    }), 200
+
+# Admin endpoint for unique visitors and leaderboards from the daily sketches
+@analytics_bp.route('/admin/analytics/sketches', methods=['GET', 'OPTIONS'])
+@admin_required
+def get_analytics_sketches():
+    """Unique visitors (HyperLogLog) and top products/search terms (count-min)"""
+    days = max(1, min(request.args.get('days', 7, type=int), 90))
+    limit = max(1, min(request.args.get('limit', 10, type=int), 50))
+    
+    top_products = sketch_store.load('products', days).top(limit)
+    top_terms = sketch_store.load('search_terms', days).top(limit)
+    
+    names = {}
+    if top_products:
+        ids = [product_id for product_id, _ in top_products]
+        names = dict(db.session.query(Product.id, Product.title).filter(Product.id.in_(ids)).all())
+    
+    return jsonify({
+        'days': days,
+        'unique_visitors': sketch_store.load('visitors', days).count(),
+        'daily_unique_visitors': sketch_store.daily_uniques(days),
+        'top_products': [
+            {'id': product_id, 'name': names.get(product_id), 'estimate': estimate}
+            for product_id, estimate in top_products
+        ],
+        'top_search_terms': [
+            {'term': term, 'estimate': estimate}
+            for term, estimate in top_terms
+        ]
+    }), 200
+
 # Admin endpoint to update analytics
 @analytics_bp.route('/admin/analytics', methods=['PUT', 'OPTIONS'])
 @admin_required
@@ -119,6 +314,10 @@ def update_analytics():
         # Return updated values
         views = Analytics.query.filter_by(metric_name='views').first()
         clicks = Analytics.query.filter_by(metric_name='clicks').first()
+        if views:
+            analytics_counter.set_total('views', views.count)
+        if clicks:
+            analytics_counter.set_total('clicks', clicks.count)
         
         return jsonify({
             'success': True,
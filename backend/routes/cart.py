@@ -1,33 +1,102 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, g
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, CartItem, Product
+from sqlalchemy.exc import IntegrityError
+from models import db, CartItem, GuestCartItem, Product
+from utils import user_versions
+from utils.query_budget import query_budget
+from utils.product_fields import full_fieldset
+from utils.catalog_cache import MemoryBackend
+from utils.cart_writes import (
+    find_line, line_row, merge_guest_cart, owner_column, upsert_lines, variant_value
+)
+from utils.guest_carts import guest_cart_pruner
+import re
+import secrets
+import time
 
 cart_bp = Blueprint('cart', __name__)
 
+# Per-worker LRU of cart summaries; superseded entries just age out
+summary_cache = MemoryBackend(max_entries=4096)
+
+MAX_CART_OPERATIONS = 100
+
+# Signed-out visitors send the token issued by POST /api/cart/guest in this header
+GUEST_TOKEN_HEADER = 'X-Guest-Cart'
+GUEST_TOKEN_PATTERN = re.compile(r'^[A-Za-z0-9_-]{16,64}$')
+
 def get_user_id():
     """Helper to get user ID from JWT and convert to int"""
     user_id = get_jwt_identity()
     return int(user_id) if isinstance(user_id, str) else user_id
 
+def get_guest_token(value=None):
+    """The guest cart token from value or the X-Guest-Cart header, if well-formed"""
+    token = value if value is not None else request.headers.get(GUEST_TOKEN_HEADER, '')
+    return token if isinstance(token, str) and GUEST_TOKEN_PATTERN.match(token) else None
+
+def _positive_int(value):
+    return isinstance(value, int) and not isinstance(value, bool) and value > 0
+
+def cart_contents(owner, model=CartItem):
+    """(items, subtotal) from one cart/product/section join plus the image and variant lookups"""
+    fieldset = full_fieldset()
+    rows = fieldset.prepare(
+        Product.query.join(model, model.product_id == Product.id).filter(owner_column(model) == owner),
+        model.id.label('item_id'), model.quantity.label('item_quantity'),
+        model.size.label('item_size'), model.color.label('item_color')
+    ).order_by(model.id).all()
+    
+    items = [
+        {
+            'id': row.item_id,
+            'product': product,
+            'quantity': row.item_quantity,
+            'size': row.item_size or None,
+            'color': row.item_color or None
+        }
+        for row, product in zip(rows, fieldset.serialize(rows))
+    ]
+    subtotal = sum(row.price * row.item_quantity for row in rows)
+    return items, subtotal
+
 @cart_bp.route('', methods=['GET'])
 @jwt_required()
+@user_versions.conditional('cart', include_catalog=True)
+@query_budget(3)
 def get_cart():
     """Get cart items for current user"""
     user_id = get_user_id()
     
-    cart_items = CartItem.query.filter_by(user_id=user_id).all()
+    return cart_response(user_id)
+
+@cart_bp.route('/summary', methods=['GET'])
+@jwt_required()
+@user_versions.conditional('cart', include_catalog=True)
+@query_budget(1)
+def get_cart_summary():
+    """Item count and subtotal for the header mini-cart (one aggregate query)"""
+    user_id = get_user_id()
+    
+    # Keyed on the cart/catalog version tag, so any cart write or price change misses
+    cached = summary_cache.get(g.user_version_tag)
+    if cached is not None:
+        return jsonify(cached[1]), 200
     
-    # Calculate totals
-    subtotal = sum(
-        (item.product.price * item.quantity) if item.product else 0 
-        for item in cart_items
-    )
+    lines, quantity, subtotal = db.session.query(
+        db.func.count(CartItem.id),
+        db.func.coalesce(db.func.sum(CartItem.quantity), 0),
+        db.func.coalesce(db.func.sum(Product.price * CartItem.quantity), 0)
+    ).join(Product, Product.id == CartItem.product_id).filter(CartItem.user_id == user_id).one()
     
-    return jsonify({
-        'items': [item.to_dict() for item in cart_items],
-        'subtotal': subtotal,
-        'total': subtotal  # Add shipping/tax logic here if needed
-    }), 200
+    summary = {
+        'item_count': int(quantity),
+        'line_count': lines,
+        'subtotal': float(subtotal),
+        'total': float(subtotal)
+    }
+    summary_cache.set(g.user_version_tag, time.time(), summary)
+    return jsonify(summary), 200
 
 @cart_bp.route('', methods=['POST'])
 @jwt_required()
@@ -36,46 +105,231 @@ def add_to_cart():
     user_id = get_user_id()
     data = request.get_json()
     
+    product, quantity, error = validate_add(data)
+    if error:
+        return error
+    
+    # One INSERT ... ON DUPLICATE KEY / ON CONFLICT: concurrent adds of a variant land on one line
+    upsert_lines(CartItem, [line_row(CartItem, user_id, product.id, quantity, data.get('size'), data.get('color'))])
+    user_versions.bump(user_id, 'cart')
+    db.session.commit()
+    
+    return added_response(find_line(CartItem, user_id, product.id, data.get('size'), data.get('color')), quantity)
+
+def validate_add(data):
+    """(product, quantity, None) for a valid add-to-cart body, else (None, None, error response)"""
     if not data or not data.get('product_id'):
-        return jsonify({'error': 'Product ID is required'}), 400
+        return None, None, (jsonify({'error': 'Product ID is required'}), 400)
     
     product = db.session.get(Product, data['product_id'])
     if not product or not product.is_active:
-        return jsonify({'error': 'Product not found'}), 404
-    
-    # Check if item already in cart with same size/color
-    existing_item = CartItem.query.filter_by(
-        user_id=user_id,
-        product_id=data['product_id'],
-        size=data.get('size'),
-        color=data.get('color')
-    ).first()
-    
-    if existing_item:
-        # Update quantity
-        existing_item.quantity += data.get('quantity', 1)
-        db.session.commit()
+        return None, None, (jsonify({'error': 'Product not found'}), 404)
+    
+    quantity = data.get('quantity', 1)
+    if not _positive_int(quantity):
+        return None, None, (jsonify({'error': 'Quantity must be a positive integer'}), 400)
+    return product, quantity, None
+
+def added_response(line, quantity, **extra):
+    if line.quantity > quantity:
         return jsonify({
             'message': 'Cart updated',
-            'item': existing_item.to_dict()
+            'item': line.to_dict(),
+            **extra
         }), 200
     
-    # Create new cart item
-    cart_item = CartItem(
-        user_id=user_id,
-        product_id=data['product_id'],
-        quantity=data.get('quantity', 1),
-        size=data.get('size'),
-        color=data.get('color')
-    )
+    return jsonify({
+        'message': 'Item added to cart',
+        'item': line.to_dict(),
+        **extra
+    }), 201
+
+def parse_operations(operations):
+    """(adds, quantities, removals) from a PATCH body, or an error message
+
+    Per item id the last update/remove wins; an update to quantity <= 0 removes the line.
+    """
+    if not isinstance(operations, list) or not operations:
+        return None, 'operations must be a non-empty list'
+    if len(operations) > MAX_CART_OPERATIONS:
+        return None, f'At most {MAX_CART_OPERATIONS} operations per request'
+    
+    adds, quantities, removals = [], {}, set()
+    for index, operation in enumerate(operations):
+        kind = operation.get('op') if isinstance(operation, dict) else None
+        if kind == 'add':
+            if not _positive_int(operation.get('product_id')) or not _positive_int(operation.get('quantity', 1)):
+                return None, f'operations[{index}]: add needs product_id and a positive quantity'
+            adds.append(operation)
+        elif kind in ('update', 'remove'):
+            item_id = operation.get('item_id')
+            quantity = operation.get('quantity') if kind == 'update' else 0
+            if not _positive_int(item_id) or not isinstance(quantity, int) or isinstance(quantity, bool):
+                return None, f'operations[{index}]: {kind} needs item_id' + (' and quantity' if kind == 'update' else '')
+            if quantity > 0:
+                quantities[item_id] = quantity
+                removals.discard(item_id)
+            else:
+                removals.add(item_id)
+                quantities.pop(item_id, None)
+        else:
+            return None, f"operations[{index}]: op must be 'add', 'update' or 'remove'"
+    return (adds, quantities, removals), None
+
+@cart_bp.route('', methods=['PATCH'])
+@jwt_required()
+@query_budget(8)
+def patch_cart():
+    """Apply several add/update/remove operations in one transaction and return the new cart
+    
+    Body: {"operations": [{"op": "add", "product_id", "quantity", "size", "color"},
+                          {"op": "update", "item_id", "quantity"}, {"op": "remove", "item_id"}]}
+    Removals and quantity updates run before adds, one statement each.
+    """
+    user_id = get_user_id()
+    data = request.get_json(silent=True) or {}
+    
+    parsed, error = parse_operations(data.get('operations'))
+    if error:
+        return jsonify({'error': error}), 400
+    error = apply_operations(CartItem, user_id, *parsed)
+    if error:
+        return error
     
-    db.session.add(cart_item)
+    user_versions.bump(user_id, 'cart')
     db.session.commit()
     
+    return cart_response(user_id, message='Cart updated')
+
+def apply_operations(model, owner, adds, quantities, removals):
+    """Run parsed operations against one owner's lines (uncommitted); an error response or None"""
+    if adds:
+        product_ids = {operation['product_id'] for operation in adds}
+        active = set(db.session.scalars(
+            db.select(Product.id).where(Product.id.in_(product_ids), Product.is_active.is_(True))
+        ))
+        if product_ids - active:
+            return jsonify({'error': 'Product not found', 'product_ids': sorted(product_ids - active)}), 404
+    
+    owned = owner_column(model) == owner
+    if removals:
+        db.session.execute(db.delete(model).where(owned, model.id.in_(removals)))
+    if quantities:
+        updated = db.session.execute(
+            db.update(model)
+            .where(owned, model.id.in_(quantities))
+            .values(quantity=db.case(quantities, value=model.id))
+        ).rowcount
+        if updated != len(quantities):
+            db.session.rollback()
+            return jsonify({'error': 'Cart item not found'}), 404
+    upsert_lines(model, [
+        line_row(model, owner, operation['product_id'], operation.get('quantity', 1),
+                 operation.get('size'), operation.get('color'))
+        for operation in adds
+    ])
+    return None
+
+def cart_response(owner, model=CartItem, **extra):
+    items, subtotal = cart_contents(owner, model)
     return jsonify({
-        'message': 'Item added to cart',
-        'item': cart_item.to_dict()
-    }), 201
+        **extra,
+        'items': items,
+        'subtotal': subtotal,
+        'total': subtotal
+    }), 200
+
+@cart_bp.route('/merge', methods=['POST'])
+@jwt_required()
+@query_budget(8)
+def merge_cart():
+    """Merge a guest cart into the user's cart and return the result
+    
+    Body: {"guest_token": ..., "items": [{"product_id", "quantity", "size", "color"}]}. The guest
+    cart moves over with one INSERT ... SELECT upsert and its lines are deleted; `items` are
+    lines that only ever lived in the browser and are upserted in one more statement.
+    """
+    user_id = get_user_id()
+    data = request.get_json(silent=True) or {}
+    guest_token = get_guest_token(data.get('guest_token'))
+    
+    lines = data.get('items') or []
+    if not isinstance(lines, list) or len(lines) > MAX_CART_OPERATIONS:
+        return jsonify({'error': f'items must be a list of at most {MAX_CART_OPERATIONS} lines'}), 400
+    lines = [
+        line for line in lines
+        if isinstance(line, dict) and _positive_int(line.get('product_id')) and _positive_int(line.get('quantity', 1))
+    ]
+    
+    merged = merge_guest_cart(guest_token, user_id) if guest_token else 0
+    if lines:
+        # Products removed from the catalog since they were added are dropped, not an error
+        active = set(db.session.scalars(
+            db.select(Product.id).where(Product.id.in_({line['product_id'] for line in lines}),
+                                        Product.is_active.is_(True))
+        ))
+        lines = [line for line in lines if line['product_id'] in active]
+        upsert_lines(CartItem, [
+            line_row(CartItem, user_id, line['product_id'], line.get('quantity', 1), line.get('size'), line.get('color'))
+            for line in lines
+        ])
+    
+    if merged or lines:
+        user_versions.bump(user_id, 'cart')
+        db.session.commit()
+    
+    return cart_response(user_id, message='Cart merged', merged=merged + len(lines))
+
+@cart_bp.route('/guest', methods=['GET'])
+@query_budget(3)
+def get_guest_cart():
+    """Cart of a signed-out visitor (empty without a valid X-Guest-Cart token)"""
+    guest_token = get_guest_token()
+    if not guest_token:
+        return jsonify({'items': [], 'subtotal': 0, 'total': 0}), 200
+    return cart_response(guest_token, GuestCartItem)
+
+@cart_bp.route('/guest', methods=['POST'])
+def add_to_guest_cart():
+    """Add item to a guest cart; issues a token when the request has none"""
+    data = request.get_json()
+    product, quantity, error = validate_add(data)
+    if error:
+        return error
+    
+    guest_token = get_guest_token()
+    if not guest_token:
+        guest_token = secrets.token_urlsafe(24)
+    
+    upsert_lines(GuestCartItem, [
+        line_row(GuestCartItem, guest_token, product.id, quantity, data.get('size'), data.get('color'))
+    ])
+    db.session.commit()
+    # Abandoned guest carts are pruned in the background, not here
+    guest_cart_pruner.touch()
+    
+    line = find_line(GuestCartItem, guest_token, product.id, data.get('size'), data.get('color'))
+    return added_response(line, quantity, guest_token=guest_token)
+
+@cart_bp.route('/guest', methods=['PATCH'])
+@query_budget(7)
+def patch_guest_cart():
+    """PATCH /api/cart for a guest cart (same operations, keyed by the X-Guest-Cart token)"""
+    guest_token = get_guest_token()
+    if not guest_token:
+        return jsonify({'error': 'Guest cart token is required'}), 400
+    data = request.get_json(silent=True) or {}
+    
+    parsed, error = parse_operations(data.get('operations'))
+    if error:
+        return jsonify({'error': error}), 400
+    error = apply_operations(GuestCartItem, guest_token, *parsed)
+    if error:
+        return error
+    db.session.commit()
+    guest_cart_pruner.touch()
+    
+    return cart_response(guest_token, GuestCartItem, message='Cart updated')
 
 @cart_bp.route('/<int:item_id>', methods=['PUT'])
 @jwt_required()
@@ -92,17 +346,29 @@ def update_cart_item(item_id):
     if 'quantity' in data:
         if data['quantity'] <= 0:
             db.session.delete(cart_item)
+            user_versions.bump(user_id, 'cart')
             db.session.commit()
             return jsonify({'message': 'Item removed from cart'}), 200
         cart_item.quantity = data['quantity']
     
-    if 'size' in data:
-        cart_item.size = data['size']
-    
-    if 'color' in data:
-        cart_item.color = data['color']
+    size = variant_value(data['size']) if 'size' in data else cart_item.size
+    color = variant_value(data['color']) if 'color' in data else cart_item.color
+    if (size, color) != (cart_item.size, cart_item.color):
+        # Switching to a variant already in the cart folds this line into it
+        other = find_line(CartItem, user_id, cart_item.product_id, size, color)
+        if other:
+            other.quantity += cart_item.quantity
+            db.session.delete(cart_item)
+            cart_item = other
+        else:
+            cart_item.size, cart_item.color = size, color
     
-    db.session.commit()
+    user_versions.bump(user_id, 'cart')
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'error': 'Cart changed, please retry'}), 409
     
     return jsonify({
         'message': 'Cart updated',
@@ -120,6 +386,7 @@ def remove_from_cart(item_id):
         return jsonify({'error': 'Cart item not found'}), 404
     
     db.session.delete(cart_item)
+    user_versions.bump(user_id, 'cart')
     db.session.commit()
     
     return jsonify({'message': 'Item removed from cart'}), 200
@@ -131,6 +398,7 @@ def clear_cart():
     user_id = get_user_id()
     
     CartItem.query.filter_by(user_id=user_id).delete()
+    user_versions.bump(user_id, 'cart')
     db.session.commit()
     
     return jsonify({'message': 'Cart cleared'}), 200
@@ -10,6 +10,8 @@ import os
 # Add utils directory to path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 from utils.pdf_receipt_generator import generate_receipt_pdf
+from utils.query_budget import query_budget
+from utils.order_rows import order_query, order_dicts
 
 orders_bp = Blueprint('orders', __name__)
 
@@ -32,21 +34,17 @@ def generate_receipt_number():
 
 @orders_bp.route('', methods=['GET'])
 @jwt_required()
+@query_budget(7)
 def get_orders():
     """Get all orders for current user"""
     user_id = get_user_id()
     
-    from models import OrderItem
-    
-    orders = Order.query.options(
-        db.joinedload(Order.address),
-        db.joinedload(Order.order_items).joinedload(OrderItem.product)
-    ).filter_by(user_id=user_id).order_by(
+    orders = order_query(Order.query).filter_by(user_id=user_id).order_by(
         Order.created_at.desc()
     ).all()
     
     return jsonify({
-        'orders': [order.to_dict() for order in orders]
+        'orders': order_dicts(orders)
     }), 200
 
 @orders_bp.route('/<int:order_id>', methods=['GET'])
@@ -59,7 +57,7 @@ def get_order(order_id):
     
     order = Order.query.options(
         db.joinedload(Order.address),
-        db.joinedload(Order.order_items).joinedload(OrderItem.product)
+        db.joinedload(Order.order_items).joinedload(OrderItem.product).joinedload(Product.section)
     ).filter_by(id=order_id, user_id=user_id).first()
     
     if not order:
@@ -216,7 +214,7 @@ def download_receipt(order_id):
     order = Order.query.options(
         db.joinedload(Order.user),
         db.joinedload(Order.address),
-        db.joinedload(Order.order_items).joinedload(OrderItem.product)
+        db.joinedload(Order.order_items).joinedload(OrderItem.product).joinedload(Product.section)
     ).filter_by(id=order_id, user_id=user_id).first()
     
     if not order:
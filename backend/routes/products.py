@@ -1,110 +1,346 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, Product, Section
+from models import db, Product, ProductVariant
+from utils.analytics_sketches import sketch_store
+from utils.query_budget import query_budget
+from utils.catalog_cache import catalog_cache
+from utils.product_search import product_search
+from utils.section_index import section_index
+from utils.facet_index import facet_index
+from utils.product_suggest import product_suggest
+from utils.fuzzy_index import fuzzy_index
+from utils.product_fields import parse_fields
+from utils.pagination import keyset_paginate, InvalidCursor
+from functools import wraps
 
 products_bp = Blueprint('products', __name__)
 
+def track_search(fn):
+    """Feed first-page search terms to the analytics sketches, even on cache hits"""
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        search = request.args.get('search', '')
+        if search and request.args.get('page', 1, type=int) == 1:
+            sketch_store.record_search(search)
+        return fn(*args, **kwargs)
+    return wrapper
+
+def read_facet_filters():
+    """?size= / ?color= (comma-separated, any match), ?min_price= / ?max_price=, ?on_sale= / ?in_stock="""
+    def values(name):
+        return [value.strip() for value in request.args.get(name, '').split(',') if value.strip()]
+
+    def flag(name):
+        return request.args.get(name, '').lower() in ('1', 'true', 'yes')
+
+    return {
+        'sizes': values('size'),
+        'colors': values('color'),
+        'min_price': request.args.get('min_price', type=float),
+        'max_price': request.args.get('max_price', type=float),
+        'on_sale': flag('on_sale'),
+        'in_stock': flag('in_stock')
+    }
+
+def filter_by_facets(query, filters):
+    """Apply facet filters in SQL (sizes/colors use the product_variants index)"""
+    for kind, values in (('size', filters['sizes']), ('color', filters['colors'])):
+        if values:
+            query = query.filter(Product.id.in_(
+                db.select(ProductVariant.product_id).where(
+                    ProductVariant.kind == kind, ProductVariant.value.in_(values)
+                )
+            ))
+    if filters['min_price'] is not None:
+        query = query.filter(Product.price >= filters['min_price'])
+    if filters['max_price'] is not None:
+        query = query.filter(Product.price <= filters['max_price'])
+    if filters['on_sale']:
+        query = query.filter(Product.is_on_sale == True)
+    if filters['in_stock']:
+        query = query.filter(Product.stock > 0)
+    return query
+
+def facet_counts(filters, section_id=None, search='', within=None):
+    """Facet counts from the in-memory facet index (search matches cost one id query)"""
+    if search and within is None:
+        matches = product_search.apply(Product.query.with_entities(Product.id).filter_by(is_active=True),
+                                       search, rank=False)
+        within = [row.id for row in matches]
+    facets = facet_index.counts(section_id=section_id, within=within, **filters)
+    if 'section' in facets:
+        facets['section'] = {
+            section['slug']: count for section_id, count in facets['section'].items()
+            if (section := section_index.get_by_id(section_id))
+        }
+    return facets
+
+def fuzzy_search_ids(search):
+    """Product ids for a misspelled search term, best match first ([] when disabled)"""
+    if not current_app.config.get('FUZZY_SEARCH_ENABLED', True):
+        return []
+    return [product_id for product_id, _ in fuzzy_index.search(search)]
+
+def order_by_ids(query, ids):
+    return query.filter(Product.id.in_(ids)).order_by(
+        db.case({product_id: rank for rank, product_id in enumerate(ids)}, value=Product.id)
+    )
+
 @products_bp.route('', methods=['GET'])
+@track_search
+@catalog_cache.cached
+@query_budget(7)  # page, count, images, variants; +2 fuzzy retry, +1 section map reload
 def get_products():
-    """Get all active products with optional filtering"""
+    """Get all active products with optional filtering (?facets=1 adds facet counts)
+
+    A search with no full-text hits is retried against the trigram index and
+    the response is flagged with "fuzzy": true.
+    """
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 20, type=int)
     section = request.args.get('section')
     search = request.args.get('search', '')
+    cursor = request.args.get('cursor')
+    try:
+        fieldset = parse_fields(request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    filters = read_facet_filters()
+    section_id = None
+    fuzzy_ids = None
     
     query = Product.query.filter_by(is_active=True)
     
     if section:
         # Find section by slug
-        section_obj = Section.query.filter_by(slug=section, is_active=True).first()
+        section_obj = section_index.get(section)
         if section_obj:
-            query = query.filter_by(section_id=section_obj.id)
+            section_id = section_obj['id']
+            query = query.filter_by(section_id=section_id)
         else:
             return jsonify({'products': [], 'total': 0, 'pages': 0}), 200
     
-    if search:
-        query = query.filter(
-            db.or_(
-                Product.title.contains(search),
-                Product.description.contains(search)
-            )
+    query = filter_by_facets(query, filters)
+    
+    if cursor is not None:
+        # Cursor mode: newest first, no OFFSET and no COUNT(*)
+        if search:
+            query = product_search.apply(query, search, rank=False)
+        try:
+            items, next_cursor = keyset_paginate(fieldset.prepare(query), Product, cursor, per_page)
+        except InvalidCursor as e:
+            return jsonify({'error': str(e)}), 400
+        result = {
+            'products': fieldset.serialize(items),
+            'next_cursor': next_cursor,
+            'has_more': next_cursor is not None
+        }
+    else:
+        searched = product_search.apply(query, search) if search else query
+        products = fieldset.prepare(searched).order_by(Product.created_at.desc()).paginate(
+            page=page, per_page=per_page, error_out=False
         )
+        if search and not products.total:
+            fuzzy_ids = fuzzy_search_ids(search)
+            if fuzzy_ids:
+                products = fieldset.prepare(order_by_ids(query, fuzzy_ids)).paginate(
+                    page=page, per_page=per_page, error_out=False
+                )
+        result = {
+            'products': fieldset.serialize(products.items),
+            'total': products.total,
+            'pages': products.pages,
+            'current_page': page
+        }
+        if fuzzy_ids:
+            result['fuzzy'] = True
     
-    products = query.order_by(Product.created_at.desc()).paginate(
-        page=page, per_page=per_page, error_out=False
-    )
+    if request.args.get('facets'):
+        result['facets'] = facet_counts(filters, section_id=section_id, search=search, within=fuzzy_ids)
+    return jsonify(result), 200
+
+def parse_batch_ids(raw_ids):
+    """Validate and de-duplicate requested ids, keeping first-seen order
+
+    The GET form passes digit strings; a JSON body must hold real integers
+    (no floats, booleans or numeric strings).
+    """
+    max_ids = current_app.config.get('PRODUCT_BATCH_MAX_IDS', 300)
+    if isinstance(raw_ids, str):
+        raw_ids = [part.strip() for part in raw_ids.split(',') if part.strip()]
+        if not all(part.isdigit() for part in raw_ids):
+            raise ValueError('ids must be integers')
+        raw_ids = [int(part) for part in raw_ids]
+    if not isinstance(raw_ids, list) or not raw_ids:
+        raise ValueError('ids is required')
+    if not all(isinstance(raw_id, int) and not isinstance(raw_id, bool) for raw_id in raw_ids):
+        raise ValueError('ids must be integers')
+    ids = list(dict.fromkeys(raw_ids))
+    if len(ids) > max_ids:
+        raise ValueError(f'At most {max_ids} ids per request')
+    return ids
+
+def batch_response(raw_ids):
+    """{products, missing, inactive, sections}: `missing` ids do not exist, `inactive` ones are deactivated"""
+    try:
+        ids = parse_batch_ids(raw_ids)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    products = Product.query.options(db.joinedload(Product.section)).filter(Product.id.in_(ids)).all()
+    by_id = {product.id: product for product in products if product.is_active}
+    inactive = {product.id for product in products if not product.is_active}
+    
+    found = [by_id[product_id] for product_id in ids if product_id in by_id]
+    sections = {}
+    for product in found:
+        if product.section_id not in sections:
+            sections[product.section_id] = section_index.get_by_id(product.section_id)
     
     return jsonify({
-        'products': [product.to_dict() for product in products.items],
-        'total': products.total,
-        'pages': products.pages,
-        'current_page': page
+        'products': [product.to_dict() for product in found],
+        'missing': [product_id for product_id in ids if product_id not in by_id and product_id not in inactive],
+        'inactive': [product_id for product_id in ids if product_id in inactive],
+        'sections': {str(section_id): section for section_id, section in sections.items()}
     }), 200
 
+@products_bp.route('/batch', methods=['GET'])
+@catalog_cache.cached
+@query_budget(4)  # products, images, variants; +1 section map reload
+def get_products_batch():
+    """Get several products by id: ?ids=3,1,2 (order preserved)"""
+    return batch_response(','.join(request.args.getlist('ids')))
+
+@products_bp.route('/batch', methods=['POST'])
+@query_budget(4)
+def post_products_batch():
+    """Same as GET /batch with {"ids": [...]} in the body, for long id lists"""
+    data = request.get_json(silent=True)
+    ids = data.get('ids') if isinstance(data, dict) else None
+    # Only the query string form is comma separated
+    return batch_response(ids if isinstance(ids, list) else None)
+
+@products_bp.route('/suggest', methods=['GET'])
+@query_budget(4)
+def suggest_products():
+    """Typeahead: ?q= prefix of title words or SKU, most popular first"""
+    q = request.args.get('q', '').strip()
+    limit = min(max(request.args.get('limit', 8, type=int), 1), current_app.config.get('SUGGEST_MAX_LIMIT', 20))
+    if len(q) < 2:
+        return jsonify({'query': q, 'suggestions': []}), 200
+    suggestions = product_suggest.suggest(q, limit)
+    if not suggestions and len(q) >= 3:
+        # No prefix match: probably a typo
+        suggestions = product_suggest.lookup(fuzzy_search_ids(q)[:limit])
+    return jsonify({'query': q, 'suggestions': suggestions}), 200
+
 @products_bp.route('/<int:product_id>', methods=['GET'])
+@catalog_cache.cached
+@query_budget(3)
 def get_product(product_id):
     """Get a single product by ID"""
-    product = db.session.get(Product, product_id)
+    product = db.session.get(Product, product_id, options=[db.joinedload(Product.section)])
     if not product or not product.is_active:
         return jsonify({'error': 'Product not found'}), 404
     return jsonify({'product': product.to_dict()}), 200
 
 @products_bp.route('/slug/<slug>', methods=['GET'])
+@catalog_cache.cached
+@query_budget(3)
 def get_product_by_slug(slug):
     """Get a single product by slug"""
-    product = Product.query.filter_by(slug=slug, is_active=True).first()
+    product = Product.query.options(db.joinedload(Product.section)).filter_by(slug=slug, is_active=True).first()
     if not product:
         return jsonify({'error': 'Product not found'}), 404
     return jsonify({'product': product.to_dict()}), 200
 
 @products_bp.route('/category/<category_slug>', methods=['GET'])
+@catalog_cache.cached
+@query_budget(5)  # page, count, images, variants; +1 section map reload
 def get_products_by_category(category_slug):
-    """Get products by category slug"""
+    """Get products by category slug (?facets=1 adds facet counts)"""
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 20, type=int)
+    cursor = request.args.get('cursor')
+    try:
+        fieldset = parse_fields(request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    section = Section.query.filter_by(slug=category_slug, is_active=True).first()
+    section = section_index.get(category_slug)
     if not section:
         return jsonify({'products': [], 'total': 0, 'pages': 0, 'section': None}), 200
     
-    products = Product.query.filter_by(
-        section_id=section.id, 
+    query = Product.query.filter_by(
+        section_id=section['id'], 
         is_active=True
-    ).order_by(Product.created_at.desc()).paginate(
-        page=page, per_page=per_page, error_out=False
     )
+    filters = read_facet_filters()
+    query = fieldset.prepare(filter_by_facets(query, filters))
     
-    return jsonify({
-        'products': [product.to_dict() for product in products.items],
-        'total': products.total,
-        'pages': products.pages,
-        'current_page': page,
-        'section': section.to_dict()
-    }), 200
+    if cursor is not None:
+        try:
+            items, next_cursor = keyset_paginate(query, Product, cursor, per_page)
+        except InvalidCursor as e:
+            return jsonify({'error': str(e)}), 400
+        result = {
+            'products': fieldset.serialize(items),
+            'next_cursor': next_cursor,
+            'has_more': next_cursor is not None,
+            'section': section
+        }
+    else:
+        products = query.order_by(Product.created_at.desc()).paginate(
+            page=page, per_page=per_page, error_out=False
+        )
+        result = {
+            'products': fieldset.serialize(products.items),
+            'total': products.total,
+            'pages': products.pages,
+            'current_page': page,
+            'section': section
+        }
+    
+    if request.args.get('facets'):
+        result['facets'] = facet_counts(filters, section_id=section['id'])
+    return jsonify(result), 200
 
 @products_bp.route('/featured', methods=['GET'])
+@catalog_cache.cached
+@query_budget(3)
 def get_featured_products():
     """Get featured/on-sale products"""
     limit = request.args.get('limit', 8, type=int)
+    try:
+        fieldset = parse_fields(request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    products = Product.query.filter_by(
+    products = fieldset.prepare(Product.query.filter_by(
         is_active=True, 
         is_on_sale=True
-    ).order_by(Product.created_at.desc()).limit(limit).all()
+    )).order_by(Product.created_at.desc()).limit(limit).all()
     
     return jsonify({
-        'products': [product.to_dict() for product in products]
+        'products': fieldset.serialize(products)
     }), 200
 
 @products_bp.route('/new-arrivals', methods=['GET'])
+@catalog_cache.cached
+@query_budget(3)
 def get_new_arrivals():
     """Get newest products"""
     limit = request.args.get('limit', 8, type=int)
+    try:
+        fieldset = parse_fields(request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    products = Product.query.filter_by(
+    products = fieldset.prepare(Product.query.filter_by(
         is_active=True
-    ).order_by(Product.created_at.desc()).limit(limit).all()
+    )).order_by(Product.created_at.desc()).limit(limit).all()
     
     return jsonify({
-        'products': [product.to_dict() for product in products]
+        'products': fieldset.serialize(products)
     }), 200
@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models import db, WishlistItem, Product
+from utils import user_versions
 
 wishlist_bp = Blueprint('wishlist', __name__)
 
@@ -11,11 +12,14 @@ def get_user_id():
 
 @wishlist_bp.route('', methods=['GET'])
 @jwt_required()
+@user_versions.conditional('wishlist', include_catalog=True)
 def get_wishlist():
     """Get wishlist items for current user"""
     user_id = get_user_id()
     
-    wishlist_items = WishlistItem.query.filter_by(user_id=user_id).all()
+    wishlist_items = WishlistItem.query.options(
+        db.joinedload(WishlistItem.product).joinedload(Product.section)
+    ).filter_by(user_id=user_id).all()
     
     return jsonify({
         'items': [item.to_dict() for item in wishlist_items]
@@ -54,6 +58,7 @@ def add_to_wishlist():
     )
     
     db.session.add(wishlist_item)
+    user_versions.bump(user_id, 'wishlist')
     db.session.commit()
     
     return jsonify({
@@ -72,6 +77,7 @@ def remove_from_wishlist(item_id):
         return jsonify({'error': 'Wishlist item not found'}), 404
     
     db.session.delete(wishlist_item)
+    user_versions.bump(user_id, 'wishlist')
     db.session.commit()
     
     return jsonify({'message': 'Item removed from wishlist'}), 200
@@ -91,6 +97,7 @@ def remove_from_wishlist_by_product(product_id):
         return jsonify({'error': 'Item not in wishlist'}), 404
     
     db.session.delete(wishlist_item)
+    user_versions.bump(user_id, 'wishlist')
     db.session.commit()
     
     return jsonify({'message': 'Item removed from wishlist'}), 200
@@ -102,6 +109,7 @@ def clear_wishlist():
     user_id = get_user_id()
     
     WishlistItem.query.filter_by(user_id=user_id).delete()
+    user_versions.bump(user_id, 'wishlist')
     db.session.commit()
     
     return jsonify({'message': 'Wishlist cleared'}), 200
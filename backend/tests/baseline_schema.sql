@@ -0,0 +1,151 @@
+-- Schema of the baseline release (before the versioned migrations), SQLite dialect.
+-- tests/test_migrations.py upgrades a database created from this file.
+
+CREATE TABLE analytics (
+    id INTEGER NOT NULL,
+    metric_name VARCHAR(50) NOT NULL,
+    count INTEGER,
+    updated_at DATETIME,
+    PRIMARY KEY (id),
+    UNIQUE (metric_name)
+);
+
+CREATE TABLE sections (
+    id INTEGER NOT NULL,
+    name VARCHAR(100) NOT NULL,
+    slug VARCHAR(100) NOT NULL,
+    description TEXT,
+    display_order INTEGER,
+    is_active BOOLEAN,
+    created_at DATETIME,
+    PRIMARY KEY (id),
+    UNIQUE (name)
+);
+CREATE UNIQUE INDEX ix_sections_slug ON sections (slug);
+
+CREATE TABLE users (
+    id INTEGER NOT NULL,
+    name VARCHAR(100) NOT NULL,
+    email VARCHAR(120) NOT NULL,
+    password_hash VARCHAR(255) NOT NULL,
+    phone VARCHAR(20),
+    role VARCHAR(20),
+    is_active BOOLEAN,
+    is_verified BOOLEAN,
+    email_verified_at DATETIME,
+    last_login_at DATETIME,
+    login_count INTEGER,
+    created_at DATETIME,
+    updated_at DATETIME,
+    PRIMARY KEY (id)
+);
+CREATE UNIQUE INDEX ix_users_email ON users (email);
+
+CREATE TABLE addresses (
+    id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    full_name VARCHAR(100) NOT NULL,
+    phone VARCHAR(20) NOT NULL,
+    address_line1 VARCHAR(255) NOT NULL,
+    address_line2 VARCHAR(255),
+    city VARCHAR(100) NOT NULL,
+    state VARCHAR(100) NOT NULL,
+    pincode VARCHAR(10) NOT NULL,
+    is_default BOOLEAN,
+    created_at DATETIME,
+    PRIMARY KEY (id),
+    FOREIGN KEY(user_id) REFERENCES users (id)
+);
+
+CREATE TABLE products (
+    id INTEGER NOT NULL,
+    sku VARCHAR(50) NOT NULL,
+    title VARCHAR(255) NOT NULL,
+    slug VARCHAR(255) NOT NULL,
+    description TEXT,
+    price FLOAT NOT NULL,
+    original_price FLOAT,
+    is_on_sale BOOLEAN,
+    stock INTEGER,
+    section_id INTEGER NOT NULL,
+    images TEXT,
+    sizes TEXT,
+    colors TEXT,
+    is_active BOOLEAN,
+    created_at DATETIME,
+    updated_at DATETIME,
+    PRIMARY KEY (id),
+    FOREIGN KEY(section_id) REFERENCES sections (id)
+);
+CREATE UNIQUE INDEX ix_products_sku ON products (sku);
+CREATE UNIQUE INDEX ix_products_slug ON products (slug);
+
+CREATE TABLE cart_items (
+    id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    product_id INTEGER NOT NULL,
+    quantity INTEGER,
+    size VARCHAR(50),
+    color VARCHAR(50),
+    created_at DATETIME,
+    PRIMARY KEY (id),
+    FOREIGN KEY(user_id) REFERENCES users (id),
+    FOREIGN KEY(product_id) REFERENCES products (id)
+);
+
+CREATE TABLE orders (
+    id INTEGER NOT NULL,
+    order_number VARCHAR(50) NOT NULL,
+    receipt_number VARCHAR(20) NOT NULL,
+    user_id INTEGER NOT NULL,
+    address_id INTEGER NOT NULL,
+    total_amount FLOAT NOT NULL,
+    status VARCHAR(50),
+    payment_method VARCHAR(50),
+    payment_status VARCHAR(50),
+    created_at DATETIME,
+    updated_at DATETIME,
+    PRIMARY KEY (id),
+    FOREIGN KEY(user_id) REFERENCES users (id),
+    FOREIGN KEY(address_id) REFERENCES addresses (id)
+);
+CREATE UNIQUE INDEX ix_orders_order_number ON orders (order_number);
+CREATE UNIQUE INDEX ix_orders_receipt_number ON orders (receipt_number);
+
+CREATE TABLE wishlist_items (
+    id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    product_id INTEGER NOT NULL,
+    created_at DATETIME,
+    PRIMARY KEY (id),
+    FOREIGN KEY(user_id) REFERENCES users (id),
+    FOREIGN KEY(product_id) REFERENCES products (id)
+);
+
+CREATE TABLE order_items (
+    id INTEGER NOT NULL,
+    order_id INTEGER NOT NULL,
+    product_id INTEGER NOT NULL,
+    quantity INTEGER NOT NULL,
+    price FLOAT NOT NULL,
+    size VARCHAR(50),
+    color VARCHAR(50),
+    PRIMARY KEY (id),
+    FOREIGN KEY(order_id) REFERENCES orders (id),
+    FOREIGN KEY(product_id) REFERENCES products (id)
+);
+
+CREATE TABLE payment_details (
+    id INTEGER NOT NULL,
+    order_id INTEGER NOT NULL,
+    payment_method VARCHAR(50) NOT NULL,
+    card_number_last4 VARCHAR(4),
+    card_holder_name VARCHAR(100),
+    card_expiry_month VARCHAR(2),
+    card_expiry_year VARCHAR(4),
+    upi_id VARCHAR(100),
+    upi_name VARCHAR(100),
+    created_at DATETIME,
+    PRIMARY KEY (id),
+    FOREIGN KEY(order_id) REFERENCES orders (id)
+);
@@ -0,0 +1,102 @@
+"""
+Shared fixtures: a seeded SQLite database behind the Flask test client
+
+The environment is set before the app is imported, so every test module
+runs against the same temporary database with strict query budgets and
+without the catalog response cache.
+"""
+
+import os
+import sys
+import tempfile
+
+TEST_DIR = tempfile.mkdtemp(prefix='peckup-tests-')
+os.environ.update({
+    'DB_TYPE': 'sqlite',
+    'DB_FILE': os.path.join(TEST_DIR, 'peckup.db'),
+    'CATALOG_CACHE_BACKEND': 'none',
+    'CATALOG_CACHE_DIR': os.path.join(TEST_DIR, 'cache'),
+    'QUERY_BUDGET_STRICT': 'True',
+})
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest  # noqa: E402
+from flask_jwt_extended import create_access_token  # noqa: E402
+
+from app import app  # noqa: E402
+from models import db, Address, Order, OrderItem, PaymentDetail, Product, Section, User  # noqa: E402
+from utils import facet_index, fuzzy_index, product_suggest  # noqa: E402
+from utils.migrations import run_migrations  # noqa: E402
+
+
+def seed():
+    sections = [Section(name='Men', slug='men'), Section(name='Women', slug='women')]
+    db.session.add_all(sections)
+    db.session.flush()
+    for i in range(40):
+        product = Product(sku=f'SKU{i}', title=f'Cotton Tshirt {i}' if i % 2 else f'Wool Hoodie {i}',
+                          slug=f'product-{i}', description='Soft cotton', price=100.0 + i,
+                          is_on_sale=i % 3 == 0, stock=i % 5, section_id=sections[i % 2].id)
+        product.images = [f'https://cdn.example.com/{i}/a.jpg', f'https://cdn.example.com/{i}/b.jpg']
+        product.sizes = ['S', 'M']
+        product.colors = ['Black']
+        db.session.add(product)
+    user = User(name='Customer', email='customer@example.com')
+    user.set_password('secret')
+    user.addresses.append(Address(full_name='Customer', phone='9876543210', address_line1='12 MG Road',
+                                  city='Pune', state='Maharashtra', pincode='411001'))
+    admin = User(name='Admin', email='admin@example.com', role='admin')
+    admin.set_password('secret')
+    db.session.add_all([user, admin])
+    db.session.flush()
+    for i in range(5):
+        order = Order(order_number=f'ORD{i}', receipt_number=f'R{i}', user_id=user.id,
+                      address_id=user.addresses[0].id, total_amount=300.0, payment_method='upi')
+        order.order_items = [OrderItem(product_id=n + 1, quantity=1, price=100.0, size='M') for n in range(3)]
+        order.payment_details = PaymentDetail(payment_method='upi', upi_id='customer@upi')
+        db.session.add(order)
+    db.session.commit()
+    return user.id
+
+
+@pytest.fixture(scope='session')
+def client():
+    app.config['TESTING'] = True
+    with app.app_context():
+        db.create_all()
+        user_id = seed()
+        run_migrations()
+        product_suggest.warm()
+        fuzzy_index.warm()
+        facet_index.warm()
+        token = create_access_token(identity=str(user_id))
+    test_client = app.test_client()
+    test_client.environ_base['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+    yield test_client
+
+
+@pytest.fixture(scope='session')
+def admin_client(client):
+    with app.app_context():
+        admin = User.query.filter_by(email='admin@example.com').one()
+        token = create_access_token(identity=str(admin.id))
+    test_client = app.test_client()
+    test_client.environ_base['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+    return test_client
+
+
+@pytest.fixture
+def fresh_client(client):
+    """Client signed in as a new customer with an empty cart"""
+    with app.app_context():
+        count = User.query.count()
+        user = User(name='Shopper', email=f'shopper{count}@example.com')
+        user.set_password('secret')
+        db.session.add(user)
+        db.session.commit()
+        token = create_access_token(identity=str(user.id))
+        user_id = user.id
+    test_client = app.test_client()
+    test_client.environ_base['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+    test_client.user_id = user_id
+    return test_client
@@ -0,0 +1,65 @@
+"""
+Write-behind analytics counters under concurrent increments and flushes
+"""
+
+import threading
+
+from app import app
+from models import db, Analytics
+from utils.analytics_counter import analytics_counter
+
+
+def persisted(metric):
+    with app.app_context():
+        return db.session.scalar(db.select(Analytics.count).where(Analytics.metric_name == metric)) or 0
+
+
+def test_concurrent_increments_and_flushes_are_not_lost(client, monkeypatch):
+    metric = 'concurrency_probe'
+    monkeypatch.setattr(analytics_counter, 'cache_ttl', 0)
+    analytics_counter.flush()
+    start = analytics_counter.value(metric)
+    writers, per_writer = 8, 250
+    expected = start + writers * per_writer
+
+    done = threading.Event()
+    errors, observed = [], []
+
+    def write():
+        for _ in range(per_writer):
+            analytics_counter.increment(metric)
+
+    def flush():
+        while not done.is_set():
+            analytics_counter.flush()
+
+    def read():
+        seen = []
+        try:
+            while not done.is_set():
+                seen.append(analytics_counter.value(metric))
+        except Exception as e:
+            errors.append(e)
+        observed.append(seen)
+
+    background = [threading.Thread(target=flush)] + [threading.Thread(target=read) for _ in range(3)]
+    for thread in background:
+        thread.start()
+    threads = [threading.Thread(target=write) for _ in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    done.set()
+    for thread in background:
+        thread.join()
+
+    assert not errors
+    # Readers never see a count go backwards or past what was written
+    for seen in observed:
+        assert seen == sorted(seen)
+        assert all(start <= value <= expected for value in seen)
+
+    analytics_counter.flush()
+    assert persisted(metric) == expected
+    assert analytics_counter.value(metric) == expected
@@ -0,0 +1,63 @@
+"""
+Beacon ingestion (/api/analytics/events) and compaction into rollups
+"""
+
+from app import app
+from models import db, AnalyticsEvent, AnalyticsRollup
+from utils.analytics_events import event_pipeline
+
+
+def rollup_counts(dimension, event_type):
+    with app.app_context():
+        return dict(db.session.execute(
+            db.select(AnalyticsRollup.dimension_id, AnalyticsRollup.count).where(
+                AnalyticsRollup.granularity == 'day', AnalyticsRollup.dimension == dimension,
+                AnalyticsRollup.event_type == event_type
+            )
+        ).all())
+
+
+def test_invalid_events_are_rejected(client):
+    response = client.post('/api/analytics/events', json={'events': [
+        {'type': 'view', 'product_id': 11},
+        {'type': 'click', 'product_id': 12, 'section_id': None, 'section': None},
+        {'type': 'view', 'section': 'women'},
+        {'type': 'view', 'product_id': True},
+        {'type': 'view', 'product_id': 99999},
+        {'type': 'view', 'product_id': 1.0},
+        {'type': 'view', 'product_id': '11'},
+        {'type': 'view', 'section_id': 99999},
+        {'type': 'view', 'section': 'no-such-section'},
+        {'type': 'scroll', 'product_id': 11},
+        {'type': 'view'},
+        'view',
+    ]})
+    assert response.status_code == 202
+    assert response.json == {'accepted': 3, 'rejected': 9}
+
+
+def test_accepted_events_reach_the_rollups(client):
+    event_pipeline.flush_events()
+    event_pipeline.compact()
+    views_before = rollup_counts('product', 'view')
+    sections_before = rollup_counts('section', 'view')
+    response = client.post('/api/analytics/events', data='{"events": ['
+                           '{"type": "view", "product_id": 21}, {"type": "view", "product_id": 21},'
+                           '{"type": "view", "product_id": true}, {"type": "view", "product_id": 99998}]}',
+                           content_type='text/plain')
+    assert response.json == {'accepted': 2, 'rejected': 2}
+
+    event_pipeline.flush_events()
+    event_pipeline.compact()
+
+    views = rollup_counts('product', 'view')
+    assert views.get(21, 0) - views_before.get(21, 0) == 2
+    assert views.get(1) == views_before.get(1)
+    assert 99998 not in views
+    # Events without a section are counted under the product's section (product 21 is in Men)
+    sections = rollup_counts('section', 'view')
+    assert sections.get(1, 0) - sections_before.get(1, 0) == 2
+    with app.app_context():
+        assert not db.session.scalar(
+            db.select(db.func.count()).select_from(AnalyticsEvent).where(AnalyticsEvent.compacted.is_(False))
+        )
@@ -0,0 +1,185 @@
+"""
+Cart lines are unique per (user, product, size, color); guest carts merge and expire
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import app
+from models import db, CartItem, GuestCartItem
+from utils.guest_carts import guest_cart_pruner
+
+
+def cart_rows(user_id):
+    with app.app_context():
+        return db.session.execute(
+            db.select(CartItem.product_id, CartItem.size, CartItem.color, CartItem.quantity)
+            .where(CartItem.user_id == user_id).order_by(CartItem.id)
+        ).all()
+
+
+def guest_rows(guest_token):
+    with app.app_context():
+        return db.session.execute(
+            db.select(GuestCartItem.product_id, GuestCartItem.size, GuestCartItem.quantity)
+            .where(GuestCartItem.guest_token == guest_token).order_by(GuestCartItem.id)
+        ).all()
+
+
+def test_adding_a_variant_twice_sums_quantities(fresh_client):
+    first = fresh_client.post('/api/cart', json={'product_id': 4, 'quantity': 2, 'size': 'M', 'color': 'Black'})
+    assert first.status_code == 201
+    second = fresh_client.post('/api/cart', json={'product_id': 4, 'quantity': 3, 'size': 'M', 'color': 'Black'})
+    assert second.status_code == 200
+    assert second.json['item']['id'] == first.json['item']['id']
+    assert second.json['item']['quantity'] == 5
+    assert cart_rows(fresh_client.user_id) == [(4, 'M', 'Black', 5)]
+
+
+def test_other_variants_get_their_own_line(fresh_client):
+    for size in ('M', 'L', 'M'):
+        fresh_client.post('/api/cart', json={'product_id': 4, 'size': size})
+    assert cart_rows(fresh_client.user_id) == [(4, 'M', '', 2), (4, 'L', '', 1)]
+
+
+@pytest.mark.parametrize('variants', [
+    [{}, {'size': None, 'color': None}, {'size': '', 'color': ''}],
+    [{'size': 'S'}, {'size': 'S', 'color': None}, {'size': 'S', 'color': ''}],
+])
+def test_none_and_empty_variants_collapse(fresh_client, variants):
+    statuses = [fresh_client.post('/api/cart', json={'product_id': 6, **variant}).status_code
+                for variant in variants]
+    assert statuses == [201, 200, 200]
+    rows = cart_rows(fresh_client.user_id)
+    assert len(rows) == 1 and rows[0].quantity == 3
+    assert rows[0].color == ''
+
+
+def test_unique_index_rejects_a_second_line(fresh_client):
+    fresh_client.post('/api/cart', json={'product_id': 8})
+    with app.app_context():
+        db.session.add(CartItem(user_id=fresh_client.user_id, product_id=8, quantity=1, size='', color=''))
+        with pytest.raises(Exception):
+            db.session.commit()
+        db.session.rollback()
+    assert len(cart_rows(fresh_client.user_id)) == 1
+
+
+def test_patch_applies_a_mixed_batch(fresh_client):
+    for product_id in (10, 12, 14):
+        fresh_client.post('/api/cart', json={'product_id': product_id})
+    ids = [row['id'] for row in fresh_client.get('/api/cart').json['items']]
+
+    response = fresh_client.patch('/api/cart', json={'operations': [
+        {'op': 'update', 'item_id': ids[0], 'quantity': 4},
+        {'op': 'remove', 'item_id': ids[1]},
+        {'op': 'update', 'item_id': ids[2], 'quantity': 0},
+        {'op': 'add', 'product_id': 16, 'quantity': 2, 'size': 'S'},
+        {'op': 'add', 'product_id': 10, 'quantity': 1},
+    ]})
+    assert response.status_code == 200
+    assert [(item['product']['id'], item['quantity'], item['size']) for item in response.json['items']] == [
+        (10, 5, None), (16, 2, 'S')
+    ]
+    assert response.json['subtotal'] == sum(
+        item['product']['price'] * item['quantity'] for item in response.json['items']
+    )
+    assert cart_rows(fresh_client.user_id) == [(10, '', '', 5), (16, 'S', '', 2)]
+
+
+@pytest.mark.parametrize('bad_operation, status', [
+    ({'op': 'update', 'item_id': 'x', 'quantity': 2}, 400),
+    ({'op': 'add', 'quantity': 1}, 400),
+    ({'op': 'swap', 'item_id': 1}, 400),
+    ({'op': 'add', 'product_id': 99999}, 404),
+    ({'op': 'update', 'item_id': 99999, 'quantity': 2}, 404),
+])
+def test_patch_is_all_or_nothing(fresh_client, bad_operation, status):
+    fresh_client.post('/api/cart', json={'product_id': 18, 'quantity': 2})
+    fresh_client.post('/api/cart', json={'product_id': 20})
+    before = cart_rows(fresh_client.user_id)
+    ids = [row['id'] for row in fresh_client.get('/api/cart').json['items']]
+
+    response = fresh_client.patch('/api/cart', json={'operations': [
+        {'op': 'remove', 'item_id': ids[0]},
+        {'op': 'update', 'item_id': ids[1], 'quantity': 7},
+        {'op': 'add', 'product_id': 22},
+        bad_operation,
+    ]})
+    assert response.status_code == status
+    assert 'error' in response.json
+    assert cart_rows(fresh_client.user_id) == before
+
+
+def test_patch_bumps_the_cart_etag(fresh_client):
+    fresh_client.post('/api/cart', json={'product_id': 24})
+    first = fresh_client.get('/api/cart')
+    etag = first.headers['ETag']
+    assert fresh_client.get('/api/cart', headers={'If-None-Match': etag}).status_code == 304
+
+    response = fresh_client.patch('/api/cart', json={'operations': [
+        {'op': 'update', 'item_id': first.json['items'][0]['id'], 'quantity': 3}
+    ]})
+    assert response.status_code == 200
+
+    after = fresh_client.get('/api/cart', headers={'If-None-Match': etag})
+    assert after.status_code == 200
+    assert after.headers['ETag'] != etag
+    assert after.json['items'][0]['quantity'] == 3
+
+    # A rejected PATCH leaves the version alone
+    rejected = fresh_client.patch('/api/cart', json={'operations': [{'op': 'remove', 'item_id': 99999},
+                                                                    {'op': 'update', 'item_id': 99998,
+                                                                     'quantity': 1}]})
+    assert rejected.status_code == 404
+    assert fresh_client.get('/api/cart', headers={'If-None-Match': after.headers['ETag']}).status_code == 304
+
+
+def test_merge_sums_quantities_and_drops_the_guest_cart(fresh_client):
+    guest = app.test_client()
+    token = guest.post('/api/cart/guest', json={'product_id': 26, 'quantity': 2, 'size': 'M'}).json['guest_token']
+    headers = {'X-Guest-Cart': token}
+    assert guest.post('/api/cart/guest', json={'product_id': 26, 'size': 'M'}, headers=headers).status_code == 200
+    guest.post('/api/cart/guest', json={'product_id': 28}, headers=headers)
+    assert guest_rows(token) == [(26, 'M', 3), (28, '', 1)]
+
+    fresh_client.post('/api/cart', json={'product_id': 26, 'quantity': 4, 'size': 'M'})
+    response = fresh_client.post('/api/cart/merge', json={
+        'guest_token': token, 'items': [{'product_id': 30, 'quantity': 2}, {'product_id': 99999}]
+    })
+    assert response.status_code == 200
+    assert response.json['merged'] == 3
+    assert cart_rows(fresh_client.user_id) == [(26, 'M', '', 7), (28, '', '', 1), (30, '', '', 2)]
+    assert guest_rows(token) == []
+    assert guest.get('/api/cart/guest', headers=headers).json['items'] == []
+
+    # Merging the same token again is a no-op
+    again = fresh_client.post('/api/cart/merge', json={'guest_token': token})
+    assert again.json['merged'] == 0
+    assert cart_rows(fresh_client.user_id)[0].quantity == 7
+
+
+def test_adding_to_a_guest_cart_does_not_prune(client, monkeypatch):
+    monkeypatch.setattr(guest_cart_pruner, 'prune', lambda: pytest.fail('pruned on the request path'))
+    monkeypatch.setattr(guest_cart_pruner, '_ensure_worker', lambda: None)
+    response = app.test_client().post('/api/cart/guest', json={'product_id': 32})
+    assert response.status_code == 201
+
+
+def test_prune_deletes_stale_guest_lines_in_batches(client, monkeypatch):
+    monkeypatch.setattr(guest_cart_pruner, 'batch_size', 2)
+    stale = datetime.utcnow() - timedelta(days=guest_cart_pruner.max_age_days + 1)
+    with app.app_context():
+        db.session.add_all(
+            [GuestCartItem(guest_token='stale-cart-token-00', product_id=product_id, quantity=1,
+                           size='', color='', updated_at=stale) for product_id in (1, 3, 5, 7, 9)]
+            + [GuestCartItem(guest_token='fresh-cart-token-00', product_id=1, quantity=1,
+                             size='', color='', updated_at=datetime.utcnow())]
+        )
+        db.session.commit()
+
+    assert guest_cart_pruner.prune() == 5
+    assert guest_rows('stale-cart-token-00') == []
+    assert guest_rows('fresh-cart-token-00') == [(1, '', 1)]
+    assert guest_cart_pruner.prune() == 0
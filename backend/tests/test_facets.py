@@ -0,0 +1,47 @@
+"""
+Price filter bounds and the facet price buckets agree
+"""
+
+import pytest
+
+# Seeded product n is priced 99 + n (odd ids in Men, even ids in Women)
+
+
+@pytest.fixture
+def boundary_prices(admin_client):
+    # Product 10 sits on the 500 boundary, product 12 on the 1000 boundary (both in Women)
+    prices = {10: 500, 12: 1000}
+    for product_id, price in prices.items():
+        assert admin_client.put(f'/api/admin/products/{product_id}', json={'price': price}).status_code == 200
+    yield prices
+    for product_id in prices:
+        admin_client.put(f'/api/admin/products/{product_id}', json={'price': 99.0 + product_id})
+
+
+def product_ids(client, query):
+    response = client.get(f'/api/products?per_page=100&{query}')
+    assert response.status_code == 200
+    return response.json, {product['id'] for product in response.json['products']}
+
+
+def test_max_price_is_inclusive(client):
+    _, ids = product_ids(client, 'min_price=104&max_price=109')
+    assert ids == set(range(5, 11))
+    response = client.get('/api/products/category/women?per_page=100&max_price=109')
+    assert {product['id'] for product in response.json['products']} == {2, 4, 6, 8, 10}
+
+
+def test_boundary_prices_count_in_both_buckets(client, boundary_prices):
+    result, _ = product_ids(client, 'section=women&facets=1')
+    buckets = result['facets']['price']
+    assert buckets['0-500'] == 19
+    assert buckets['500-1000'] == 2
+    assert buckets['1000-5000'] == 1
+
+    # Each bucket's count is exactly what picking that option returns
+    for label, count in buckets.items():
+        low, high = label.split('-')
+        _, ids = product_ids(client, f'section=women&min_price={low}&max_price={high}')
+        assert len(ids) == count, label
+    _, ids = product_ids(client, 'section=women&min_price=500&max_price=1000')
+    assert ids == set(boundary_prices)
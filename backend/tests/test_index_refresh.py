@@ -0,0 +1,51 @@
+"""
+Background rebuilds of the in-memory catalog indexes
+
+A write made by another worker only moves the version files; the index must
+keep answering from its current copy and swap in the rebuilt one, and a
+version bump that did not touch products must not rebuild it at all.
+"""
+
+import threading
+
+from app import app
+from models import db, Product
+from utils import facet_index, fuzzy_index
+from utils.catalog_cache import catalog_cache
+
+
+def foreign_bump(*scopes):
+    """Bump like another worker would: this process has no record of the write"""
+    catalog_cache.bump_version(*scopes)
+    catalog_cache._bumped_from = {}
+
+
+def wait_for_refresh():
+    for thread in threading.enumerate():
+        if thread.name.endswith('-refresh'):
+            thread.join(timeout=5)
+
+
+def test_stale_index_is_served_while_it_rebuilds(client):
+    with app.app_context():
+        product = db.session.get(Product, 7)
+        product.title = 'Linen Kurta 7'
+        db.session.commit()
+    foreign_bump('products')
+
+    with app.app_context():
+        # Served from the old copy; the rebuild runs off the request path
+        assert fuzzy_index.search('kurta') == []
+        wait_for_refresh()
+        assert [product_id for product_id, _ in fuzzy_index.search('kurta')] == [7]
+
+
+def test_section_only_bump_skips_rebuild(client):
+    with app.app_context():
+        facet_index.warm()
+        wait_for_refresh()
+        version = facet_index._version
+        foreign_bump('sections')
+        facet_index.warm()
+        assert not facet_index._refreshing
+        assert facet_index._version == version
@@ -0,0 +1,85 @@
+"""
+Upgrading a database created by the baseline release
+
+Each test builds a SQLite database from tests/baseline_schema.sql, fills it
+with baseline-shaped rows and runs the real entry point in a subprocess, so
+the app binds to that database instead of the shared test one.
+"""
+
+import os
+import sqlite3
+import subprocess
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_SCHEMA = os.path.join(BACKEND_DIR, 'tests', 'baseline_schema.sql')
+
+
+@pytest.fixture
+def baseline_db(tmp_path):
+    path = str(tmp_path / 'baseline.db')
+    with sqlite3.connect(path) as conn:
+        with open(BASELINE_SCHEMA) as f:
+            conn.executescript(f.read())
+        conn.execute("INSERT INTO sections (id, name, slug, is_active) VALUES (1, 'Men', 'men', 1)")
+        conn.execute(
+            "INSERT INTO products (id, sku, title, slug, price, stock, section_id, images, sizes, colors, is_active) "
+            "VALUES (1, 'SKU1', 'Cotton Tshirt', 'cotton-tshirt', 499, 3, 1, "
+            "'[\"https://cdn.example.com/1.jpg\"]', '[\"M\", \"L\"]', '[\"Black\"]', 1)"
+        )
+        conn.execute("INSERT INTO users (id, name, email, password_hash, role, is_active) "
+                     "VALUES (1, 'Customer', 'customer@example.com', 'x', 'customer', 1)")
+    return path
+
+
+def run_script(script, db_file, tmp_path, *args):
+    env = dict(os.environ, DB_TYPE='sqlite', DB_FILE=db_file, CATALOG_CACHE_DIR=str(tmp_path / 'cache'))
+    return subprocess.run([sys.executable, script, *args], cwd=BACKEND_DIR, env=env,
+                          capture_output=True, text=True, timeout=120)
+
+
+def test_init_db_upgrades_baseline_database(baseline_db, tmp_path):
+    result = run_script('init_db.py', baseline_db, tmp_path)
+    assert result.returncode == 0, result.stdout + result.stderr
+
+    with sqlite3.connect(baseline_db) as conn:
+        user_columns = {row[1] for row in conn.execute("PRAGMA table_info(users)")}
+        assert {'cart_version', 'wishlist_version', 'address_version'} <= user_columns
+        assert conn.execute("SELECT role FROM users WHERE email = 'admin@peckup.in'").fetchone() == ('admin',)
+        assert conn.execute("SELECT url FROM product_images WHERE product_id = 1").fetchall() == [
+            ('https://cdn.example.com/1.jpg',)
+        ]
+        assert conn.execute(
+            "SELECT kind, value FROM product_variants WHERE product_id = 1 ORDER BY kind, position"
+        ).fetchall() == [('color', 'Black'), ('size', 'M'), ('size', 'L')]
+
+
+def test_migrate_then_init_db_like_deploy(baseline_db, tmp_path):
+    for script in ('migrate.py', 'init_db.py'):
+        result = run_script(script, baseline_db, tmp_path)
+        assert result.returncode == 0, script + result.stdout + result.stderr
+    status = run_script('migrate.py', baseline_db, tmp_path, '--status')
+    assert status.returncode == 0 and '⏳' not in status.stdout, status.stdout
+
+
+def test_cart_variant_migration_merges_duplicate_lines(baseline_db, tmp_path):
+    with sqlite3.connect(baseline_db) as conn:
+        conn.executemany(
+            "INSERT INTO cart_items (id, user_id, product_id, quantity, size, color) VALUES (?, 1, 1, ?, ?, ?)",
+            [(1, 1, None, None), (2, 2, '', None), (3, 1, 'M', None), (4, 3, 'M', ''), (5, 1, 'L', 'Black')]
+        )
+    result = run_script('migrate.py', baseline_db, tmp_path)
+    assert result.returncode == 0, result.stdout + result.stderr
+
+    with sqlite3.connect(baseline_db) as conn:
+        assert conn.execute(
+            "SELECT id, size, color, quantity FROM cart_items ORDER BY id"
+        ).fetchall() == [(1, '', '', 3), (3, 'M', '', 4), (5, 'L', 'Black', 1)]
+        indexes = {row[1] for row in conn.execute("PRAGMA index_list(cart_items)")}
+        assert 'uq_cart_items_variant' in indexes
+        assert 'ix_cart_items_user_product' not in indexes
+        with pytest.raises(sqlite3.IntegrityError):
+            conn.execute("INSERT INTO cart_items (user_id, product_id, quantity, size, color) "
+                         "VALUES (1, 1, 1, 'M', '')")
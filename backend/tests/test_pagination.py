@@ -0,0 +1,92 @@
+"""
+Cursor pagination (?cursor=) on the product, category and admin order listings
+"""
+
+from datetime import datetime
+
+import pytest
+
+from app import app
+from models import db, Order, Product
+
+
+@pytest.fixture(scope='module')
+def tied_timestamps(client):
+    # Bulk imports give many rows the same created_at; the id tiebreak must keep pages exact
+    with app.app_context():
+        db.session.execute(db.update(Product).where(Product.id <= 12).values(created_at=datetime(2026, 1, 1)))
+        db.session.commit()
+
+
+def walk(client, url, key, per_page):
+    ids, cursor = [], ''
+    while True:
+        response = client.get(f'{url}?cursor={cursor}&per_page={per_page}')
+        assert response.status_code == 200, response.get_data(as_text=True)
+        page = response.json[key]
+        assert len(page) <= per_page
+        ids.extend(row['id'] for row in page)
+        cursor = response.json['next_cursor']
+        assert response.json['has_more'] == (cursor is not None)
+        if cursor is None:
+            return ids
+
+
+def newest_first(model, **filters):
+    with app.app_context():
+        return list(db.session.scalars(
+            db.select(model.id).filter_by(**filters).order_by(model.created_at.desc(), model.id.desc())
+        ))
+
+
+@pytest.mark.parametrize('per_page', [1, 7, 40, 100])
+def test_products_cursor_round_trip(client, tied_timestamps, per_page):
+    ids = walk(client, '/api/products', 'products', per_page)
+    assert len(ids) == len(set(ids))
+    assert ids == newest_first(Product, is_active=True)
+
+
+def test_category_cursor_round_trip(client, tied_timestamps):
+    ids = walk(client, '/api/products/category/men', 'products', 3)
+    assert ids == newest_first(Product, is_active=True, section_id=1)
+
+
+def test_admin_orders_cursor_round_trip(admin_client):
+    assert walk(admin_client, '/api/admin/orders', 'orders', 2) == newest_first(Order)
+
+
+@pytest.mark.parametrize('url', [
+    '/api/products?cursor=not-a-cursor',
+    '/api/products?cursor=WzEsMiwzXQ',  # valid base64 JSON, wrong shape
+    '/api/products/category/men?cursor=%%%',
+])
+def test_malformed_cursor_is_400(client, url):
+    response = client.get(url)
+    assert response.status_code == 400
+    assert response.json == {'error': 'Invalid cursor'}
+
+
+def test_malformed_cursor_is_400_for_admin_orders(admin_client):
+    assert admin_client.get('/api/admin/orders?cursor=garbage').status_code == 400
+
+
+@pytest.mark.parametrize('per_page', [0, -1])
+@pytest.mark.parametrize('url', ['/api/products', '/api/products/category/men'])
+def test_non_positive_per_page_returns_one_row(client, url, per_page):
+    response = client.get(f'{url}?cursor=&per_page={per_page}')
+    assert response.status_code == 200
+    assert len(response.json['products']) == 1
+    assert response.json['next_cursor'] is not None
+
+
+def test_admin_orders_non_positive_per_page(admin_client):
+    response = admin_client.get('/api/admin/orders?cursor=&per_page=0')
+    assert response.status_code == 200
+    assert len(response.json['orders']) == 1
+
+
+def test_per_page_is_capped(client, monkeypatch):
+    monkeypatch.setitem(app.config, 'CURSOR_MAX_PER_PAGE', 5)
+    response = client.get('/api/products?cursor=&per_page=1000')
+    assert response.status_code == 200
+    assert len(response.json['products']) == 5
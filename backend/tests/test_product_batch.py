@@ -0,0 +1,68 @@
+"""
+Batch product lookup (GET/POST /api/products/batch)
+"""
+
+import pytest
+
+from app import app
+from models import db, Product
+
+
+@pytest.fixture
+def inactive_product(client):
+    with app.app_context():
+        db.session.execute(db.update(Product).where(Product.id == 40).values(is_active=False))
+        db.session.commit()
+    yield 40
+    with app.app_context():
+        db.session.execute(db.update(Product).where(Product.id == 40).values(is_active=True))
+        db.session.commit()
+
+
+def test_order_is_preserved_and_duplicates_dropped(client):
+    response = client.get('/api/products/batch?ids=3,1,2,3,1')
+    assert response.status_code == 200
+    assert [product['id'] for product in response.json['products']] == [3, 1, 2]
+    assert response.json['missing'] == []
+    assert set(response.json['sections']) == {'1', '2'}
+
+
+def test_post_body_matches_get(client):
+    response = client.post('/api/products/batch', json={'ids': [5, 4, 5]})
+    assert response.status_code == 200
+    assert [product['id'] for product in response.json['products']] == [5, 4]
+
+
+def test_missing_and_inactive_are_reported_separately(client, inactive_product):
+    response = client.get(f'/api/products/batch?ids=2,99999,{inactive_product},7')
+    assert response.status_code == 200
+    assert [product['id'] for product in response.json['products']] == [2, 7]
+    assert response.json['missing'] == [99999]
+    assert response.json['inactive'] == [inactive_product]
+
+
+@pytest.mark.parametrize('body', [
+    {'ids': [1.7]},
+    {'ids': [True]},
+    {'ids': ['3']},
+    {'ids': [1, None]},
+    {'ids': []},
+    {'ids': '1,2'},
+    {},
+])
+def test_post_rejects_non_integer_ids(client, body):
+    assert client.post('/api/products/batch', json=body).status_code == 400
+
+
+@pytest.mark.parametrize('query', ['ids=1.7', 'ids=true', 'ids=-1', 'ids=1,x', 'ids=', ''])
+def test_get_rejects_non_digit_ids(client, query):
+    assert client.get(f'/api/products/batch?{query}').status_code == 400
+
+
+def test_too_many_ids(client, monkeypatch):
+    monkeypatch.setitem(app.config, 'PRODUCT_BATCH_MAX_IDS', 3)
+    response = client.post('/api/products/batch', json={'ids': [1, 2, 3, 4]})
+    assert response.status_code == 400
+    assert response.json == {'error': 'At most 3 ids per request'}
+    # Duplicates do not count against the limit
+    assert client.get('/api/products/batch?ids=1,2,3,3,2').status_code == 200
@@ -0,0 +1,106 @@
+"""
+Query budgets under QUERY_BUDGET_STRICT
+
+Runs the hot listings against the seeded SQLite database (see conftest.py)
+with strict budgets, so a view that issues more statements than its
+@query_budget raises QueryBudgetExceeded and the test fails. In-memory
+indexes are warmed first, as gunicorn's post_worker_init does, so the
+budgets cover steady-state requests only.
+
+Usage (from backend/):
+    python -m pytest -q tests
+"""
+
+import pytest
+
+from app import app
+from models import db, Product
+from utils.catalog_cache import catalog_cache
+from utils.product_search import product_search
+from utils.query_budget import query_count
+
+
+@pytest.mark.parametrize('url', [
+    '/api/products',
+    '/api/products?page=2&per_page=5',
+    '/api/products?section=men&size=M&facets=1',
+    '/api/products?search=cotton',
+    '/api/products?search=cottn&facets=1',  # no full-text hit: fuzzy retry
+    '/api/products?cursor=',
+    '/api/products/category/men',
+    '/api/products/category/women?facets=1',
+    '/api/products/category/men?cursor=',
+    '/api/products/batch?ids=3,1,2',
+    '/api/orders',
+])
+def test_listing_within_budget(client, url):
+    response = client.get(url)
+    assert response.status_code == 200, response.get_data(as_text=True)
+
+
+@pytest.mark.parametrize('url', [
+    '/api/admin/products',
+    '/api/admin/products?search=cotton',
+    '/api/admin/products?cursor=',
+    '/api/admin/products?search=sku1&cursor=',
+    '/api/admin/orders',
+    '/api/admin/orders?cursor=',
+])
+def test_admin_listing_within_budget(admin_client, url):
+    response = admin_client.get(url)
+    assert response.status_code == 200, response.get_data(as_text=True)
+
+
+@pytest.mark.parametrize('url', [
+    '/api/products?search=cotton',
+    '/api/products?search=cottn&facets=1',
+    '/api/products?search=cotton&cursor=',
+    '/api/products/category/men?search=cotton',
+    '/api/admin/products?search=cotton',
+    '/api/admin/products?search=sku1&cursor=',
+])
+def test_search_index_probe_within_budget(admin_client, url):
+    # A fresh worker checks once whether the full-text index exists
+    product_search._backend = None
+    product_search._checked_at = 0.0
+    response = admin_client.get(url)
+    assert response.status_code == 200, response.get_data(as_text=True)
+
+
+@pytest.mark.parametrize('url', [
+    '/api/products?facets=1',
+    '/api/products?section=men&search=cottn&facets=1',
+    '/api/products?search=cottn&facets=1',
+    '/api/products/category/men?facets=1',
+    '/api/products/batch?ids=3,1,2',
+])
+def test_section_map_reload_within_budget(client, url):
+    # After any catalog write the section map reloads in the next request that reads it
+    catalog_cache.bump_version('sections')
+    response = client.get(url)
+    assert response.status_code == 200, response.get_data(as_text=True)
+
+
+def test_cart_within_budget(client):
+    for product_id in (1, 2, 3):
+        assert client.post('/api/cart', json={'product_id': product_id, 'size': 'M'}).status_code == 201
+    cart = client.get('/api/cart')
+    assert cart.status_code == 200
+    assert len(cart.json['items']) == 3
+    assert client.get('/api/cart/summary').json['item_count'] == 3
+
+    first, second = (item['id'] for item in cart.json['items'][:2])
+    response = client.patch('/api/cart', json={'operations': [
+        {'op': 'update', 'item_id': first, 'quantity': 4},
+        {'op': 'remove', 'item_id': second},
+        {'op': 'add', 'product_id': 5},
+    ]})
+    assert response.status_code == 200
+    assert sorted(item['quantity'] for item in response.json['items']) == [1, 1, 4]
+
+
+def test_budget_counts_statements(client):
+    with app.test_request_context():
+        before = query_count()
+        db.session.execute(db.select(Product.id)).all()
+        assert query_count() == before + 1
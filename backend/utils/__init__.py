@@ -3,5 +3,19 @@ Utility functions for Peckup backend
 """
 
 from .pdf_receipt_generator import generate_receipt_pdf
+from .analytics_counter import analytics_counter
+from .analytics_events import event_pipeline
+from .analytics_sketches import sketch_store
+from .catalog_cache import catalog_cache
+from .product_search import product_search
+from .section_index import section_index
+from .facet_index import facet_index
+from .product_suggest import product_suggest
+from .fuzzy_index import fuzzy_index
+from .compression import response_compression
 
-__all__ = ['generate_receipt_pdf']
+__all__ = [
+    'generate_receipt_pdf', 'analytics_counter', 'event_pipeline', 'sketch_store',
+    'catalog_cache', 'product_search', 'section_index', 'facet_index',
+    'product_suggest', 'fuzzy_index', 'response_compression'
+]
@@ -0,0 +1,139 @@
+"""
+Write-behind counter aggregation for the public analytics endpoints
+
+Increments are absorbed in memory and flushed to the `analytics` table in
+batches with an atomic `count = count + n` update, so request threads never
+hold the row lock and concurrent workers cannot lose updates.
+
+Reads are served from the persisted totals cached per worker for
+ANALYTICS_CACHE_TTL seconds, so polling clients cost at most one query per
+worker per TTL window.
+"""
+
+import threading
+import time
+from datetime import datetime
+
+from models import db, Analytics
+from utils.periodic import PeriodicFlusher
+
+
+class CounterAggregator(PeriodicFlusher):
+    """Buffer metric increments per worker and flush them in batches"""
+
+    thread_name = 'analytics-counter-flush'
+
+    def __init__(self):
+        super().__init__()
+        self.max_pending = 500
+        self.cache_ttl = 2.0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending = {}
+        self._pending_events = 0
+        self._inflight = {}
+        self._totals = {}
+        self._totals_loaded_at = 0.0
+
+    def init_app(self, app):
+        super().init_app(app)
+        self.flush_interval = app.config.get('ANALYTICS_FLUSH_INTERVAL_MS', 1000) / 1000.0
+        self.max_pending = app.config.get('ANALYTICS_FLUSH_MAX_EVENTS', 500)
+        self.cache_ttl = app.config.get('ANALYTICS_CACHE_TTL', 2.0)
+        app.extensions['analytics_counter'] = self
+
+    def increment(self, metric, amount=1):
+        """Record an increment; it is persisted on the next flush"""
+        with self._lock:
+            self._pending[metric] = self._pending.get(metric, 0) + amount
+            self._pending_events += 1
+            flush_now = self._pending_events >= self.max_pending
+        self._ensure_worker()
+        if flush_now:
+            self.wake()
+
+    def value(self, metric):
+        """Best known count: last persisted total plus unflushed increments"""
+        with self._lock:
+            known = metric in self._totals
+            stale = not known or time.monotonic() - self._totals_loaded_at > self.cache_ttl
+            metrics = list(set(self._totals) | {metric})
+        # A reload racing a flush could see the committed increments while they
+        # are still counted as in flight; keep the cached totals until it settles
+        if stale and self._flush_lock.acquire(blocking=not known):
+            try:
+                self._load_totals(metrics)
+            finally:
+                self._flush_lock.release()
+        with self._lock:
+            return (
+                self._totals.get(metric, 0)
+                + self._inflight.get(metric, 0)
+                + self._pending.get(metric, 0)
+            )
+
+    def snapshot(self, metrics=('views', 'clicks')):
+        """Current counts for the given metrics, refreshed at most once per TTL"""
+        return {metric: self.value(metric) for metric in metrics}
+
+    def set_total(self, metric, count):
+        """Record a persisted total written outside the aggregator (admin edits)"""
+        with self._lock:
+            self._totals[metric] = count
+
+    def flush(self):
+        """Persist all pending increments in a single transaction"""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                self._inflight = pending
+                self._pending_events = 0
+            if not pending:
+                return
+
+            with self.app.app_context():
+                try:
+                    now = datetime.utcnow()
+                    for metric, amount in pending.items():
+                        result = db.session.execute(
+                            db.update(Analytics)
+                            .where(Analytics.metric_name == metric)
+                            .values(count=Analytics.count + amount, updated_at=now)
+                        )
+                        if result.rowcount == 0:
+                            db.session.add(Analytics(metric_name=metric, count=amount))
+                    db.session.commit()
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"Error flushing analytics counters: {e}")
+                    # Put the increments back so the next flush retries them
+                    with self._lock:
+                        for metric, amount in pending.items():
+                            self._pending[metric] = self._pending.get(metric, 0) + amount
+                        self._inflight = {}
+                    return
+
+            with self._lock:
+                metrics = list(set(self._totals) | set(pending))
+            self._load_totals(metrics, settle=True)
+
+    def _load_totals(self, metrics, settle=False):
+        # A fresh app context gets its own scoped session, so this is safe to
+        # call from inside a request without touching the request's session.
+        with self.app.app_context():
+            rows = db.session.execute(
+                db.select(Analytics.metric_name, Analytics.count)
+                .where(Analytics.metric_name.in_(metrics))
+            ).all()
+        with self._lock:
+            for metric in metrics:
+                self._totals[metric] = 0
+            for metric, count in rows:
+                self._totals[metric] = count or 0
+            self._totals_loaded_at = time.monotonic()
+            if settle:
+                # The flushed increments are now part of the persisted totals
+                self._inflight = {}
+
+
+analytics_counter = CounterAggregator()
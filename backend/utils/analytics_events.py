@@ -0,0 +1,189 @@
+"""
+Batched ingestion and incremental rollup of per-product/per-section events
+
+Beacon requests only append to an in-memory buffer. The flush thread
+bulk-inserts buffered events into `analytics_events` and, every
+ANALYTICS_ROLLUP_INTERVAL seconds, compacts events not yet flagged
+`compacted` into hourly and daily rows in `analytics_rollups`. Rows are
+flagged individually rather than behind an id watermark: with several
+workers inserting, a lower id can commit after a higher one was rolled up,
+and a watermark would skip it for good. Dashboards read
+the rollups only and never scan raw events.
+"""
+
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+from models import db, AnalyticsEvent, AnalyticsRollup, Product
+from utils.periodic import PeriodicFlusher
+
+EVENT_TYPES = ('view', 'click')
+GRANULARITIES = ('hour', 'day')
+DIMENSIONS = ('product', 'section')
+
+
+def bucket_start(timestamp, granularity):
+    """Truncate a timestamp to the start of its hour/day bucket"""
+    if granularity == 'hour':
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+class EventPipeline(PeriodicFlusher):
+    """Buffer raw events per worker, bulk-insert them and roll them up"""
+
+    thread_name = 'analytics-event-flush'
+
+    def __init__(self):
+        super().__init__()
+        self.max_pending = 1000
+        self.rollup_interval = 60
+        self.rollup_batch_size = 5000
+        self.retention_days = 30
+        self._lock = threading.Lock()
+        self._buffer = []
+        self._last_rollup = 0.0
+
+    def init_app(self, app):
+        super().init_app(app)
+        self.flush_interval = app.config.get('ANALYTICS_FLUSH_INTERVAL_MS', 1000) / 1000.0
+        self.max_pending = app.config.get('ANALYTICS_EVENT_BUFFER_SIZE', 1000)
+        self.rollup_interval = app.config.get('ANALYTICS_ROLLUP_INTERVAL', 60)
+        self.rollup_batch_size = app.config.get('ANALYTICS_ROLLUP_BATCH_SIZE', 5000)
+        self.retention_days = app.config.get('ANALYTICS_EVENT_RETENTION_DAYS', 30)
+        app.extensions['analytics_events'] = self
+
+    def record(self, events):
+        """Buffer validated event dicts (event_type, product_id, section_id, created_at)"""
+        with self._lock:
+            self._buffer.extend(events)
+            flush_now = len(self._buffer) >= self.max_pending
+        self._ensure_worker()
+        if flush_now:
+            self.wake()
+
+    def flush(self):
+        self.flush_events()
+        if time.monotonic() - self._last_rollup >= self.rollup_interval:
+            self._last_rollup = time.monotonic()
+            self.compact()
+
+    def flush_events(self):
+        """Bulk-insert buffered events; returns the number written"""
+        with self._lock:
+            rows, self._buffer = self._buffer, []
+        if not rows:
+            return 0
+
+        with self.app.app_context():
+            try:
+                db.session.execute(db.insert(AnalyticsEvent), rows)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                print(f"Error inserting analytics events: {e}")
+                with self._lock:
+                    self._buffer[:0] = rows
+                return 0
+        return len(rows)
+
+    def compact(self):
+        """Roll uncompacted events into rollups; returns events consumed
+
+        Workers race for the same rows, so the rows read are claimed with
+        `UPDATE ... SET compacted WHERE id IN (...) AND NOT compacted` in the
+        same transaction as the rollup writes: a loser claims fewer rows than
+        it read, rolls back and backs off without double counting. Events
+        that commit late are simply picked up by the next run.
+        """
+        with self.app.app_context():
+            try:
+                rows = db.session.execute(
+                    db.select(
+                        AnalyticsEvent.id,
+                        AnalyticsEvent.event_type,
+                        AnalyticsEvent.product_id,
+                        db.func.coalesce(AnalyticsEvent.section_id, Product.section_id),
+                        AnalyticsEvent.created_at
+                    )
+                    .outerjoin(Product, Product.id == AnalyticsEvent.product_id)
+                    .where(AnalyticsEvent.compacted.is_(False))
+                    .order_by(AnalyticsEvent.id)
+                    .limit(self.rollup_batch_size)
+                ).all()
+                if not rows:
+                    return 0
+
+                counts = Counter()
+                for _, event_type, product_id, section_id, created_at in rows:
+                    for granularity in GRANULARITIES:
+                        bucket = bucket_start(created_at, granularity)
+                        if product_id is not None:
+                            counts[(granularity, 'product', event_type, bucket, product_id)] += 1
+                        if section_id is not None:
+                            counts[(granularity, 'section', event_type, bucket, section_id)] += 1
+
+                claimed = db.session.execute(
+                    db.update(AnalyticsEvent)
+                    .where(AnalyticsEvent.id.in_([row[0] for row in rows]), AnalyticsEvent.compacted.is_(False))
+                    .values(compacted=True)
+                ).rowcount
+                if claimed != len(rows):
+                    db.session.rollback()
+                    return 0
+
+                for key, amount in counts.items():
+                    self._add_to_rollup(key, amount)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                print(f"Error compacting analytics events: {e}")
+                return 0
+
+            self._prune()
+            return len(rows)
+
+    def _add_to_rollup(self, key, amount):
+        granularity, dimension, event_type, bucket, dimension_id = key
+        updated = db.session.execute(
+            db.update(AnalyticsRollup)
+            .where(
+                AnalyticsRollup.granularity == granularity,
+                AnalyticsRollup.dimension == dimension,
+                AnalyticsRollup.event_type == event_type,
+                AnalyticsRollup.bucket_start == bucket,
+                AnalyticsRollup.dimension_id == dimension_id
+            )
+            .values(count=AnalyticsRollup.count + amount)
+        ).rowcount
+        if not updated:
+            db.session.add(AnalyticsRollup(
+                granularity=granularity,
+                dimension=dimension,
+                event_type=event_type,
+                bucket_start=bucket,
+                dimension_id=dimension_id,
+                count=amount
+            ))
+
+    def _prune(self):
+        """Drop raw events that are both rolled up and past retention"""
+        if not self.retention_days:
+            return
+        cutoff = datetime.utcnow() - timedelta(days=self.retention_days)
+        try:
+            db.session.execute(
+                db.delete(AnalyticsEvent).where(
+                    AnalyticsEvent.compacted.is_(True),
+                    AnalyticsEvent.created_at < cutoff
+                )
+            )
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error pruning analytics events: {e}")
+
+
+event_pipeline = EventPipeline()
@@ -0,0 +1,138 @@
+"""
+Per-day analytics sketches: unique visitors, top products, top search terms
+
+Each worker accumulates small in-memory deltas and periodically merges them
+into one `analytics_sketches` row per (day, name). Reads merge the stored
+days with this worker's unflushed delta, so admins see near-real-time
+numbers in fixed memory without a row per visitor.
+"""
+
+import threading
+from datetime import datetime, timedelta
+
+from models import db, AnalyticsSketch
+from utils.periodic import PeriodicFlusher
+from utils.sketches import HyperLogLog, TopK
+
+SKETCH_KINDS = {
+    'visitors': ('hll', HyperLogLog),
+    'products': ('topk', TopK),
+    'search_terms': ('topk', TopK),
+}
+
+
+class SketchStore(PeriodicFlusher):
+    """Buffer per-day sketch deltas and merge them into the database"""
+
+    thread_name = 'analytics-sketch-flush'
+
+    def __init__(self):
+        super().__init__()
+        self.flush_interval = 10.0
+        self._lock = threading.Lock()
+        self._deltas = {}
+
+    def init_app(self, app):
+        super().init_app(app)
+        self.flush_interval = app.config.get('ANALYTICS_SKETCH_FLUSH_SECONDS', 10)
+        app.extensions['analytics_sketches'] = self
+
+    def record_visitor(self, visitor_id):
+        self._record('visitors', visitor_id)
+
+    def record_product(self, product_id, amount=1):
+        self._record('products', product_id, amount)
+
+    def record_search(self, term):
+        term = ' '.join(term.lower().split())[:64]
+        if len(term) >= 2:
+            self._record('search_terms', term)
+
+    def _record(self, name, key, amount=1):
+        day = datetime.utcnow().date()
+        with self._lock:
+            sketch = self._deltas.get((day, name))
+            if sketch is None:
+                sketch = self._deltas[(day, name)] = SKETCH_KINDS[name][1]()
+            if isinstance(sketch, HyperLogLog):
+                sketch.add(key)
+            else:
+                sketch.add(key, amount)
+        self._ensure_worker()
+
+    def flush(self):
+        """Merge every buffered delta into its stored day row"""
+        with self._lock:
+            deltas, self._deltas = self._deltas, {}
+        if not deltas:
+            return
+
+        failed = {}
+        with self.app.app_context():
+            for (day, name), delta in deltas.items():
+                try:
+                    self._merge_into_row(day, name, delta)
+                    db.session.commit()
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"Error flushing analytics sketch {name} for {day}: {e}")
+                    failed[(day, name)] = delta
+
+        if failed:
+            # Sketch merges are associative, so retried deltas fold back in cleanly
+            with self._lock:
+                for key, delta in failed.items():
+                    if key in self._deltas:
+                        delta.merge(self._deltas[key])
+                    self._deltas[key] = delta
+
+    def _merge_into_row(self, day, name, delta):
+        kind, sketch_class = SKETCH_KINDS[name]
+        row = db.session.execute(
+            db.select(AnalyticsSketch)
+            .where(AnalyticsSketch.day == day, AnalyticsSketch.name == name)
+            .with_for_update()
+        ).scalar_one_or_none()
+        if row is None:
+            db.session.add(AnalyticsSketch(day=day, name=name, kind=kind, data=delta.to_bytes()))
+        else:
+            row.data = sketch_class.from_bytes(row.data).merge(delta).to_bytes()
+
+    def load(self, name, days):
+        """Merged sketch for the last `days` days, including unflushed local data"""
+        sketch_class = SKETCH_KINDS[name][1]
+        merged = sketch_class()
+        since = datetime.utcnow().date() - timedelta(days=days - 1)
+        rows = db.session.execute(
+            db.select(AnalyticsSketch.data)
+            .where(AnalyticsSketch.name == name, AnalyticsSketch.day >= since)
+        ).scalars().all()
+        for data in rows:
+            merged.merge(sketch_class.from_bytes(data))
+        with self._lock:
+            for (day, delta_name), delta in self._deltas.items():
+                if delta_name == name and day >= since:
+                    merged.merge(delta)
+        return merged
+
+    def daily_uniques(self, days):
+        """Unique visitor estimate per day for the last `days` days"""
+        since = datetime.utcnow().date() - timedelta(days=days - 1)
+        per_day = {}
+        rows = db.session.execute(
+            db.select(AnalyticsSketch.day, AnalyticsSketch.data)
+            .where(AnalyticsSketch.name == 'visitors', AnalyticsSketch.day >= since)
+        ).all()
+        for day, data in rows:
+            per_day[day] = HyperLogLog.from_bytes(data)
+        with self._lock:
+            for (day, name), delta in self._deltas.items():
+                if name == 'visitors' and day >= since:
+                    per_day[day] = per_day.get(day, HyperLogLog()).merge(delta)
+        return [
+            {'day': day.isoformat(), 'unique_visitors': sketch.count()}
+            for day, sketch in sorted(per_day.items())
+        ]
+
+
+sketch_store = SketchStore()
@@ -0,0 +1,117 @@
+"""
+Atomic cart writes
+
+Cart lines are unique per owner and variant: (user_id, product_id, size,
+color) for CartItem, (guest_token, product_id, size, color) for
+GuestCartItem. `upsert_lines(model, rows)` inserts lines, or adds their
+quantity to the line that already exists, in one statement:
+`INSERT ... ON DUPLICATE KEY UPDATE` on MySQL, `INSERT ... ON CONFLICT DO
+UPDATE` on SQLite/PostgreSQL. The database resolves concurrent adds of the
+same variant, so double clicks and parallel tabs can no longer create
+duplicate lines. `merge_guest_cart()` moves a whole guest cart the same way
+with a single `INSERT ... SELECT`.
+"""
+
+from datetime import datetime
+
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+from models import db, CartItem, GuestCartItem, Product
+
+LINE_KEYS = {
+    CartItem: ('user_id', 'product_id', 'size', 'color'),
+    GuestCartItem: ('guest_token', 'product_id', 'size', 'color'),
+}
+
+
+def variant_value(value):
+    """Size/color as stored: '' for "none" so the unique key covers it"""
+    return str(value)[:50] if value else ''
+
+
+def owner_column(model):
+    return getattr(model, LINE_KEYS[model][0])
+
+
+def line_row(model, owner, product_id, quantity=1, size=None, color=None):
+    row = {
+        LINE_KEYS[model][0]: owner,
+        'product_id': product_id,
+        'quantity': quantity,
+        'size': variant_value(size),
+        'color': variant_value(color)
+    }
+    if model is GuestCartItem:
+        row['updated_at'] = datetime.utcnow()
+    return row
+
+
+def _combine(model, rows):
+    """One row per line key; PostgreSQL rejects touching a row twice in one statement"""
+    combined = {}
+    for row in rows:
+        key = tuple(row[name] for name in LINE_KEYS[model])
+        if key in combined:
+            combined[key]['quantity'] += row['quantity']
+        else:
+            combined[key] = dict(row)
+    return list(combined.values())
+
+
+def _insert(model):
+    dialect = db.engine.dialect.name
+    if dialect == 'mysql':
+        return mysql.insert(model.__table__)
+    if dialect == 'sqlite':
+        return sqlite.insert(model.__table__)
+    if dialect == 'postgresql':
+        return postgresql.insert(model.__table__)
+    raise NotImplementedError(f"cart upsert is not implemented for {dialect}")
+
+
+def _add_quantity_on_conflict(model, stmt):
+    table = model.__table__
+    if isinstance(stmt, mysql.Insert):
+        incoming = stmt.inserted
+    else:
+        incoming = stmt.excluded
+    values = {'quantity': table.c.quantity + incoming.quantity}
+    if 'updated_at' in table.c:
+        values['updated_at'] = incoming.updated_at
+    if isinstance(stmt, mysql.Insert):
+        return stmt.on_duplicate_key_update(values)
+    return stmt.on_conflict_do_update(index_elements=list(LINE_KEYS[model]), set_=values)
+
+
+def upsert_lines(model, rows):
+    """Insert lines or add to the quantity of the matching lines, in one statement"""
+    rows = _combine(model, rows)
+    if not rows:
+        return
+    db.session.execute(_add_quantity_on_conflict(model, _insert(model).values(rows)))
+
+
+def find_line(model, owner, product_id, size, color):
+    return model.query.filter(
+        owner_column(model) == owner, model.product_id == product_id,
+        model.size == variant_value(size), model.color == variant_value(color)
+    ).first()
+
+
+def merge_guest_cart(guest_token, user_id):
+    """Upsert a guest cart into the user's cart with one INSERT ... SELECT and delete the guest lines
+
+    Lines of products that were deactivated meanwhile are dropped. Returns the number of guest lines.
+    """
+    source = db.select(
+        db.literal(user_id), GuestCartItem.product_id, GuestCartItem.quantity,
+        GuestCartItem.size, GuestCartItem.color, db.literal(datetime.utcnow(), db.DateTime)
+    ).join(Product, Product.id == GuestCartItem.product_id).where(
+        GuestCartItem.guest_token == guest_token, Product.is_active.is_(True)
+    )
+    stmt = _insert(CartItem).from_select(['user_id', 'product_id', 'quantity', 'size', 'color', 'created_at'], source)
+    db.session.execute(_add_quantity_on_conflict(CartItem, stmt))
+    return db.session.execute(
+        db.delete(GuestCartItem).where(GuestCartItem.guest_token == guest_token)
+    ).rowcount
+
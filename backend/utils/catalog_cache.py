@@ -0,0 +1,316 @@
+"""
+Versioned response cache for the public catalog endpoints
+
+Entries are keyed on (catalog version, endpoint, normalized query args).
+Admin write paths call `bump_version()` after committing, which makes every
+older entry unreachable at once. The same key doubles as a weak ETag, and the
+version's timestamp as Last-Modified, so revalidations are answered with a
+304 before the cache or the database is touched. The version lives in a small file under
+CATALOG_CACHE_DIR so all gunicorn workers on the host agree on it.
+Compressed bodies are cached per encoding under `key|gzip` / `key|br`.
+
+Backends are pluggable:
+- 'memory': per-worker LRU (default)
+- 'sqlite': on-disk store shared by all workers on the host
+- 'none': caching disabled
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import wraps
+from urllib.parse import urlencode
+
+from flask import make_response, request
+
+from utils.compression import response_compression
+
+
+class MemoryBackend:
+    """Per-process LRU"""
+
+    name = 'memory'
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, created, value):
+        with self._lock:
+            self._entries[key] = (created, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteBackend:
+    """On-disk store shared by every worker on the host (WAL mode)"""
+
+    name = 'sqlite'
+
+    def __init__(self, path, max_entries=5000):
+        self.path = path
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._local = threading.local()
+        self._conn().execute(
+            'CREATE TABLE IF NOT EXISTS catalog_cache '
+            '(key TEXT PRIMARY KEY, created REAL NOT NULL, value BLOB NOT NULL)'
+        )
+        self._conn().execute('CREATE INDEX IF NOT EXISTS ix_catalog_cache_created ON catalog_cache (created)')
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=1, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key):
+        row = self._conn().execute(
+            'SELECT created, value FROM catalog_cache WHERE key = ?', (key,)
+        ).fetchone()
+        return (row[0], bytes(row[1])) if row else None
+
+    def set(self, key, created, value):
+        conn = self._conn()
+        try:
+            conn.execute(
+                'INSERT OR REPLACE INTO catalog_cache (key, created, value) VALUES (?, ?, ?)',
+                (key, created, value)
+            )
+            excess = conn.execute('SELECT COUNT(*) FROM catalog_cache').fetchone()[0] - self.max_entries
+            if excess > 0:
+                conn.execute(
+                    'DELETE FROM catalog_cache WHERE key IN '
+                    '(SELECT key FROM catalog_cache ORDER BY created LIMIT ?)', (excess,)
+                )
+                self.evictions += excess
+        except sqlite3.OperationalError as e:
+            # A busy cache must never fail the request; just skip the write
+            print(f"Catalog cache write skipped: {e}")
+
+    def clear(self):
+        self._conn().execute('DELETE FROM catalog_cache')
+
+    def __len__(self):
+        return self._conn().execute('SELECT COUNT(*) FROM catalog_cache').fetchone()[0]
+
+
+class NullBackend:
+    name = 'none'
+    max_entries = 0
+    evictions = 0
+
+    def get(self, key):
+        return None
+
+    def set(self, key, created, value):
+        pass
+
+    def clear(self):
+        pass
+
+    def __len__(self):
+        return 0
+
+
+class CatalogCache:
+    """Response cache with a host-wide catalog version for invalidation
+
+    Besides the catalog version, which moves on every catalog write, the
+    'products' and 'sections' versions move only on writes of that kind so
+    in-memory indexes can skip rebuilds that would not change them.
+    """
+
+    SCOPES = ('catalog', 'products', 'sections')
+
+    def __init__(self):
+        self.backend = NullBackend()
+        self.ttl = 300
+        self.hits = 0
+        self.misses = 0
+        self._version_dir = None
+        self._local_versions = dict.fromkeys(self.SCOPES, str(time.time_ns()))
+        self._bumped_from = {}
+
+    def init_app(self, app):
+        backend = app.config.get('CATALOG_CACHE_BACKEND', 'memory')
+        cache_dir = app.config.get('CATALOG_CACHE_DIR')
+        max_entries = app.config.get('CATALOG_CACHE_MAX_ENTRIES', 512)
+        self.ttl = app.config.get('CATALOG_CACHE_TTL', 300)
+
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            self._version_dir = cache_dir
+            if not all(os.path.exists(self._version_path(scope)) for scope in self.SCOPES):
+                self.bump_version()
+        except OSError as e:
+            print(f"Catalog cache dir unavailable, version is per-worker only: {e}")
+            self._version_dir = None
+
+        if backend == 'sqlite' and self._version_dir:
+            self.backend = SQLiteBackend(os.path.join(cache_dir, 'catalog_cache.sqlite3'), max_entries)
+        elif backend == 'memory':
+            self.backend = MemoryBackend(max_entries)
+        else:
+            self.backend = NullBackend()
+        app.extensions['catalog_cache'] = self
+
+    def _version_path(self, scope):
+        return os.path.join(self._version_dir, f'{scope}.version')
+
+    def version(self, scope='catalog'):
+        """Current version of scope ('catalog' changes on every catalog write)"""
+        if self._version_dir:
+            try:
+                with open(self._version_path(scope)) as f:
+                    return f.read().strip() or self._local_versions[scope]
+            except OSError:
+                pass
+        return self._local_versions[scope]
+
+    def bump_version(self, *scopes):
+        """Invalidate every cached catalog response; call after committing
+
+        scopes names what was written ('products', 'sections'); default both.
+        """
+        new_version = f"{time.time_ns()}-{os.getpid()}"
+        for scope in ('catalog',) + (scopes or ('products', 'sections')):
+            previous_version = self.version(scope)
+            self._local_versions[scope] = new_version
+            if self._version_dir:
+                path = self._version_path(scope)
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                try:
+                    with open(tmp_path, 'w') as f:
+                        f.write(new_version)
+                    os.replace(tmp_path, path)
+                except OSError as e:
+                    print(f"Failed to write {scope} version: {e}")
+            self._bumped_from[scope] = (previous_version, new_version)
+        return new_version
+
+    def advanced_from(self, version, scope='catalog'):
+        """True when the current version of scope is this process's own bump made directly on top of `version`"""
+        return self._bumped_from.get(scope) == (version, self.version(scope))
+
+    def make_key(self, endpoint, args, version=None):
+        normalized = urlencode(sorted(args.items(multi=True)))
+        return f"{version or self.version()}|{endpoint}|{normalized}"
+
+    @staticmethod
+    def etag_for(key):
+        return hashlib.blake2b(key.encode('utf-8'), digest_size=12).hexdigest()
+
+    @staticmethod
+    def version_time(version):
+        """When the version was bumped (versions start with time_ns)"""
+        try:
+            return datetime.fromtimestamp(int(version.split('-', 1)[0]) / 1e9, tz=timezone.utc)
+        except ValueError:
+            return None
+
+    def _add_validators(self, response, etag, version):
+        response.set_etag(etag, weak=True)
+        last_modified = self.version_time(version)
+        if last_modified:
+            response.last_modified = last_modified
+        response.headers['Cache-Control'] = 'public, no-cache'
+        return response
+
+    def cached(self, fn):
+        """Cache a public JSON view's 200 responses under the catalog version"""
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            version = self.version()
+            key = self.make_key(request.path, request.args, version)
+            etag = self.etag_for(key)
+            if request.if_none_match.contains_weak(etag):
+                self.hits += 1
+                return self._add_validators(make_response('', 304), etag, version)
+
+            encoding = response_compression.negotiate()
+            if encoding:
+                entry = self._fresh(self.backend.get(f"{key}|{encoding}"))
+                if entry is not None:
+                    self.hits += 1
+                    response = response_compression.set_encoded(self._hit_response(b''), entry[1], encoding)
+                    return self._add_validators(response, etag, version)
+
+            entry = self._fresh(self.backend.get(key))
+            if entry is not None:
+                self.hits += 1
+                response = self._hit_response(entry[1])
+                self._store_encoded(key, entry[1], encoding, response)
+                return self._add_validators(response, etag, version)
+
+            self.misses += 1
+            response = make_response(fn(*args, **kwargs))
+            response.headers['X-Cache'] = 'MISS'
+            if response.status_code == 200 and response.mimetype == 'application/json':
+                data = response.get_data()
+                self.backend.set(key, time.time(), data)
+                self._store_encoded(key, data, encoding, response)
+                self._add_validators(response, etag, version)
+            return response
+        return wrapper
+
+    def _fresh(self, entry):
+        return entry if entry is not None and time.time() - entry[0] < self.ttl else None
+
+    @staticmethod
+    def _hit_response(body):
+        response = make_response(body)
+        response.mimetype = 'application/json'
+        response.headers['X-Cache'] = 'HIT'
+        return response
+
+    def _store_encoded(self, key, data, encoding, response):
+        """Cache the compressed body under key|encoding and send it"""
+        if not encoding or not response_compression.worth_compressing(data):
+            return
+        body = response_compression.compress(data, encoding)
+        self.backend.set(f"{key}|{encoding}", time.time(), body)
+        response_compression.set_encoded(response, body, encoding)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'backend': self.backend.name,
+            'version': self.version(),
+            'entries': len(self.backend),
+            'max_entries': self.backend.max_entries,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.backend.evictions,
+            'hit_rate': round(self.hits / total, 4) if total else 0.0
+        }
+
+
+catalog_cache = CatalogCache()
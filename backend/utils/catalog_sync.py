@@ -0,0 +1,45 @@
+"""
+Fan-out for catalog writes
+
+Admin write paths call these after committing. The catalog cache version is
+always bumped; derived read structures (search index, ...) register a
+listener and are updated incrementally. A failing listener is logged and
+never fails the request, since the database write has already committed.
+"""
+
+from utils.catalog_cache import catalog_cache
+
+_listeners = []
+
+
+def register(listener):
+    """Listener may define products_changed(products), product_removed(product_id)
+    and sections_changed()"""
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+
+def _notify(method, *args):
+    for listener in _listeners:
+        handler = getattr(listener, method, None)
+        if handler is None:
+            continue
+        try:
+            handler(*args)
+        except Exception as e:
+            print(f"Catalog sync {type(listener).__name__}.{method} failed: {e}")
+
+
+def products_changed(products):
+    catalog_cache.bump_version('products')
+    _notify('products_changed', list(products))
+
+
+def product_removed(product_id):
+    catalog_cache.bump_version('products')
+    _notify('product_removed', product_id)
+
+
+def sections_changed():
+    catalog_cache.bump_version('sections')
+    _notify('sections_changed')
@@ -0,0 +1,92 @@
+"""
+gzip / brotli response compression
+
+An after_request hook compresses text-like responses (JSON, CSV, HTML, ...)
+of at least COMPRESSION_MIN_SIZE bytes in the best encoding the client
+accepts (brotli when installed, else gzip). Streams (SSE), file downloads
+(direct passthrough) and responses that already carry a Content-Encoding are
+left alone. The catalog cache stores compressed bodies next to the plain one
+(see utils.catalog_cache), so repeat hits skip compression; those responses
+arrive here already encoded.
+"""
+
+import gzip
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json', 'application/javascript', 'application/xml',
+    'text/plain', 'text/html', 'text/css', 'text/csv', 'text/xml',
+}
+
+
+class ResponseCompression:
+    def __init__(self):
+        self.enabled = False
+        self.min_size = 1024
+        self.level = 6
+        self.brotli_quality = 5
+        self.encodings = ['gzip']
+
+    def init_app(self, app):
+        self.enabled = app.config.get('COMPRESSION_ENABLED', True)
+        self.min_size = app.config.get('COMPRESSION_MIN_SIZE', 1024)
+        self.level = app.config.get('COMPRESSION_LEVEL', 6)
+        self.brotli_quality = app.config.get('COMPRESSION_BROTLI_QUALITY', 5)
+        configured = app.config.get('COMPRESSION_ENCODINGS', ['br', 'gzip'])
+        self.encodings = [e for e in configured if e == 'gzip' or (e == 'br' and brotli is not None)]
+        app.extensions['response_compression'] = self
+        app.after_request(self.after_request)
+
+    def negotiate(self):
+        """Encoding to use for the current request, or None"""
+        if not self.enabled or not self.encodings:
+            return None
+        accepted = request.accept_encodings
+        # Our preference order wins over equal client q-values
+        best = max(self.encodings, key=lambda encoding: accepted[encoding])
+        return best if accepted[best] > 0 else None
+
+    def worth_compressing(self, data):
+        return len(data) >= self.min_size
+
+    def compress(self, data, encoding):
+        if encoding == 'br':
+            return brotli.compress(data, quality=self.brotli_quality)
+        return gzip.compress(data, compresslevel=self.level, mtime=0)
+
+    def set_encoded(self, response, body, encoding):
+        """Put an already-compressed body on response"""
+        response.set_data(body)
+        response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        return response
+
+    def _eligible(self, response):
+        return (
+            response.mimetype in COMPRESSIBLE_MIMETYPES
+            and 200 <= response.status_code < 300 and response.status_code not in (204, 206)
+            and not response.direct_passthrough
+            and not response.is_streamed
+            and 'Content-Encoding' not in response.headers
+        )
+
+    def after_request(self, response):
+        if not self.enabled or not self._eligible(response):
+            return response
+        data = response.get_data()
+        if not self.worth_compressing(data):
+            return response
+        response.vary.add('Accept-Encoding')
+        encoding = self.negotiate()
+        if encoding is None:
+            return response
+        return self.set_encoded(response, self.compress(data, encoding), encoding)
+
+
+response_compression = ResponseCompression()
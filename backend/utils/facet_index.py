@@ -0,0 +1,176 @@
+"""
+In-memory facet index for product filters
+
+Holds, for every active product, its section, price, sale/stock flags and
+size/color values as posting sets, so facet counts ("M (42), L (37)") are set
+intersections instead of GROUP BY queries. Counts are disjunctive: each
+facet is counted under every active filter except its own, so picking size M
+still shows how many products come in L.
+
+The worker that handles a catalog write updates the index incrementally via
+utils.catalog_sync; other workers see the products version change and rebuild
+(two queries) in the background, serving the old index meanwhile (see
+utils.index_refresh).
+"""
+
+import threading
+from collections import defaultdict
+
+from models import db, Product, ProductVariant
+from utils import catalog_sync
+from utils.index_refresh import RefreshingIndex
+
+# The price options on CategoryPage.jsx. Both bounds are inclusive, like the
+# ?min_price=/?max_price= filter, so a price on a boundary (500) is counted
+# under both adjacent buckets, exactly as either option would return it.
+PRICE_BUCKETS = ((0, 500), (500, 1000), (1000, 5000), (5000, None))
+
+
+def bucket_label(low, high):
+    return f"{low}-{high or ''}"
+
+
+def price_buckets(price):
+    return [bucket_label(low, high) for low, high in PRICE_BUCKETS if in_price_range(price, low, high)]
+
+
+def in_price_range(price, min_price, max_price):
+    return (min_price is None or price >= min_price) and (max_price is None or price <= max_price)
+
+
+class FacetIndex(RefreshingIndex):
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.RLock()
+        self._prices = {}
+        self._postings = defaultdict(lambda: defaultdict(set))
+        self._entries = {}
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions['facet_index'] = self
+        catalog_sync.register(self)
+
+    def _add(self, product_id, section_id, price, on_sale, stock, sizes, colors):
+        price = price or 0
+        keys = [('section', section_id)] + [('price', bucket) for bucket in price_buckets(price)]
+        keys += [('size', size) for size in sizes] + [('color', color) for color in colors]
+        if on_sale:
+            keys.append(('on_sale', True))
+        if (stock or 0) > 0:
+            keys.append(('in_stock', True))
+        for group, value in keys:
+            self._postings[group][value].add(product_id)
+        self._prices[product_id] = price
+        self._entries[product_id] = keys
+
+    def _remove(self, product_id):
+        for group, value in self._entries.pop(product_id, ()):
+            ids = self._postings[group][value]
+            ids.discard(product_id)
+            if not ids:
+                del self._postings[group][value]
+        self._prices.pop(product_id, None)
+
+    def _build(self):
+        fresh = FacetIndex()
+        variants = defaultdict(lambda: ([], []))
+        rows = db.session.execute(
+            db.select(ProductVariant.product_id, ProductVariant.kind, ProductVariant.value)
+            .join(Product, Product.id == ProductVariant.product_id)
+            .where(Product.is_active == True)
+            .order_by(ProductVariant.product_id, ProductVariant.position)
+        )
+        for product_id, kind, value in rows:
+            variants[product_id][0 if kind == 'size' else 1].append(value)
+
+        products = db.session.execute(
+            db.select(Product.id, Product.section_id, Product.price, Product.is_on_sale, Product.stock)
+            .where(Product.is_active == True)
+        )
+        for product_id, section_id, price, on_sale, stock in products:
+            sizes, colors = variants.get(product_id, ((), ()))
+            fresh._add(product_id, section_id, price, on_sale, stock, sizes, colors)
+        return fresh
+
+    def _install(self, fresh):
+        self._prices, self._postings, self._entries = fresh._prices, fresh._postings, fresh._entries
+
+    def counts(self, section_id=None, within=None, sizes=(), colors=(),
+               min_price=None, max_price=None, on_sale=False, in_stock=False):
+        """Facet counts for products in section_id (and `within` ids, e.g. search matches)"""
+        with self._lock:
+            self._ensure_fresh()
+            universe = set(self._prices)
+            if within is not None:
+                universe &= set(within)
+            if section_id is not None:
+                universe &= self._postings['section'].get(section_id, set())
+
+            selected = {}
+            if sizes:
+                selected['size'] = set().union(*(self._postings['size'].get(size, set()) for size in sizes))
+            if colors:
+                selected['color'] = set().union(*(self._postings['color'].get(color, set()) for color in colors))
+            if min_price is not None or max_price is not None:
+                selected['price'] = {
+                    product_id for product_id in universe
+                    if in_price_range(self._prices[product_id], min_price, max_price)
+                }
+            if on_sale:
+                selected['on_sale'] = self._postings['on_sale'].get(True, set())
+            if in_stock:
+                selected['in_stock'] = self._postings['in_stock'].get(True, set())
+
+            def scope(excluded=None):
+                ids = universe
+                for group, matching in selected.items():
+                    if group != excluded:
+                        ids = ids & matching
+                return ids
+
+            def value_counts(group):
+                ids = scope(group)
+                counts = {value: len(members & ids) for value, members in self._postings[group].items()}
+                return dict(sorted(((value, n) for value, n in counts.items() if n), key=lambda item: -item[1]))
+
+            price_scope = scope('price')
+            price_counts = {}
+            for low, high in PRICE_BUCKETS:
+                label = bucket_label(low, high)
+                price_counts[label] = len(self._postings['price'].get(label, set()) & price_scope)
+
+            facets = {
+                'total': len(scope()),
+                'size': value_counts('size'),
+                'color': value_counts('color'),
+                'price': price_counts,
+                'on_sale': len(scope('on_sale') & self._postings['on_sale'].get(True, set())),
+                'in_stock': len(scope('in_stock') & self._postings['in_stock'].get(True, set())),
+            }
+            if section_id is None:
+                facets['section'] = value_counts('section')
+            return facets
+
+    # catalog_sync listeners
+    def products_changed(self, products):
+        with self._lock:
+            if self._version is None:
+                return
+            version = self._version
+            for product in products:
+                self._remove(product.id)
+                if product.is_active:
+                    self._add(product.id, product.section_id, product.price, product.is_on_sale,
+                              product.stock, product.sizes, product.colors)
+            self._adopt_version(version)
+
+    def product_removed(self, product_id):
+        with self._lock:
+            if self._version is None:
+                return
+            self._remove(product_id)
+            self._adopt_version(self._version)
+
+
+facet_index = FacetIndex()
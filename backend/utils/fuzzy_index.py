@@ -0,0 +1,178 @@
+"""
+Typo-tolerant product title matching with an in-memory trigram index
+
+Titles are split into words; every distinct word is indexed by its trigrams
+(padded like pg_trgm: "  tshirt " -> "  t", " ts", "tsh", ... "rt "). A query
+word is scored against the vocabulary words that share at least one trigram
+(Jaccard similarity of the trigram sets), so "tshrt" finds "tshirt" and
+"hoodi" finds "hoodie". Work is bounded by the vocabulary, not the catalog:
+product ids are only touched for the closest words, and at most
+FUZZY_SEARCH_MAX_CANDIDATES of them are scored per query.
+
+Used as the fallback when the full-text search finds nothing. Kept in sync
+like the facet index: incremental updates via utils.catalog_sync in the
+writing worker, a background rebuild (one query) elsewhere once the products
+version moves.
+"""
+
+import heapq
+import re
+import threading
+from collections import defaultdict
+from itertools import islice
+
+from models import db, Product
+from utils import catalog_sync
+from utils.index_refresh import RefreshingIndex
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(text):
+    return TOKEN_RE.findall((text or '').lower())
+
+
+def trigrams(word):
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class FuzzyIndex(RefreshingIndex):
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.RLock()
+        self._reset()
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions['fuzzy_index'] = self
+        catalog_sync.register(self)
+
+    def _config(self, name, default):
+        return self.app.config.get(name, default) if self.app else default
+
+    def _reset(self):
+        self._word_ids = {}                    # word -> word id
+        self._word_grams = []                  # word id -> number of trigrams
+        self._grams = defaultdict(list)        # trigram -> word ids
+        self._word_products = defaultdict(set) # word id -> product ids
+        self._product_words = {}               # product id -> word ids
+
+    def _word_id(self, word):
+        word_id = self._word_ids.get(word)
+        if word_id is None:
+            word_id = self._word_ids[word] = len(self._word_grams)
+            grams = trigrams(word)
+            self._word_grams.append(len(grams))
+            for gram in grams:
+                self._grams[gram].append(word_id)
+        return word_id
+
+    def _add(self, product_id, title):
+        word_ids = tuple({self._word_id(word) for word in tokenize(title)})
+        for word_id in word_ids:
+            self._word_products[word_id].add(product_id)
+        self._product_words[product_id] = word_ids
+
+    def _remove(self, product_id):
+        for word_id in self._product_words.pop(product_id, ()):
+            self._word_products[word_id].discard(product_id)
+
+    def build(self, rows):
+        """Replace the index with (product_id, title) rows"""
+        with self._lock:
+            self._reset()
+            for product_id, title in rows:
+                self._add(product_id, title)
+
+    def _build(self):
+        fresh = FuzzyIndex()
+        fresh.app = self.app
+        fresh.build(db.session.execute(
+            db.select(Product.id, Product.title).where(Product.is_active == True)
+        ))
+        return fresh
+
+    def _install(self, fresh):
+        self._word_ids, self._word_grams, self._grams = fresh._word_ids, fresh._word_grams, fresh._grams
+        self._word_products, self._product_words = fresh._word_products, fresh._product_words
+
+    def _similar_words(self, token, threshold):
+        """{word id: similarity} for vocabulary words close to token"""
+        grams = trigrams(token)
+        shared = defaultdict(int)
+        for gram in grams:
+            for word_id in self._grams.get(gram, ()):
+                shared[word_id] += 1
+        similar = {}
+        for word_id, common in shared.items():
+            score = common / (len(grams) + self._word_grams[word_id] - common)
+            if score >= threshold and self._word_products[word_id]:
+                similar[word_id] = score
+        return similar
+
+    def search(self, term, limit=None, ensure_fresh=True):
+        """[(product_id, score)] best first; every query word must match some title word"""
+        tokens = list(dict.fromkeys(tokenize(term)))[:8]
+        if not tokens:
+            return []
+        threshold = self._config('FUZZY_SEARCH_THRESHOLD', 0.3)
+        max_candidates = self._config('FUZZY_SEARCH_MAX_CANDIDATES', 5000)
+        limit = limit or self._config('FUZZY_SEARCH_MAX_RESULTS', 200)
+
+        with self._lock:
+            if ensure_fresh:
+                self._ensure_fresh()
+            matches = [self._similar_words(token, threshold) for token in tokens]
+            if not all(matches):
+                return []
+
+            # Candidates come from the most selective query word, closest words first
+            def reach(similar):
+                return sum(len(self._word_products[word_id]) for word_id in similar)
+            anchor = min(matches, key=reach)
+            candidates = set()
+            for word_id in sorted(anchor, key=anchor.get, reverse=True):
+                products = self._word_products[word_id]
+                room = max_candidates - len(candidates)
+                if len(products) <= room:
+                    candidates |= products
+                else:
+                    candidates.update(islice(products, room))
+                    break
+
+            scored = []
+            for product_id in candidates:
+                words = self._product_words[product_id]
+                total = 0.0
+                for similar in matches:
+                    best = max((similar.get(word_id, 0.0) for word_id in words), default=0.0)
+                    if not best:
+                        break
+                    total += best
+                else:
+                    scored.append((total / len(matches), product_id))
+            return [(product_id, score) for score, product_id in heapq.nlargest(limit, scored)]
+
+    # catalog_sync listeners
+    def products_changed(self, products):
+        with self._lock:
+            if self._version is None:
+                return
+            version = self._version
+            for product in products:
+                self._remove(product.id)
+                if product.is_active:
+                    self._add(product.id, product.title)
+            self._adopt_version(version)
+
+    def product_removed(self, product_id):
+        with self._lock:
+            if self._version is None:
+                return
+            version = self._version
+            self._remove(product_id)
+            self._adopt_version(version)
+
+
+fuzzy_index = FuzzyIndex()
@@ -0,0 +1,75 @@
+"""
+Background pruning of abandoned guest carts
+
+Guest cart lines (X-Guest-Cart token) untouched for GUEST_CART_TTL_DAYS are
+deleted by a flush thread every GUEST_CART_PRUNE_INTERVAL seconds, never on
+the request path. Rows go in batches of GUEST_CART_PRUNE_BATCH_SIZE so one
+run never holds a long lock on `guest_cart_items`. The thread starts with
+the first guest cart write in each worker; every worker prunes, which is
+harmless since the deletes are idempotent.
+"""
+
+from datetime import datetime, timedelta
+
+from models import db, GuestCartItem
+from utils.periodic import PeriodicFlusher
+
+
+class GuestCartPruner(PeriodicFlusher):
+    """Delete stale guest cart lines on a daemon thread"""
+
+    thread_name = 'guest-cart-prune'
+
+    def __init__(self):
+        super().__init__()
+        self.flush_interval = 3600
+        self.max_age_days = 30
+        self.batch_size = 1000
+
+    def init_app(self, app):
+        super().init_app(app)
+        self.flush_interval = app.config.get('GUEST_CART_PRUNE_INTERVAL', 3600)
+        self.max_age_days = app.config.get('GUEST_CART_TTL_DAYS', 30)
+        self.batch_size = app.config.get('GUEST_CART_PRUNE_BATCH_SIZE', 1000)
+        app.extensions['guest_cart_pruner'] = self
+
+    def touch(self):
+        """Called on guest cart writes; starts the prune thread in this worker"""
+        if self.max_age_days:
+            self._ensure_worker()
+
+    def flush(self):
+        self.prune()
+
+    def shutdown(self):
+        # Nothing is buffered, so there is no final flush to run
+        self._stopped.set()
+        self._wakeup.set()
+
+    def prune(self):
+        """Delete guest lines untouched for max_age_days; returns the number deleted"""
+        if not self.max_age_days:
+            return 0
+        cutoff = datetime.utcnow() - timedelta(days=self.max_age_days)
+        deleted = 0
+        with self.app.app_context():
+            try:
+                while True:
+                    ids = list(db.session.scalars(
+                        db.select(GuestCartItem.id).where(GuestCartItem.updated_at < cutoff)
+                        .order_by(GuestCartItem.id).limit(self.batch_size)
+                    ))
+                    if not ids:
+                        break
+                    db.session.execute(db.delete(GuestCartItem).where(GuestCartItem.id.in_(ids)))
+                    db.session.commit()
+                    deleted += len(ids)
+                    if len(ids) < self.batch_size:
+                        break
+            except Exception as e:
+                db.session.rollback()
+                print(f"Error pruning guest carts: {e}")
+        return deleted
+
+
+guest_cart_pruner = GuestCartPruner()
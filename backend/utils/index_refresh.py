@@ -0,0 +1,81 @@
+"""
+Background rebuilds for the in-memory catalog indexes (facets, typeahead,
+fuzzy search)
+
+When another worker writes the catalog, the version an index was built for
+goes stale. Instead of reloading inside the request that notices, the index
+keeps serving what it has and rebuilds on a daemon thread; the fresh copy is
+swapped in under the lock in one step. Only a cold index (nothing to serve
+yet) is built in the request. Each index declares the catalog_cache version
+scopes it is derived from, so e.g. a section rename does not rebuild the
+fuzzy index.
+"""
+
+import threading
+
+from utils.catalog_cache import catalog_cache
+
+
+class RefreshingIndex:
+    """Keep an index in step with catalog_cache versions
+
+    Subclasses set `scopes`, create `_lock` (an RLock) and implement
+    `_build()`, returning a new instance of the index loaded from the
+    database, and `_install(fresh)`, taking over its structures. Callers hold
+    `_lock` around `_ensure_fresh()` and their reads. `_current_version()`
+    may append items of its own (e.g. a time bucket) that also force a rebuild.
+    """
+
+    scopes = ('products',)
+
+    def __init__(self):
+        self.app = None
+        self._version = None
+        self._refreshing = False
+
+    def warm(self):
+        with self._lock:
+            self._ensure_fresh()
+
+    def _build(self):
+        raise NotImplementedError
+
+    def _install(self, fresh):
+        raise NotImplementedError
+
+    def _current_version(self):
+        return tuple(catalog_cache.version(scope) for scope in self.scopes)
+
+    def _ensure_fresh(self):
+        version = self._current_version()
+        if version == self._version:
+            return
+        if self._version is None or self.app is None:
+            # Nothing to serve yet (or no app to run a thread with): build in place
+            self._install(self._build())
+            self._version = version
+        elif not self._refreshing:
+            self._refreshing = True
+            threading.Thread(target=self._refresh, args=(version,), daemon=True,
+                             name=f'{type(self).__name__}-refresh').start()
+
+    def _refresh(self, version):
+        try:
+            with self.app.app_context():
+                fresh = self._build()
+            with self._lock:
+                self._install(fresh)
+                # A write that landed meanwhile leaves the version behind and triggers another rebuild
+                self._version = version
+        except Exception as e:
+            print(f"{type(self).__name__} rebuild failed: {e}")
+        finally:
+            self._refreshing = False
+
+    def _adopt_version(self, version):
+        # Skip the rebuild only if this write was the sole change since the index was built
+        current = self._current_version()
+        own_writes = all(old == new or catalog_cache.advanced_from(old, scope)
+                         for scope, old, new in zip(self.scopes, version, current))
+        if own_writes and version[len(self.scopes):] == current[len(self.scopes):]:
+            self._version = current
@@ -0,0 +1,74 @@
+"""
+orjson-backed JSON provider for the Flask app
+
+`jsonify`, `request.get_json()` and friends go through `app.json`, so routes
+don't change. orjson encodes datetime/date/UUID/dataclasses natively (ISO 8601,
+same as the `.isoformat()` calls in the models); Decimal, sets and Markup go
+through `default`. Output matches the stdlib provider's: sorted keys (kept on
+by default so cached catalog bodies stay byte-stable), compact unless debug.
+Non-str dict keys (e.g. {section_id: count}) are stringified.
+
+orjson is optional: without it (or with JSON_PROVIDER=stdlib) Flask's
+default provider is left in place.
+"""
+
+import decimal
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(obj):
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    default = staticmethod(_default)
+
+    def _option(self, indent=False):
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj, **kwargs):
+        if set(kwargs) - {'separators', 'indent'} or kwargs.get('indent') not in (None, 2):
+            # json.dumps-only arguments (cls, ensure_ascii, ...): use the stdlib encoder
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self._option(bool(kwargs.get('indent')))).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        body = orjson.dumps(obj, default=self.default, option=self._option(indent))
+        return self._app.response_class(body + b'\n', mimetype=self.mimetype)
+
+
+def init_json(app):
+    """Install the configured JSON provider on app ('auto' picks orjson when installed)"""
+    setting = app.config.get('JSON_PROVIDER', 'auto')
+    if setting == 'stdlib':
+        return
+    if orjson is None:
+        if setting == 'orjson':
+            print("JSON_PROVIDER=orjson but orjson is not installed; using the stdlib encoder")
+        return
+    app.json = OrjsonProvider(app)
+    app.json.sort_keys = app.config.get('JSON_SORT_KEYS', True)
@@ -0,0 +1,218 @@
+"""
+Versioned schema migrations
+
+`db.create_all()` creates missing tables but never changes existing ones, so
+schema changes to tables that already hold data are written as numbered
+migrations here. Each runs once per database and is recorded in
+`schema_migrations`. Index builds are online: MySQL uses
+`ALGORITHM=INPLACE, LOCK=NONE` so reads and writes continue during the build,
+SQLite uses `CREATE INDEX IF NOT EXISTS`.
+
+Run with `python migrate.py`; deploy.sh does this on every deploy.
+"""
+
+import json
+
+from sqlalchemy import inspect
+
+from utils.product_search import product_search
+from models import (
+    db, SchemaMigration, Product, ProductImage, ProductVariant, Order, CartItem, WishlistItem
+)
+
+MIGRATIONS = []
+
+
+def migration(version, description):
+    """Register fn as schema migration `version`"""
+    def decorator(fn):
+        if any(existing[0] == version for existing in MIGRATIONS):
+            raise ValueError(f'Duplicate migration version {version}')
+        MIGRATIONS.append((version, description, fn))
+        return fn
+    return decorator
+
+
+def dialect():
+    return db.engine.dialect.name
+
+
+def column_exists(table, name):
+    return any(column['name'] == name for column in inspect(db.engine).get_columns(table))
+
+
+def add_column(table, name, definition):
+    """Add a column in place (MySQL: no table copy, no write lock); no-op if present"""
+    if column_exists(table, name):
+        print(f"  • {table}.{name} already exists")
+        return
+    sql = f"ALTER TABLE {table} ADD COLUMN {name} {definition}"
+    if dialect() == 'mysql':
+        sql += ", ALGORITHM=INPLACE, LOCK=NONE"
+    db.session.execute(db.text(sql))
+    db.session.commit()
+    print(f"  ✓ Added {table}.{name}")
+
+
+def index_exists(table, name):
+    return any(index['name'] == name for index in inspect(db.engine).get_indexes(table))
+
+
+def add_index(table, name, columns, unique=False):
+    """Create an index without blocking writes; no-op if it already exists"""
+    if index_exists(table, name):
+        print(f"  • {name} already exists")
+        return
+    kind = 'UNIQUE INDEX' if unique else 'INDEX'
+    column_list = ', '.join(columns)
+    if dialect() == 'mysql':
+        sql = f"ALTER TABLE {table} ADD {kind} {name} ({column_list}), ALGORITHM=INPLACE, LOCK=NONE"
+    else:
+        sql = f"CREATE {kind} IF NOT EXISTS {name} ON {table} ({column_list})"
+    db.session.execute(db.text(sql))
+    db.session.commit()
+    print(f"  ✓ Created {name} on {table} ({column_list})")
+
+
+def drop_index(table, name):
+    """Drop an index if it exists"""
+    if not index_exists(table, name):
+        return
+    if dialect() == 'mysql':
+        sql = f"ALTER TABLE {table} DROP INDEX {name}, ALGORITHM=INPLACE, LOCK=NONE"
+    else:
+        sql = f"DROP INDEX IF EXISTS {name}"
+    db.session.execute(db.text(sql))
+    db.session.commit()
+    print(f"  ✓ Dropped {name} on {table}")
+
+
+def add_declared_indexes(model):
+    """Create the non-unique indexes declared in model.__table_args__ that the database lacks
+
+    Unique indexes need existing rows cleaned up first, so each gets its own migration.
+    """
+    for arg in getattr(model, '__table_args__', ()):
+        if isinstance(arg, db.Index) and not arg.unique:
+            add_index(model.__tablename__, arg.name, [c.name for c in arg.columns])
+
+
+def applied_versions():
+    return {row.version for row in SchemaMigration.query.all()}
+
+
+def pending_migrations():
+    applied = applied_versions()
+    return sorted(m for m in MIGRATIONS if m[0] not in applied)
+
+
+def run_migrations():
+    """Create missing tables, then apply pending migrations in version order"""
+    db.create_all()
+    applied = []
+    for version, description, fn in pending_migrations():
+        print(f"→ Migration {version}: {description}")
+        fn()
+        db.session.add(SchemaMigration(version=version, description=description))
+        db.session.commit()
+        applied.append(version)
+    return applied
+
+
+@migration(1, 'Composite indexes for catalog, order, cart and wishlist queries')
+def add_hot_query_indexes():
+    for model in (Product, Order, CartItem, WishlistItem):
+        add_declared_indexes(model)
+
+
+def _parse_json_list(raw):
+    if not raw:
+        return []
+    try:
+        values = json.loads(raw)
+    except ValueError:
+        return []
+    return [str(value) for value in values if value not in (None, '')] if isinstance(values, list) else []
+
+
+@migration(2, 'Copy product images/sizes/colors JSON into product_images and product_variants')
+def normalize_product_media(batch_size=500):
+    # Fresh databases never had the JSON columns; the child tables come from create_all
+    if not all(column_exists('products', name) for name in ('images', 'sizes', 'colors')):
+        return
+
+    migrated = set(db.session.scalars(db.select(ProductImage.product_id).distinct()))
+    migrated.update(db.session.scalars(db.select(ProductVariant.product_id).distinct()))
+    last_id, copied = 0, 0
+    while True:
+        rows = db.session.execute(db.text(
+            "SELECT id, images, sizes, colors FROM products WHERE id > :last_id ORDER BY id LIMIT :limit"
+        ), {'last_id': last_id, 'limit': batch_size}).all()
+        if not rows:
+            break
+        images, variants = [], []
+        for product_id, raw_images, raw_sizes, raw_colors in rows:
+            if product_id in migrated:
+                continue
+            images.extend({'product_id': product_id, 'position': i, 'url': url}
+                          for i, url in enumerate(_parse_json_list(raw_images)))
+            for kind, raw in (('size', raw_sizes), ('color', raw_colors)):
+                variants.extend({'product_id': product_id, 'kind': kind, 'value': value[:50], 'position': i}
+                                for i, value in enumerate(_parse_json_list(raw)))
+            copied += 1
+        if images:
+            db.session.execute(db.insert(ProductImage), images)
+        if variants:
+            db.session.execute(db.insert(ProductVariant), variants)
+        db.session.commit()
+        last_id = rows[-1][0]
+    print(f"  ✓ Copied media for {copied} products (JSON columns left in place, no longer read)")
+
+
+@migration(3, 'Per-user cart/wishlist/address version counters for ETags')
+def add_user_version_counters():
+    for name in ('cart_version', 'wishlist_version', 'address_version'):
+        add_column('users', name, 'INTEGER NOT NULL DEFAULT 0')
+
+
+@migration(4, 'Unique cart line per (user, product, size, color)')
+def add_cart_variant_unique_index():
+    # NULL never equals NULL in a unique index, so "no size/color" is stored as ''
+    for column in ('size', 'color'):
+        db.session.execute(db.text(f"UPDATE cart_items SET {column} = '' WHERE {column} IS NULL"))
+    db.session.commit()
+    if dialect() == 'mysql':
+        db.session.execute(db.text(
+            "ALTER TABLE cart_items MODIFY size VARCHAR(50) NOT NULL DEFAULT '', "
+            "MODIFY color VARCHAR(50) NOT NULL DEFAULT '', ALGORITHM=INPLACE, LOCK=NONE"
+        ))
+        db.session.commit()
+
+    # Fold duplicate lines left by the old select-then-insert into the oldest one
+    key = (CartItem.user_id, CartItem.product_id, CartItem.size, CartItem.color)
+    duplicates = db.session.execute(
+        db.select(*key, db.func.min(CartItem.id), db.func.sum(CartItem.quantity))
+        .group_by(*key).having(db.func.count(CartItem.id) > 1)
+    ).all()
+    for user_id, product_id, size, color, keep_id, quantity in duplicates:
+        db.session.execute(db.update(CartItem).where(CartItem.id == keep_id).values(quantity=quantity))
+        db.session.execute(db.delete(CartItem).where(
+            CartItem.user_id == user_id, CartItem.product_id == product_id,
+            CartItem.size == size, CartItem.color == color, CartItem.id != keep_id
+        ))
+    db.session.commit()
+    if duplicates:
+        print(f"  ✓ Merged {len(duplicates)} duplicated cart lines")
+
+    add_index('cart_items', 'uq_cart_items_variant', ['user_id', 'product_id', 'size', 'color'], unique=True)
+    drop_index('cart_items', 'ix_cart_items_user_product')
+
+
+@migration(5, 'Full-text search index on products (MySQL FULLTEXT / SQLite FTS5)')
+def add_product_search_index():
+    backend = product_search.configured_backend()
+    if backend.index_exists():
+        print(f"  • {backend.name} index already exists")
+        return
+    backend.create_index()
+    print(f"  ✓ Created {backend.name} index")
@@ -0,0 +1,63 @@
+"""
+Order listings from projected rows
+
+`order_dicts(rows)` turns rows selected with `order_row.columns` into the
+same dicts as Order.to_dict(), loading addresses, payment details, items,
+item products and (for admin) users with one IN query each instead of
+per-order lazy loads.
+"""
+
+from models import db, User, Address, OrderItem, PaymentDetail
+from utils.product_fields import product_dicts
+from utils.row_serializers import address_row, order_item_row, order_row, payment_detail_row, user_row
+
+
+def order_query(query):
+    """Narrow an Order query to the columns order_dicts() needs"""
+    return query.with_entities(*order_row.columns)
+
+
+def order_dicts(rows, include_user=False):
+    if not rows:
+        return []
+    order_ids = [row.id for row in rows]
+
+    addresses = {
+        row.id: address_row.serialize(row) for row in db.session.execute(
+            address_row.select().where(Address.id.in_({row.address_id for row in rows}))
+        )
+    }
+    payments = {
+        row.order_id: payment_detail_row.serialize(row) for row in db.session.execute(
+            payment_detail_row.select().where(PaymentDetail.order_id.in_(order_ids))
+        )
+    }
+    item_rows = db.session.execute(
+        order_item_row.select().where(OrderItem.order_id.in_(order_ids)).order_by(OrderItem.id)
+    ).all()
+    products = product_dicts({row.product_id for row in item_rows})
+    items = {}
+    for row in item_rows:
+        item = order_item_row.serialize(row)
+        item['product'] = products.get(row.product_id, {})
+        item['product_name'] = item['product'].get('title', 'Unknown Product')
+        items.setdefault(row.order_id, []).append(item)
+    users = {}
+    if include_user:
+        users = {
+            row.id: row for row in db.session.execute(
+                user_row.select().where(User.id.in_({row.user_id for row in rows}))
+            )
+        }
+
+    results = []
+    for row in rows:
+        order = order_row.serialize(row)
+        order['shipping_address'] = addresses.get(row.address_id)
+        order['order_items'] = items.get(row.id, [])
+        order['payment_details'] = payments.get(row.id)
+        if row.user_id in users:
+            order['user'] = user_row.serialize(users[row.user_id])
+            order['customer'] = user_row.serialize(users[row.user_id])
+        results.append(order)
+    return results
@@ -0,0 +1,60 @@
+"""
+Keyset (cursor) pagination on (created_at, id), newest first
+
+Opt-in alternative to `paginate()` for listing endpoints: passing
+`?cursor=` (empty for the first page) seeks directly past the last row of
+the previous page instead of using OFFSET, and skips the COUNT(*) query.
+The cursor is opaque to clients. `per_page` is clamped to
+1..CURSOR_MAX_PER_PAGE.
+"""
+
+import base64
+import json
+from datetime import datetime
+
+from flask import current_app
+
+from models import db
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(created_at, row_id):
+    payload = json.dumps([created_at.isoformat() if created_at else None, row_id])
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return (datetime.fromisoformat(created_at) if created_at else None), int(row_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor('Invalid cursor') from e
+
+
+def keyset_paginate(query, model, cursor, per_page):
+    """Return (items, next_cursor); next_cursor is None on the last page"""
+    per_page = min(max(per_page or 1, 1), current_app.config.get('CURSOR_MAX_PER_PAGE', 100))
+    query = query.order_by(model.created_at.desc(), model.id.desc())
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        if created_at is None:
+            query = query.filter(model.created_at.is_(None), model.id < row_id)
+        else:
+            # NULL timestamps sort last in descending order on MySQL and SQLite
+            query = query.filter(db.or_(
+                model.created_at < created_at,
+                db.and_(model.created_at == created_at, model.id < row_id),
+                model.created_at.is_(None)
+            ))
+
+    rows = query.limit(per_page + 1).all()
+    items = rows[:per_page]
+    next_cursor = None
+    if len(rows) > per_page:
+        last = items[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+    return items, next_cursor
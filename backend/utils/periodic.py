@@ -0,0 +1,78 @@
+"""
+Background flush thread shared by the in-process buffers (analytics
+counters, event pipeline, sketches)
+
+Server processes call `shutdown()` on the way out (gunicorn `worker_exit`,
+the `__main__` dev server); scripts that merely import the app do not.
+"""
+
+import os
+import threading
+
+
+class PeriodicFlusher:
+    """Run `flush()` every `flush_interval` seconds on a daemon thread
+
+    Subclasses implement `flush()` and call `_ensure_worker()` whenever they
+    buffer data. `wake()` forces an early flush, `shutdown()` stops the thread
+    and flushes one last time.
+    """
+
+    thread_name = 'periodic-flush'
+
+    def __init__(self):
+        self.app = None
+        self.flush_interval = 1.0
+        self._thread_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def init_app(self, app):
+        self.app = app
+
+    def flush(self):
+        raise NotImplementedError
+
+    def wake(self):
+        self._wakeup.set()
+
+    def shutdown(self):
+        """Stop the flush thread and persist whatever is still buffered
+
+        A no-op in processes that never buffered anything (the thread starts with the first write).
+        """
+        if self._thread is None or self._pid != os.getpid():
+            return
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread and self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+        if self.app is not None:
+            self.flush()
+
+    def _worker_running(self):
+        return self._thread is not None and self._thread.is_alive() and self._pid == os.getpid()
+
+    def _ensure_worker(self):
+        # Gunicorn forks workers after import, so the flush thread is started
+        # lazily and restarted if we find ourselves in a new process.
+        if self._worker_running():
+            return
+        with self._thread_lock:
+            if self._worker_running():
+                return
+            self._pid = os.getpid()
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name=self.thread_name, daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Error in {self.thread_name}: {e}")
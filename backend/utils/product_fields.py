@@ -0,0 +1,133 @@
+"""
+Sparse fieldsets for product listings
+
+`?fields=id,title,price` returns only those keys of Product.to_dict().
+`?fields=card` is the preset for product cards (ProductCard.jsx, MiniCart,
+...): the keys they render, with `images` cut down to the first image.
+Queries select just the needed columns with `with_entities` and rows go
+through a compiled serializer (utils.row_serializers), so no Product objects
+are built; without ?fields= every to_dict() key is selected. Images and
+sizes/colors come from one extra query each, and only when requested.
+"""
+
+from functools import lru_cache
+
+from models import db, Product, ProductImage, ProductVariant, Section
+from utils.row_serializers import RowSerializer
+
+COLUMN_FIELDS = {
+    'id': Product.id,
+    'sku': Product.sku,
+    'title': Product.title,
+    'slug': Product.slug,
+    'description': Product.description,
+    'price': Product.price,
+    'original_price': Product.original_price,
+    'is_on_sale': Product.is_on_sale,
+    'stock': Product.stock,
+    'section_id': Product.section_id,
+    'category': Section.slug,
+    'is_active': Product.is_active,
+}
+RELATED_FIELDS = ('images', 'sizes', 'colors')
+FIELDS = tuple(COLUMN_FIELDS) + RELATED_FIELDS
+
+PROJECTIONS = {
+    'card': ('id', 'slug', 'title', 'price', 'original_price', 'is_on_sale', 'stock',
+             'section_id', 'category', 'images'),
+}
+
+
+@lru_cache(maxsize=64)
+def row_serializer(fields):
+    """Compiled serializer for a tuple of field names (id/created_at kept for paging)"""
+    return RowSerializer(
+        'Product', [(name, COLUMN_FIELDS[name]) for name in fields if name in COLUMN_FIELDS],
+        hidden=[('id', Product.id), ('created_at', Product.created_at)]
+    )
+
+
+class Fieldset:
+    def __init__(self, fields, first_image_only=False):
+        self.fields = fields
+        self.first_image_only = first_image_only
+        self.row_serializer = row_serializer(tuple(fields))
+
+    def prepare(self, query, *extra_columns):
+        """Narrow a Product query to the needed columns (plus labeled extras, e.g. from a joined table)"""
+        if 'category' in self.fields:
+            query = query.join(Section, Section.id == Product.section_id)
+        return query.with_entities(*self.row_serializer.columns, *extra_columns)
+
+    def serialize(self, rows):
+        ids = [row.id for row in rows]
+        images = self._images(ids) if 'images' in self.fields and ids else {}
+        variants = self._variants(ids) if ('sizes' in self.fields or 'colors' in self.fields) and ids else {}
+
+        results = []
+        for row in rows:
+            item = self.row_serializer.serialize(row)
+            if 'images' in self.fields:
+                item['images'] = images.get(row.id, [])
+            for kind, name in (('size', 'sizes'), ('color', 'colors')):
+                if name in self.fields:
+                    item[name] = variants.get((row.id, kind), [])
+            results.append(item)
+        return results
+
+    def _images(self, ids):
+        query = db.select(ProductImage.product_id, ProductImage.url).where(ProductImage.product_id.in_(ids))
+        if self.first_image_only:
+            first = db.select(
+                ProductImage.product_id, db.func.min(ProductImage.position).label('position')
+            ).where(ProductImage.product_id.in_(ids)).group_by(ProductImage.product_id).subquery()
+            query = query.join(first, db.and_(
+                first.c.product_id == ProductImage.product_id, first.c.position == ProductImage.position
+            ))
+        images = {}
+        for product_id, url in db.session.execute(query.order_by(ProductImage.product_id, ProductImage.position)):
+            images.setdefault(product_id, []).append(url)
+        return images
+
+    def _variants(self, ids):
+        kinds = [kind for kind, name in (('size', 'sizes'), ('color', 'colors')) if name in self.fields]
+        rows = db.session.execute(
+            db.select(ProductVariant.product_id, ProductVariant.kind, ProductVariant.value).where(
+                ProductVariant.product_id.in_(ids), ProductVariant.kind.in_(kinds)
+            ).order_by(ProductVariant.product_id, ProductVariant.position)
+        )
+        variants = {}
+        for product_id, kind, value in rows:
+            variants.setdefault((product_id, kind), []).append(value)
+        return variants
+
+
+def full_fieldset():
+    """Every Product.to_dict() key, read from projected rows"""
+    return Fieldset(list(FIELDS))
+
+
+def product_dicts(ids):
+    """{id: Product.to_dict()-shaped dict} for ids, active or not"""
+    if not ids:
+        return {}
+    fieldset = full_fieldset()
+    rows = fieldset.prepare(Product.query.filter(Product.id.in_(ids))).all()
+    return {item['id']: item for item in fieldset.serialize(rows)}
+
+
+def parse_fields(raw):
+    """Fieldset for a ?fields= value; raises ValueError on unknown names"""
+    if not raw:
+        return full_fieldset()
+    names = [name.strip() for name in raw.split(',') if name.strip()]
+    fields, first_image_only = [], False
+    for name in names:
+        if name in PROJECTIONS:
+            fields.extend(PROJECTIONS[name])
+            first_image_only = True
+        elif name in FIELDS:
+            fields.append(name)
+        else:
+            raise ValueError(f"Unknown field '{name}'")
+    return Fieldset(list(dict.fromkeys(fields)), first_image_only)
@@ -0,0 +1,244 @@
+"""
+Full-text product search
+
+Replaces `LIKE '%term%'` scans with an index-backed, relevance-ranked match:
+- MySQL: FULLTEXT index on products(title, description), boolean mode with
+  prefix terms (`word*`); the index is maintained by InnoDB itself.
+- SQLite: an FTS5 table keyed by product id, kept in sync from the admin
+  write paths through utils.catalog_sync.
+- Anything else (or SEARCH_BACKEND=like): the previous substring filter.
+
+`product_search.apply(query, term)` adds the match filter and, when
+`rank=True`, orders by relevance before any ordering the caller adds.
+
+The index itself is created by a migration (utils/migrations.py, applied by
+migrate.py at deploy): building a FULLTEXT index rebuilds the products table,
+which must not happen inside a request. At runtime the backend only checks
+that the index exists and serves LIKE search until it does.
+"""
+
+import re
+import threading
+import time
+
+from sqlalchemy.dialects.mysql import match as mysql_match
+
+from models import db, Product
+from utils import catalog_sync
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(term):
+    return TOKEN_RE.findall(term.lower())[:8]
+
+
+class LikeSearchBackend:
+    """Substring search (no index); used where no full-text engine is available"""
+
+    name = 'like'
+
+    def index_exists(self):
+        return True
+
+    def create_index(self):
+        pass
+
+    def apply(self, query, term, include_sku=False, rank=True):
+        conditions = [Product.title.contains(term), Product.description.contains(term)]
+        if include_sku:
+            conditions.append(Product.sku.contains(term))
+        return query.filter(db.or_(*conditions))
+
+    def index_products(self, products):
+        pass
+
+    def remove_product(self, product_id):
+        pass
+
+    def rebuild(self):
+        pass
+
+
+class MySQLFulltextBackend(LikeSearchBackend):
+    """InnoDB FULLTEXT index on (title, description)"""
+
+    name = 'mysql_fulltext'
+    index_name = 'ft_products_title_description'
+    min_token_length = 3  # innodb_ft_min_token_size default
+
+    def index_exists(self):
+        return bool(db.session.execute(db.text(
+            "SELECT COUNT(*) FROM information_schema.statistics "
+            "WHERE table_schema = DATABASE() AND table_name = 'products' AND index_name = :name"
+        ), {'name': self.index_name}).scalar())
+
+    def create_index(self):
+        """DDL: migrations only (the first FULLTEXT index rebuilds the table)"""
+        if not self.index_exists():
+            db.session.execute(db.text(
+                f"ALTER TABLE products ADD FULLTEXT INDEX {self.index_name} (title, description)"
+            ))
+            db.session.commit()
+
+    def apply(self, query, term, include_sku=False, rank=True):
+        tokens = [t for t in tokenize(term) if len(t) >= self.min_token_length]
+        if not tokens:
+            # Too short for the FULLTEXT index; fall back to a title prefix match
+            return query.filter(Product.title.startswith(term))
+        against = ' '.join(f'+{token}*' for token in tokens)
+        score = mysql_match(Product.title, Product.description, against=against).in_boolean_mode()
+        condition = score > 0
+        if include_sku:
+            condition = db.or_(condition, Product.sku.startswith(term))
+        query = query.filter(condition)
+        return query.order_by(score.desc()) if rank else query
+
+
+class SQLiteFTS5Backend(LikeSearchBackend):
+    """FTS5 table (title, sku, description) whose rowid is the product id"""
+
+    name = 'sqlite_fts5'
+
+    def index_exists(self):
+        return db.session.execute(db.text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'products_fts'"
+        )).first() is not None
+
+    def create_index(self):
+        """DDL: migrations only"""
+        if not self.index_exists():
+            db.session.execute(db.text(
+                "CREATE VIRTUAL TABLE products_fts USING fts5("
+                "title, sku, description, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+            ))
+            db.session.commit()
+            self.rebuild()
+
+    def _match_expression(self, term, include_sku):
+        tokens = tokenize(term)
+        if not tokens:
+            return None
+        terms = ' '.join(f'"{token}"*' for token in tokens)
+        return terms if include_sku else f'{{title description}} : ({terms})'
+
+    def apply(self, query, term, include_sku=False, rank=True):
+        expression = self._match_expression(term, include_sku)
+        if expression is None:
+            return query.filter(db.false())
+        # bm25 weights: title matches count most, then sku, then description
+        matches = db.text(
+            "SELECT rowid AS product_id, bm25(products_fts, 10.0, 5.0, 1.0) AS score "
+            "FROM products_fts WHERE products_fts MATCH :expression"
+        ).bindparams(expression=expression).columns(
+            db.column('product_id', db.Integer), db.column('score', db.Float)
+        ).subquery('fts_matches')
+        query = query.join(matches, matches.c.product_id == Product.id)
+        # bm25 is lower-is-better
+        return query.order_by(matches.c.score) if rank else query
+
+    def index_products(self, products):
+        rows = [
+            {'id': p.id, 'title': p.title or '', 'sku': p.sku or '', 'description': p.description or ''}
+            for p in products
+        ]
+        if not rows:
+            return
+        db.session.execute(
+            db.text("DELETE FROM products_fts WHERE rowid = :id"), [{'id': row['id']} for row in rows]
+        )
+        db.session.execute(db.text(
+            "INSERT INTO products_fts (rowid, title, sku, description) "
+            "VALUES (:id, :title, :sku, :description)"
+        ), rows)
+        db.session.commit()
+
+    def remove_product(self, product_id):
+        db.session.execute(db.text("DELETE FROM products_fts WHERE rowid = :id"), {'id': product_id})
+        db.session.commit()
+
+    def rebuild(self):
+        db.session.execute(db.text("DELETE FROM products_fts"))
+        db.session.execute(db.text(
+            "INSERT INTO products_fts (rowid, title, sku, description) "
+            "SELECT id, title, sku, COALESCE(description, '') FROM products"
+        ))
+        db.session.commit()
+
+
+class ProductSearch:
+    """Picks the backend for the configured database and proxies to it"""
+
+    def __init__(self):
+        self.app = None
+        self._backend = None
+        self._fallback = LikeSearchBackend()
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions['product_search'] = self
+        catalog_sync.register(self)
+
+    @property
+    def backend(self):
+        """The full-text backend once its index exists, LIKE search until then
+
+        A missing index is re-checked at most every SEARCH_INDEX_RECHECK seconds,
+        so workers pick the index up after migrate.py without a restart.
+        """
+        if self._backend is not None:
+            return self._backend
+        recheck = self.app.config.get('SEARCH_INDEX_RECHECK', 60) if self.app else 60
+        if time.monotonic() - self._checked_at < recheck:
+            return self._fallback
+        with self._lock:
+            if self._backend is None and time.monotonic() - self._checked_at >= recheck:
+                self._checked_at = time.monotonic()
+                self._backend = self._ready_backend()
+        return self._backend or self._fallback
+
+    def warm(self):
+        """Run the index check before the worker takes requests"""
+        return self.backend
+
+    def configured_backend(self):
+        setting = self.app.config.get('SEARCH_BACKEND', 'auto') if self.app else 'auto'
+        dialect = db.engine.dialect.name
+        if setting == 'like':
+            return LikeSearchBackend()
+        if dialect == 'mysql':
+            return MySQLFulltextBackend()
+        if dialect == 'sqlite':
+            return SQLiteFTS5Backend()
+        return LikeSearchBackend()
+
+    def _ready_backend(self):
+        """The configured backend if its index exists (read-only check, never DDL), else None"""
+        backend = self.configured_backend()
+        try:
+            if backend.index_exists():
+                return backend
+        except Exception as e:
+            db.session.rollback()
+            print(f"Could not check the full-text index: {e}")
+            return None
+        print(f"Full-text index missing ({backend.name}); using LIKE search until migrate.py creates it")
+        return None
+
+    def apply(self, query, term, include_sku=False, rank=True):
+        return self.backend.apply(query, term, include_sku=include_sku, rank=rank)
+
+    def rebuild(self):
+        self.backend.rebuild()
+
+    # catalog_sync listener
+    def products_changed(self, products):
+        self.backend.index_products(products)
+
+    def product_removed(self, product_id):
+        self.backend.remove_product(product_id)
+
+
+product_search = ProductSearch()
@@ -0,0 +1,195 @@
+"""
+In-memory typeahead index for /api/products/suggest
+
+A sorted list of (token, product_id) pairs over title words and SKUs;
+a prefix lookup is two bisects plus a slice, so suggestions never touch the
+database. Matches are ranked by popularity (views + clicks over the last
+SUGGEST_POPULARITY_DAYS days from the analytics rollups), then by title.
+
+Built when a gunicorn worker boots (see gunicorn.conf.py). Like the facet
+index, the worker that handles a product write updates it incrementally via
+utils.catalog_sync; other workers rebuild in the background once the
+products or sections version moves (suggestions carry the section slug), and
+every SUGGEST_POPULARITY_REFRESH seconds to pick up new popularity counts.
+"""
+
+import heapq
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+
+from models import db, Product, ProductImage, Section, AnalyticsRollup
+from utils import catalog_sync
+from utils.index_refresh import RefreshingIndex
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+PREFIX_END = '\uffff'
+
+
+def tokenize(text):
+    return TOKEN_RE.findall((text or '').lower())
+
+
+class ProductSuggest(RefreshingIndex):
+    scopes = ('products', 'sections')
+
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.RLock()
+        self._entries = []      # sorted (token, product_id)
+        self._tokens = {}       # product_id -> tokens it was indexed under
+        self._products = {}     # product_id -> suggestion payload
+        self._popularity = {}
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions['product_suggest'] = self
+        catalog_sync.register(self)
+
+    # Index maintenance
+
+    def _keys_for(self, title, sku):
+        keys = set(tokenize(title))
+        if sku:
+            keys.add(sku.lower())
+        return keys
+
+    def _add(self, product_id, payload, sku):
+        keys = self._keys_for(payload['title'], sku)
+        for key in keys:
+            insort(self._entries, (key, product_id))
+        self._tokens[product_id] = keys
+        self._products[product_id] = payload
+
+    def _remove(self, product_id):
+        for key in self._tokens.pop(product_id, ()):
+            i = bisect_left(self._entries, (key, product_id))
+            if i < len(self._entries) and self._entries[i] == (key, product_id):
+                del self._entries[i]
+        self._products.pop(product_id, None)
+
+    @staticmethod
+    def _payload(product_id, title, slug, price, original_price, is_on_sale, category, image):
+        return {
+            'id': product_id,
+            'title': title,
+            'slug': slug,
+            'price': price,
+            'original_price': original_price,
+            'is_on_sale': is_on_sale,
+            'category': category,
+            'images': [image] if image else []
+        }
+
+    def _build(self):
+        fresh = ProductSuggest()
+        fresh.app = self.app
+        fresh._load_popularity()
+        first_image = db.select(
+            ProductImage.product_id, db.func.min(ProductImage.position).label('position')
+        ).group_by(ProductImage.product_id).subquery()
+        images = dict(db.session.execute(
+            db.select(ProductImage.product_id, ProductImage.url).join(first_image, db.and_(
+                first_image.c.product_id == ProductImage.product_id,
+                first_image.c.position == ProductImage.position
+            ))
+        ).all())
+        rows = db.session.execute(
+            db.select(Product.id, Product.title, Product.slug, Product.sku, Product.price,
+                      Product.original_price, Product.is_on_sale, Section.slug)
+            .join(Section, Section.id == Product.section_id)
+            .where(Product.is_active == True)
+        )
+
+        entries, tokens, products = [], {}, {}
+        for product_id, title, slug, sku, price, original_price, is_on_sale, category in rows:
+            keys = self._keys_for(title, sku)
+            entries.extend((key, product_id) for key in keys)
+            tokens[product_id] = keys
+            products[product_id] = self._payload(
+                product_id, title, slug, price, original_price, is_on_sale, category, images.get(product_id)
+            )
+        entries.sort()
+        fresh._entries, fresh._tokens, fresh._products = entries, tokens, products
+        return fresh
+
+    def _install(self, fresh):
+        self._entries, self._tokens, self._products = fresh._entries, fresh._tokens, fresh._products
+        self._popularity = fresh._popularity
+
+    def _load_popularity(self):
+        days = self.app.config.get('SUGGEST_POPULARITY_DAYS', 30) if self.app else 30
+        since = datetime.utcnow() - timedelta(days=days)
+        self._popularity = dict(db.session.execute(
+            db.select(AnalyticsRollup.dimension_id, db.func.sum(AnalyticsRollup.count))
+            .where(AnalyticsRollup.granularity == 'day', AnalyticsRollup.dimension == 'product',
+                   AnalyticsRollup.bucket_start >= since)
+            .group_by(AnalyticsRollup.dimension_id)
+        ).all())
+
+    def _current_version(self):
+        refresh = self.app.config.get('SUGGEST_POPULARITY_REFRESH', 600) if self.app else 600
+        return super()._current_version() + (int(time.time() // refresh),)
+
+    # Lookup
+
+    def _prefix_ids(self, prefix):
+        start = bisect_left(self._entries, (prefix,))
+        end = bisect_left(self._entries, (prefix + PREFIX_END,))
+        return {product_id for _, product_id in self._entries[start:end]}
+
+    def suggest(self, query, limit=8):
+        """Top `limit` products whose title words / SKU start with every query token"""
+        tokens = tokenize(query)[:5]
+        if not tokens:
+            return []
+        with self._lock:
+            self._ensure_fresh()
+            candidates = None
+            for token in sorted(tokens, key=len, reverse=True):
+                ids = self._prefix_ids(token)
+                candidates = ids if candidates is None else candidates & ids
+                if not candidates:
+                    return []
+            popularity, products = self._popularity, self._products
+            best = heapq.nsmallest(
+                limit, candidates, key=lambda pid: (-popularity.get(pid, 0), products[pid]['title'])
+            )
+            return [products[product_id] for product_id in best]
+
+    def lookup(self, product_ids):
+        """Suggestion payloads for ids (e.g. fuzzy matches), skipping unknown ones"""
+        with self._lock:
+            self._ensure_fresh()
+            return [self._products[product_id] for product_id in product_ids if product_id in self._products]
+
+    # catalog_sync listeners
+
+    def products_changed(self, products):
+        with self._lock:
+            if self._version is None:
+                return
+            version = self._version
+            for product in products:
+                self._remove(product.id)
+                if product.is_active:
+                    images = product.images
+                    self._add(product.id, self._payload(
+                        product.id, product.title, product.slug, product.price, product.original_price,
+                        product.is_on_sale, product.section.slug if product.section else None,
+                        images[0] if images else None
+                    ), product.sku)
+            self._adopt_version(version)
+
+    def product_removed(self, product_id):
+        with self._lock:
+            if self._version is None:
+                return
+            version = self._version
+            self._remove(product_id)
+            self._adopt_version(version)
+
+
+product_suggest = ProductSuggest()
@@ -0,0 +1,60 @@
+"""
+Per-request SQL query counting and query budgets for hot endpoints
+
+`query_budget(n)` wraps a view and checks how many statements it issued.
+Over budget, it raises QueryBudgetExceeded when QUERY_BUDGET_STRICT is on
+(tests) and logs a warning otherwise, so N+1 regressions on listing
+endpoints fail loudly instead of silently scaling with page size.
+"""
+
+from functools import wraps
+
+from flask import current_app, g, has_app_context
+from sqlalchemy import event
+
+from models import db
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    if has_app_context():
+        g._query_count = g.get('_query_count', 0) + 1
+
+
+def init_app(app):
+    """Count statements on the app's engine; optionally expose X-Query-Count"""
+    with app.app_context():
+        if not event.contains(db.engine, 'before_cursor_execute', _count_query):
+            event.listen(db.engine, 'before_cursor_execute', _count_query)
+
+    if app.config.get('QUERY_COUNT_HEADER'):
+        @app.after_request
+        def add_query_count_header(response):
+            response.headers['X-Query-Count'] = str(query_count())
+            return response
+
+
+def query_count():
+    """Statements issued so far in the current app/request context"""
+    return g.get('_query_count', 0) if has_app_context() else 0
+
+
+def query_budget(max_queries):
+    """Fail (strict) or warn when the wrapped view issues more than max_queries"""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            before = query_count()
+            result = fn(*args, **kwargs)
+            used = query_count() - before
+            if used > max_queries:
+                message = f'{fn.__name__} issued {used} queries (budget {max_queries})'
+                if current_app.config.get('QUERY_BUDGET_STRICT'):
+                    raise QueryBudgetExceeded(message)
+                current_app.logger.warning(message)
+            return result
+        return wrapper
+    return decorator
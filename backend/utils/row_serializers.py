@@ -0,0 +1,88 @@
+"""
+Compiled row serializers for read-only listings
+
+A RowSerializer is built once per schema (a list of output key -> column).
+It generates and compiles a plain function `serialize(row)` returning a dict
+literal that indexes straight into the result tuple (`{'id': row[0], ...}`),
+with datetimes converted inline. Listings select `serializer.columns` and
+map the rows, so no ORM instances, identity-map bookkeeping or lazy loads are
+involved. The output matches the models' `to_dict()`.
+
+Columns listed as `hidden` are selected but not emitted (foreign keys used
+to stitch related rows together, paging keys); read them as `row.<name>`.
+"""
+
+from models import db, User, Address, Order, OrderItem, PaymentDetail
+
+
+def _iso(value):
+    return value.isoformat() if value is not None else None
+
+
+class RowSerializer:
+    def __init__(self, name, fields, constants=None, hidden=()):
+        """fields: [(key, column)]; constants: {key: value}; hidden: [(label, column)]"""
+        self.name = name
+        self.columns = []
+        positions = {}
+
+        def position(label, column):
+            if id(column) not in positions:
+                positions[id(column)] = len(self.columns)
+                self.columns.append(column.label(label))
+            return positions[id(column)]
+
+        entries = []
+        for key, column in fields:
+            value = f"row[{position(key, column)}]"
+            if isinstance(column.type, db.DateTime):
+                value = f"_iso({value})"
+            entries.append(f"{key!r}: {value}")
+        entries += [f"{key!r}: {value!r}" for key, value in (constants or {}).items()]
+        for label, column in hidden:
+            position(label, column)
+
+        self.source = f"def serialize(row):\n    return {{{', '.join(entries)}}}\n"
+        namespace = {'_iso': _iso}
+        exec(compile(self.source, f"<{name} serializer>", 'exec'), namespace)
+        self.serialize = namespace['serialize']
+
+    @classmethod
+    def for_model(cls, model, keys, hidden=(), **kwargs):
+        return cls(
+            model.__name__, [(key, getattr(model, key)) for key in keys],
+            hidden=[(key, getattr(model, key)) for key in hidden], **kwargs
+        )
+
+    def select(self):
+        return db.select(*self.columns)
+
+    def many(self, rows):
+        return list(map(self.serialize, rows))
+
+
+USER_KEYS = ('id', 'name', 'email', 'phone', 'role', 'is_active', 'is_verified', 'email_verified_at',
+             'created_at', 'updated_at')
+
+user_row = RowSerializer.for_model(User, USER_KEYS)
+user_row_sensitive = RowSerializer.for_model(User, USER_KEYS + ('last_login_at', 'login_count'))
+address_row = RowSerializer.for_model(
+    Address, ('id', 'full_name', 'phone', 'address_line1', 'address_line2', 'city', 'state', 'pincode', 'is_default'),
+    hidden=('user_id', 'created_at')
+)
+payment_detail_row = RowSerializer.for_model(
+    PaymentDetail, ('id', 'payment_method', 'card_number_last4', 'card_holder_name', 'card_expiry_month',
+                    'card_expiry_year', 'upi_id', 'upi_name'),
+    hidden=('order_id',)
+)
+order_item_row = RowSerializer.for_model(
+    OrderItem, ('id', 'product_id', 'quantity', 'price', 'size', 'color'), hidden=('order_id',)
+)
+order_row = RowSerializer(
+    'Order',
+    [(key, getattr(Order, key)) for key in ('id', 'order_number', 'receipt_number', 'total_amount', 'status',
+                                             'payment_method', 'payment_status', 'created_at', 'updated_at')]
+    + [('subtotal', Order.total_amount)],  # For now, same as total
+    constants={'shipping_cost': 0.00},  # Free shipping
+    hidden=[('user_id', Order.user_id), ('address_id', Order.address_id)]
+)
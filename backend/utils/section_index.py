@@ -0,0 +1,60 @@
+"""
+In-process section map keyed on the catalog version
+
+Sections change rarely but are looked up by slug on every catalog request.
+The index holds serialized sections (with product counts, all in one grouped
+query) and reloads itself whenever the catalog version changes, i.e. after
+any section or product write (see utils.catalog_sync). The returned dicts
+are shared between requests and must not be mutated.
+"""
+
+import threading
+
+from models import db, Product, Section
+from utils.catalog_cache import catalog_cache
+
+
+class SectionIndex:
+    def __init__(self):
+        self._version = None
+        self._by_slug = {}
+        self._by_id = {}
+        self._ordered = []
+        self._lock = threading.Lock()
+
+    def _snapshot(self):
+        version = catalog_cache.version()
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    self._load(version)
+        return self._by_slug, self._by_id, self._ordered
+
+    def _load(self, version):
+        rows = db.session.query(Section, db.func.count(Product.id)).outerjoin(
+            Product, Product.section_id == Section.id
+        ).group_by(Section.id).order_by(Section.display_order, Section.id).all()
+        ordered = [section.to_dict(product_count=count) for section, count in rows]
+        self._by_slug = {section['slug']: section for section in ordered}
+        self._by_id = {section['id']: section for section in ordered}
+        self._ordered = ordered
+        self._version = version
+
+    def get(self, slug, active_only=True):
+        """Serialized section for slug, or None"""
+        section = self._snapshot()[0].get(slug)
+        if section is None or (active_only and not section['is_active']):
+            return None
+        return section
+
+    def get_by_id(self, section_id):
+        """Serialized section for id (active or not), or None"""
+        return self._snapshot()[1].get(section_id)
+
+    def all(self, active_only=True):
+        """Serialized sections ordered by display_order"""
+        ordered = self._snapshot()[2]
+        return [section for section in ordered if section['is_active']] if active_only else list(ordered)
+
+
+section_index = SectionIndex()
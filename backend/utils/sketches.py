@@ -0,0 +1,176 @@
+"""
+Mergeable probabilistic sketches for analytics
+
+HyperLogLog estimates distinct counts (unique visitors) and a count-min
+sketch with a bounded candidate heap tracks the heaviest keys (top products,
+top search terms). Both use fixed memory, serialize to compact bytes and
+merge losslessly, so per-worker deltas and per-day sketches can be combined.
+"""
+
+import hashlib
+import heapq
+import json
+import math
+import struct
+import zlib
+from array import array
+
+
+def _hash64(value):
+    return int.from_bytes(hashlib.blake2b(str(value).encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+class HyperLogLog:
+    """Distinct-count estimator with 2**precision one-byte registers"""
+
+    def __init__(self, precision=14):
+        self.precision = precision
+        self.m = 1 << precision
+        self.registers = bytearray(self.m)
+
+    def add(self, value):
+        h = _hash64(value)
+        index = h >> (64 - self.precision)
+        remainder = (h << self.precision) & 0xFFFFFFFFFFFFFFFF
+        rank = min(64 - self.precision, 64 - remainder.bit_length()) + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError('Cannot merge HyperLogLogs with different precision')
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def count(self):
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Small-range correction (linear counting)
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def is_empty(self):
+        return not any(self.registers)
+
+    def to_bytes(self):
+        return struct.pack('>B', self.precision) + zlib.compress(bytes(self.registers))
+
+    @classmethod
+    def from_bytes(cls, data):
+        sketch = cls(struct.unpack('>B', data[:1])[0])
+        sketch.registers = bytearray(zlib.decompress(data[1:]))
+        return sketch
+
+
+class CountMinSketch:
+    """Frequency estimator that never under-counts; error bounded by width"""
+
+    def __init__(self, width=2048, depth=4):
+        self.width = width
+        self.depth = depth
+        self.table = array('I', bytes(4 * width * depth))
+
+    def _cells(self, key):
+        digest = hashlib.blake2b(str(key).encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'big')
+        h2 = int.from_bytes(digest[8:], 'big') | 1
+        return [row * self.width + (h1 + row * h2) % self.width for row in range(self.depth)]
+
+    def add(self, key, amount=1):
+        """Add to a key and return its new estimate"""
+        table = self.table
+        estimate = None
+        for cell in self._cells(key):
+            table[cell] += amount
+            if estimate is None or table[cell] < estimate:
+                estimate = table[cell]
+        return estimate
+
+    def estimate(self, key):
+        return min(self.table[cell] for cell in self._cells(key))
+
+    def merge(self, other):
+        if (other.width, other.depth) != (self.width, self.depth):
+            raise ValueError('Cannot merge count-min sketches with different dimensions')
+        self.table = array('I', map(int.__add__, self.table, other.table))
+        return self
+
+    def to_bytes(self):
+        return struct.pack('>II', self.width, self.depth) + zlib.compress(self.table.tobytes())
+
+    @classmethod
+    def from_bytes(cls, data):
+        width, depth = struct.unpack('>II', data[:8])
+        sketch = cls(width, depth)
+        sketch.table = array('I')
+        sketch.table.frombytes(zlib.decompress(data[8:]))
+        return sketch
+
+
+class TopK:
+    """Heavy hitters: count-min sketch plus a min-heap of the k best candidates"""
+
+    def __init__(self, k=50, width=2048, depth=4):
+        self.k = k
+        self.cms = CountMinSketch(width, depth)
+        self.candidates = {}
+        self._heap = []
+
+    def add(self, key, amount=1):
+        estimate = self.cms.add(key, amount)
+        if key in self.candidates or len(self.candidates) < self.k:
+            self._track(key, estimate)
+            return
+        # Evict the weakest candidate if the new key now beats it
+        while self._heap:
+            weakest_estimate, weakest = self._heap[0]
+            if self.candidates.get(weakest) != weakest_estimate:
+                heapq.heappop(self._heap)  # stale heap entry
+                continue
+            if estimate > weakest_estimate:
+                heapq.heappop(self._heap)
+                del self.candidates[weakest]
+                self._track(key, estimate)
+            break
+
+    def _track(self, key, estimate):
+        self.candidates[key] = estimate
+        heapq.heappush(self._heap, (estimate, key))
+        if len(self._heap) > 4 * self.k:
+            self._heap = [(e, key) for key, e in self.candidates.items()]
+            heapq.heapify(self._heap)
+
+    def top(self, n=None):
+        ranked = sorted(self.candidates.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:n] if n else ranked
+
+    def merge(self, other):
+        self.cms.merge(other.cms)
+        keys = set(self.candidates) | set(other.candidates)
+        estimates = sorted(((self.cms.estimate(key), key) for key in keys), reverse=True)[:self.k]
+        self.candidates = {key: estimate for estimate, key in estimates}
+        self._heap = [(estimate, key) for key, estimate in self.candidates.items()]
+        heapq.heapify(self._heap)
+        return self
+
+    def is_empty(self):
+        return not self.candidates
+
+    def to_bytes(self):
+        header = json.dumps({'k': self.k, 'candidates': list(self.candidates)}).encode('utf-8')
+        return struct.pack('>I', len(header)) + header + self.cms.to_bytes()
+
+    @classmethod
+    def from_bytes(cls, data):
+        (header_length,) = struct.unpack('>I', data[:4])
+        header = json.loads(data[4:4 + header_length])
+        sketch = cls(header['k'])
+        sketch.cms = CountMinSketch.from_bytes(data[4 + header_length:])
+        for key in header['candidates']:
+            sketch.candidates[key] = sketch.cms.estimate(key)
+        sketch._heap = [(estimate, key) for key, estimate in sketch.candidates.items()]
+        heapq.heapify(sketch._heap)
+        return sketch
@@ -0,0 +1,63 @@
+"""
+Per-user version counters for conditional GETs on account resources
+
+Every cart, wishlist and address write bumps the matching counter on the
+user row in the same transaction. `conditional(resource)` turns the counter
+into a weak ETag, so a matching If-None-Match gets a 304 after one primary-key
+lookup instead of the full query and serialization. Cart and wishlist
+embed product data, so their tags also include the catalog version.
+"""
+
+from functools import wraps
+
+from flask import g, make_response, request
+from flask_jwt_extended import get_jwt_identity
+
+from models import db, User
+from utils.catalog_cache import catalog_cache
+
+VERSION_COLUMNS = {
+    'cart': User.cart_version,
+    'wishlist': User.wishlist_version,
+    'addresses': User.address_version,
+}
+
+
+def bump(user_id, resource):
+    """Increment the user's counter; commits with the caller's transaction"""
+    column = VERSION_COLUMNS[resource]
+    # Keep updated_at for profile changes rather than every cart edit
+    db.session.execute(
+        db.update(User).where(User.id == user_id).values({column: column + 1, User.updated_at: User.updated_at})
+    )
+
+
+def current_version(user_id, resource):
+    return db.session.execute(
+        db.select(VERSION_COLUMNS[resource]).where(User.id == user_id)
+    ).scalar() or 0
+
+
+def conditional(resource, include_catalog=False):
+    """Weak ETag / 304 for a JWT-protected GET view (place under @jwt_required)"""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            user_id = int(get_jwt_identity())
+            tag = f"{resource}-{user_id}-{current_version(user_id, resource)}"
+            if include_catalog:
+                tag = f"{tag}-{catalog_cache.version()}"
+            # Views can key their own caches on the validator
+            g.user_version_tag = tag
+
+            if request.if_none_match.contains_weak(tag):
+                response = make_response('', 304)
+            else:
+                response = make_response(fn(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(tag, weak=True)
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return wrapper
+    return decorator
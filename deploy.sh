@@ -59,6 +59,11 @@ print_info "Installing Python dependencies..."
 pip install -r requirements.txt --quiet
 print_success "Python dependencies updated"
 
+# Schema migrations first: init_db.py queries the current models
+print_info "Applying schema migrations..."
+python migrate.py
+print_success "Schema migrations applied"
+
 # Run database migrations if needed
 if [ -f "init_db.py" ]; then
     print_info "Running database migrations..."
@@ -4,17 +4,12 @@ import { useAnalyticsStore } from '../stores/analyticsStore';
 
 const Footer = () => {
     const currentYear = new Date().getFullYear();
-    const { views, clicks, fetchAnalytics, incrementClick } = useAnalyticsStore();
+    const { views, clicks, pollAnalytics, incrementClick } = useAnalyticsStore();
 
     useEffect(() => {
-        // Fetch analytics on mount
-        fetchAnalytics();
-        
-        // Poll every 5 seconds for real-time updates
-        const interval = setInterval(fetchAnalytics, 5000);
-        
-        return () => clearInterval(interval);
-    }, [fetchAnalytics]);
+        // Cheap conditional polling; no long-lived connection per tab
+        return pollAnalytics();
+    }, [pollAnalytics]);
 
     const handleLinkClick = () => {
         incrementClick();
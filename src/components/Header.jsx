@@ -10,9 +10,16 @@ const Header = ({ onCartClick }) => {
     const [isMenuOpen, setIsMenuOpen] = useState(false);
     const [isSearchOpen, setIsSearchOpen] = useState(false);
     const cartItemCount = useCartStore((state) => state.getItemCount());
+    const fetchCartSummary = useCartStore((state) => state.fetchSummary);
     const { isAuthenticated } = useAuthStore();
     const wishlistCount = useWishlistStore((state) => state.items.length);
 
+    useEffect(() => {
+        if (isAuthenticated) {
+            fetchCartSummary();
+        }
+    }, [isAuthenticated, fetchCartSummary]);
+
     const [categories, setCategories] = useState([]);
 
     useEffect(() => {
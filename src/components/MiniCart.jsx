@@ -8,6 +8,7 @@ const MiniCart = ({ isOpen, onClose }) => {
     const removeItem = useCartStore((state) => state.removeItem);
     const updateQuantity = useCartStore((state) => state.updateQuantity);
     const getTotal = useCartStore((state) => state.getTotal);
+    const flushOperations = useCartStore((state) => state.flushOperations);
 
     return (
         <AnimatePresence>
@@ -137,7 +138,7 @@ const MiniCart = ({ isOpen, onClose }) => {
                                     </Link>
                                     <Link
                                         to="/checkout"
-                                        onClick={onClose}
+                                        onClick={() => { flushOperations(); onClose(); }}
                                         className="btn-primary text-center text-sm"
                                     >
                                         Checkout
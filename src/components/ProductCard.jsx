@@ -3,6 +3,7 @@ import { Link } from 'react-router-dom';
 import { useCartStore } from '../stores/cartStore';
 import { useWishlistStore } from '../stores/wishlistStore';
 import { useToast } from '../stores/toastStore';
+import { useAnalyticsStore } from '../stores/analyticsStore';
 import { formatPrice } from '../utils/priceFormatter';
 import { motion } from 'framer-motion';
 
@@ -45,7 +46,14 @@ const ProductCard = ({ product }) => {
             transition={{ duration: 0.4 }}
             className="group h-full"
         >
-            <Link to={`/product/${product.slug}`} className="block h-full">
+            <Link
+                to={`/product/${product.slug}`}
+                className="block h-full"
+                onClick={() => useAnalyticsStore.getState().trackEvent('click', {
+                    productId: product.id,
+                    sectionId: product.section_id
+                })}
+            >
                 {/* Card Container - Fixed height structure */}
                 <div className="relative bg-white rounded-3xl overflow-hidden shadow-sm hover:shadow-2xl transition-all duration-500 border border-neutral-100 h-full flex flex-col">
 
@@ -27,8 +27,8 @@ export default function SearchModal({ isOpen, onClose }) {
 
             setLoading(true);
             try {
-                const response = await api.getProducts({ search: searchQuery, limit: 8 });
-                setResults(response.products || []);
+                const response = await api.suggestProducts(searchQuery.trim(), 8);
+                setResults(response.suggestions || []);
             } catch (error) {
                 console.error('Search error:', error);
                 setResults([]);
@@ -37,7 +37,8 @@ export default function SearchModal({ isOpen, onClose }) {
             }
         };
 
-        const debounceTimer = setTimeout(searchProducts, 300);
+        // Suggestions come from an in-memory index, so a short debounce is enough
+        const debounceTimer = setTimeout(searchProducts, 150);
         return () => clearTimeout(debounceTimer);
     }, [searchQuery]);
 
@@ -150,7 +151,7 @@ export default function SearchModal({ isOpen, onClose }) {
                                         </div>
                                         <div className="flex-1 min-w-0">
                                             <h3 className="font-semibold text-neutral-900 truncate">{product.title}</h3>
-                                            <p className="text-sm text-neutral-500 truncate">{product.description}</p>
+                                            <p className="text-sm text-neutral-500 truncate capitalize">{product.category}</p>
                                             <div className="flex items-center gap-2 mt-1">
                                                 <span className="text-primary-600 font-bold">{formatPrice(product.price)}</span>
                                                 {product.is_on_sale && product.original_price && (
@@ -105,6 +105,8 @@ export const API_CONFIG = {
       FEATURED: '/products/featured',
       NEW_ARRIVALS: '/products/new-arrivals',
       SEARCH: '/products/search',
+      BATCH: '/products/batch',
+      SUGGEST: '/products/suggest',
     },
     
     // Categories/Sections
@@ -120,6 +122,9 @@ export const API_CONFIG = {
       BY_ID: (id) => `/cart/${id}`,
       CLEAR: '/cart/clear',
       COUNT: '/cart/count',
+      SUMMARY: '/cart/summary',
+      GUEST: '/cart/guest',
+      MERGE: '/cart/merge',
     },
     
     // Wishlist
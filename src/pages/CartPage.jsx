@@ -1,3 +1,4 @@
+import { useEffect } from 'react';
 import { Link } from 'react-router-dom';
 import { useCartStore } from '../stores/cartStore';
 import { formatPrice } from '../utils/priceFormatter';
@@ -9,6 +10,12 @@ const CartPage = () => {
     const updateQuantity = useCartStore((state) => state.updateQuantity);
     const getTotal = useCartStore((state) => state.getTotal);
     const clearCart = useCartStore((state) => state.clearCart);
+    const flushOperations = useCartStore((state) => state.flushOperations);
+    const refreshProducts = useCartStore((state) => state.refreshProducts);
+
+    useEffect(() => {
+        refreshProducts();
+    }, [refreshProducts]);
 
     if (items.length === 0) {
         return (
@@ -124,7 +131,7 @@ const CartPage = () => {
                                     <span className="text-xl font-bold text-primary-600">{formatPrice(getTotal())}</span>
                                 </div>
                             </div>
-                            <Link to="/checkout" className="btn-primary w-full text-center block mb-4">Proceed to Checkout</Link>
+                            <Link to="/checkout" onClick={flushOperations} className="btn-primary w-full text-center block mb-4">Proceed to Checkout</Link>
                             <Link to="/" className="btn-secondary w-full text-center block">Continue Shopping</Link>
                         </div>
                     </div>
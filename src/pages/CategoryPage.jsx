@@ -10,6 +10,11 @@ const CategoryPage = () => {
     const [loading, setLoading] = useState(true);
     const [sortBy, setSortBy] = useState('default');
     const [priceRange, setPriceRange] = useState('all');
+    const [selectedSizes, setSelectedSizes] = useState([]);
+    const [selectedColors, setSelectedColors] = useState([]);
+    const [onSaleOnly, setOnSaleOnly] = useState(false);
+    const [inStockOnly, setInStockOnly] = useState(false);
+    const [facets, setFacets] = useState(null);
 
     const [category, setCategory] = useState({
         name: 'Products',
@@ -21,17 +26,26 @@ const CategoryPage = () => {
         const fetchCategoryProducts = async () => {
             setLoading(true);
             try {
-                // Prepare filters
-                // Backend supports: page, per_page.
-                // For sorting and price filtering, we might need to do client-side OR update backend.
-                // Current backend only supports 'section' filter on get_products, OR get_products_by_category.
-                // get_products_by_category returns products and section info.
-
-                const response = await api.getProductsByCategory(slug, {
+                // Filters run on the backend, which also returns facet counts for them
+                const params = {
                     // We can pass page/per_page here if we want pagination
-                });
+                    fields: 'card',
+                    facets: 1,
+                    size: selectedSizes.join(','),
+                    color: selectedColors.join(','),
+                    on_sale: onSaleOnly ? 1 : '',
+                    in_stock: inStockOnly ? 1 : '',
+                };
+                if (priceRange !== 'all') {
+                    const [min, max] = priceRange.split('-');
+                    params.min_price = min;
+                    params.max_price = max;
+                }
+
+                const response = await api.getProductsByCategory(slug, params);
 
                 let fetchedProducts = response.products || [];
+                setFacets(response.facets || null);
                 const sectionData = response.section;
 
                 if (sectionData) {
@@ -48,16 +62,6 @@ const CategoryPage = () => {
                     });
                 }
 
-                // Client-side filtering/sorting for now since backend relies on basics
-                if (priceRange !== 'all') {
-                    const [min, max] = priceRange.split('-').map(Number);
-                    fetchedProducts = fetchedProducts.filter(p => {
-                        const price = p.price || 0;
-                        if (max) return price >= min && price <= max;
-                        return price >= min;
-                    });
-                }
-
                 switch (sortBy) {
                     case 'price-low':
                         fetchedProducts.sort((a, b) => a.price - b.price);
@@ -83,7 +87,13 @@ const CategoryPage = () => {
         };
 
         fetchCategoryProducts();
-    }, [slug, sortBy, priceRange]);
+    }, [slug, sortBy, priceRange, selectedSizes, selectedColors, onSaleOnly, inStockOnly]);
+
+    const toggleValue = (setter) => (value) =>
+        setter((values) => values.includes(value) ? values.filter((v) => v !== value) : [...values, value]);
+    const toggleSize = toggleValue(setSelectedSizes);
+    const toggleColor = toggleValue(setSelectedColors);
+    const priceCount = (range) => facets?.price?.[range] !== undefined ? ` (${facets.price[range]})` : '';
 
     return (
         <div className="min-h-screen bg-neutral-50">
@@ -121,10 +131,10 @@ const CategoryPage = () => {
                             className="bg-neutral-50 border border-neutral-200 rounded-lg px-4 py-2 text-neutral-700 text-sm focus:outline-none focus:border-primary-400 focus:ring-2 focus:ring-primary-100"
                         >
                             <option value="all">All Prices</option>
-                            <option value="0-500">Under ₹500</option>
-                            <option value="500-1000">₹500 - ₹1000</option>
-                            <option value="1000-5000">₹1000 - ₹5000</option>
-                            <option value="5000-">Above ₹5000</option>
+                            <option value="0-500">Under ₹500{priceCount('0-500')}</option>
+                            <option value="500-1000">₹500 - ₹1000{priceCount('500-1000')}</option>
+                            <option value="1000-5000">₹1000 - ₹5000{priceCount('1000-5000')}</option>
+                            <option value="5000-">Above ₹5000{priceCount('5000-')}</option>
                         </select>
 
                         <select
@@ -140,6 +150,38 @@ const CategoryPage = () => {
                     </div>
                 </div>
 
+                {/* Facet filters with counts */}
+                {facets && (
+                    <div className="flex flex-wrap items-center gap-2 mb-8">
+                        {Object.entries(facets.size || {}).map(([size, count]) => (
+                            <button
+                                key={`size-${size}`}
+                                onClick={() => toggleSize(size)}
+                                className={`px-3 py-1 rounded-full text-sm border transition-colors ${selectedSizes.includes(size) ? 'bg-primary-500 text-white border-primary-500' : 'bg-white text-neutral-700 border-neutral-200 hover:border-primary-400'}`}
+                            >
+                                {size} ({count})
+                            </button>
+                        ))}
+                        {Object.entries(facets.color || {}).map(([color, count]) => (
+                            <button
+                                key={`color-${color}`}
+                                onClick={() => toggleColor(color)}
+                                className={`px-3 py-1 rounded-full text-sm border transition-colors ${selectedColors.includes(color) ? 'bg-primary-500 text-white border-primary-500' : 'bg-white text-neutral-700 border-neutral-200 hover:border-primary-400'}`}
+                            >
+                                {color} ({count})
+                            </button>
+                        ))}
+                        <label className="flex items-center gap-2 text-sm text-neutral-700 ml-2">
+                            <input type="checkbox" checked={onSaleOnly} onChange={(e) => setOnSaleOnly(e.target.checked)} />
+                            On sale ({facets.on_sale})
+                        </label>
+                        <label className="flex items-center gap-2 text-sm text-neutral-700">
+                            <input type="checkbox" checked={inStockOnly} onChange={(e) => setInStockOnly(e.target.checked)} />
+                            In stock ({facets.in_stock})
+                        </label>
+                    </div>
+                )}
+
                 <ProductGrid products={filteredProducts} loading={loading} />
             </div>
         </div>
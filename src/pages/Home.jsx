@@ -15,7 +15,7 @@ const Home = () => {
             setLoading(true);
             try {
                 const [productsData, sectionsData] = await Promise.all([
-                    api.getFeaturedProducts(8),
+                    api.getFeaturedProducts(8, 'card'),
                     api.getSections()
                 ]);
 
@@ -7,6 +7,7 @@ import { formatPrice } from '../utils/priceFormatter';
 import ProductGrid from '../components/ProductGrid';
 import { motion } from 'framer-motion';
 import { api } from '../utils/api';
+import { useAnalyticsStore } from '../stores/analyticsStore';
 
 const ProductPage = () => {
     const { slug } = useParams();
@@ -53,6 +54,10 @@ const ProductPage = () => {
 
                     setProduct(productData);
                     setSelectedSize(productData.sizes?.[0] || null);
+                    useAnalyticsStore.getState().trackEvent('view', {
+                        productId: productData.id,
+                        sectionId: productData.section_id
+                    });
 
                     // Fetch relatedproducts
                     if (productData.category || productData.section_id) {
@@ -65,7 +70,7 @@ const ProductPage = () => {
                         // Or just fetch some products.
                         try {
                             // Assuming productData has section info or I can fetch generic products
-                            const relatedRes = await api.getProducts({ limit: 4 });
+                            const relatedRes = await api.getProducts({ per_page: 5, fields: 'card' });
                             // Ideally we filter by category, but for now just show some.
                             setRelatedProducts(relatedRes.products.filter(p => p.id !== productData.id).slice(0, 4));
                         } catch (err) {
@@ -1,3 +1,4 @@
+import { useEffect } from 'react';
 import { Link } from 'react-router-dom';
 import { useWishlistStore } from '../stores/wishlistStore';
 import { useCartStore } from '../stores/cartStore';
@@ -9,9 +10,14 @@ const WishlistPage = () => {
     const items = useWishlistStore((state) => state.items);
     const removeItem = useWishlistStore((state) => state.removeItem);
     const clearWishlist = useWishlistStore((state) => state.clearWishlist);
+    const refreshProducts = useWishlistStore((state) => state.refreshProducts);
     const addToCart = useCartStore((state) => state.addItem);
     const { showSuccess } = useToast();
 
+    useEffect(() => {
+        refreshProducts();
+    }, [refreshProducts]);
+
     const handleAddToCart = (product) => {
         if (product.stock > 0) {
             addToCart(product, 1);
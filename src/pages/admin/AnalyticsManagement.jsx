@@ -4,16 +4,14 @@ import { useAnalyticsStore } from '../../stores/analyticsStore';
 import { useAdminAuthStore } from '../../stores/adminAuthStore';
 
 export default function AnalyticsManagement() {
-    const { views, clicks, fetchAnalytics, updateAnalytics, loading } = useAnalyticsStore();
+    const { views, clicks, subscribeAnalytics, updateAnalytics, loading } = useAnalyticsStore();
     const { accessToken } = useAdminAuthStore();
     const [editViews, setEditViews] = useState(0);
     const [editClicks, setEditClicks] = useState(0);
 
     useEffect(() => {
-        fetchAnalytics();
-        const interval = setInterval(fetchAnalytics, 3000); // Poll every 3 seconds
-        return () => clearInterval(interval);
-    }, [fetchAnalytics]);
+        return subscribeAnalytics(); // Server pushes count changes
+    }, [subscribeAnalytics]);
 
     useEffect(() => {
         setEditViews(views);
@@ -149,7 +147,7 @@ export default function AnalyticsManagement() {
                         <ul className="text-sm text-blue-800 space-y-1">
                             <li>• Views are automatically incremented when users visit the website</li>
                             <li>• Clicks are tracked when users click on footer links</li>
-                            <li>• Analytics update in real-time (refreshes every 3 seconds)</li>
+                            <li>• Analytics update in real-time (pushed by the server as counts change)</li>
                             <li>• You can manually set any value using the form above</li>
                         </ul>
                     </div>
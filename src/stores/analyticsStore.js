@@ -1,12 +1,54 @@
 import { create } from 'zustand';
 import { API_CONFIG } from '../config/api.config';
 
+// Footer counters refresh this often while the tab is visible
+const ANALYTICS_POLL_INTERVAL = 30000;
+
+// Per-product/section events are queued and sent in batches
+const EVENT_FLUSH_DELAY = 5000;
+const EVENT_MAX_BATCH = 50;
+let eventQueue = [];
+let eventTimer = null;
+
+const flushEvents = () => {
+    clearTimeout(eventTimer);
+    eventTimer = null;
+    if (eventQueue.length === 0) return;
+
+    const url = `${API_CONFIG.API_URL}/analytics/events`;
+    while (eventQueue.length > 0) {
+        const body = JSON.stringify({ events: eventQueue.splice(0, EVENT_MAX_BATCH) });
+        if (!(navigator.sendBeacon && navigator.sendBeacon(url, body))) {
+            fetch(url, { method: 'POST', body, keepalive: true }).catch(() => {});
+        }
+    }
+};
+
+if (typeof window !== 'undefined') {
+    window.addEventListener('pagehide', flushEvents);
+}
+
+// Anonymous, browser-local id used only for unique-visitor counting
+const getVisitorId = () => {
+    try {
+        let visitorId = localStorage.getItem('peckup-visitor-id');
+        if (!visitorId) {
+            visitorId = crypto.randomUUID ? crypto.randomUUID() : `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+            localStorage.setItem('peckup-visitor-id', visitorId);
+        }
+        return visitorId;
+    } catch {
+        return null;
+    }
+};
+
 export const useAnalyticsStore = create((set, get) => ({
     views: 0,
     clicks: 0,
     loading: false,
 
-    // Fetch current analytics
+    // Fetch current analytics (the browser revalidates with the ETag, so
+    // unchanged counts come back as a cheap 304)
     fetchAnalytics: async () => {
         try {
             const response = await fetch(`${API_CONFIG.API_URL}/analytics`);
@@ -17,11 +59,59 @@ export const useAnalyticsStore = create((set, get) => ({
         }
     },
 
-    // Increment view count
+    // Poll the counts while the tab is visible; returns a stop function.
+    // Unchanged counts revalidate to a 304 via the ETag, and polling holds no
+    // server thread between requests (unlike one SSE stream per open tab).
+    pollAnalytics: (intervalMs = ANALYTICS_POLL_INTERVAL) => {
+        const poll = () => {
+            if (document.visibilityState === 'visible') {
+                get().fetchAnalytics();
+            }
+        };
+        poll();
+        const interval = setInterval(poll, intervalMs);
+        document.addEventListener('visibilitychange', poll);
+        return () => {
+            clearInterval(interval);
+            document.removeEventListener('visibilitychange', poll);
+        };
+    },
+
+    // Admin dashboard: pushed count changes; returns an unsubscribe function.
+    // Falls back to polling where EventSource is unavailable or the server
+    // refuses the stream (503 once a worker's stream cap is reached).
+    subscribeAnalytics: () => {
+        if (typeof EventSource === 'undefined') {
+            return get().pollAnalytics(5000);
+        }
+
+        let stopPolling = null;
+        const source = new EventSource(`${API_CONFIG.API_URL}/analytics/stream`);
+        source.addEventListener('analytics', (event) => {
+            try {
+                const data = JSON.parse(event.data);
+                set({ views: data.views || 0, clicks: data.clicks || 0 });
+            } catch (error) {
+                console.error('Failed to parse analytics event:', error);
+            }
+        });
+        source.addEventListener('error', () => {
+            if (source.readyState === EventSource.CLOSED && !stopPolling) {
+                stopPolling = get().pollAnalytics(5000);
+            }
+        });
+        return () => {
+            source.close();
+            if (stopPolling) stopPolling();
+        };
+    },
+
+    // Increment view count (the visitor id feeds the unique-visitor estimate)
     incrementView: async () => {
         try {
             const response = await fetch(`${API_CONFIG.API_URL}/analytics/view`, {
                 method: 'POST',
+                body: JSON.stringify({ visitor_id: getVisitorId() }),
             });
             const data = await response.json();
             set({ views: data.views || get().views + 1 });
@@ -43,6 +133,16 @@ export const useAnalyticsStore = create((set, get) => ({
         }
     },
 
+    // Queue a view/click event for a product or section
+    trackEvent: (type, { productId = null, sectionId = null, section = null } = {}) => {
+        eventQueue.push({ type, product_id: productId, section_id: sectionId, section });
+        if (eventQueue.length >= EVENT_MAX_BATCH) {
+            flushEvents();
+        } else if (!eventTimer) {
+            eventTimer = setTimeout(flushEvents, EVENT_FLUSH_DELAY);
+        }
+    },
+
     // Update analytics (admin only)
     updateAnalytics: async (views, clicks, token) => {
         set({ loading: true });
@@ -3,64 +3,73 @@ import { persist } from 'zustand/middleware';
 import { api } from '../utils/api';
 import { useAuthStore } from './authStore';
 
+// Quantity changes and removals are queued per cart line and sent as one PATCH /api/cart
+const SYNC_DELAY_MS = 400;
+let pendingOperations = new Map();
+// Guest token the queued operations belong to (null: the signed-in user's cart)
+let pendingGuestToken = null;
+let syncTimer = null;
+
+const toLocalItems = (backendItems) => backendItems.map(item => ({
+    ...item.product,
+    id: item.product.id,
+    cartItemId: item.id,
+    quantity: item.quantity,
+    selectedSize: item.size,
+    selectedColor: item.color
+}));
+
 export const useCartStore = create(
     persist(
         (set, get) => ({
             items: [],
+            summary: null,
+            // True once items reflect the cart (fetched, merged or edited in this session)
+            hasLoaded: false,
+            // Server-side cart of a signed-out visitor (see api.addToGuestCart)
+            guestToken: null,
             isLoading: false,
 
-            // Sync cart with backend after login
+            // Header badge: count/subtotal without the full cart payload
+            fetchSummary: async () => {
+                const { isAuthenticated } = useAuthStore.getState();
+                if (!isAuthenticated) return;
+
+                try {
+                    const summary = await api.getCartSummary();
+                    set({ summary });
+                } catch (error) {
+                    console.error('Failed to fetch cart summary:', error);
+                }
+            },
+
+            // After login: merge the guest cart into the user's cart in one call
             syncWithBackend: async () => {
                 const { isAuthenticated } = useAuthStore.getState();
                 if (!isAuthenticated) return;
 
                 try {
                     set({ isLoading: true });
-                    
-                    // Get local items before fetching from backend
-                    const localItems = get().items;
-                    
-                    // Fetch cart from backend
-                    const data = await api.getCart();
-                    
-                    // Transform backend items to local structure
-                    const backendItems = data.items.map(item => ({
-                        ...item.product,
-                        id: item.product.id,
-                        cartItemId: item.id,
-                        quantity: item.quantity,
-                        selectedSize: item.size,
-                        selectedColor: item.color
-                    }));
-                    
-                    // Merge local items with backend items (if user had items before login)
-                    const mergedItems = [...backendItems];
-                    
-                    // Add local items that don't exist in backend
-                    for (const localItem of localItems) {
-                        const existsInBackend = backendItems.some(
-                            item => item.id === localItem.id &&
-                                   item.selectedSize === localItem.selectedSize &&
-                                   item.selectedColor === localItem.selectedColor
-                        );
-                        
-                        if (!existsInBackend) {
-                            // Add to backend
-                            try {
-                                await api.addToCart({
-                                    product_id: localItem.id,
-                                    quantity: localItem.quantity,
-                                    size: localItem.selectedSize,
-                                    color: localItem.selectedColor
-                                });
-                                mergedItems.push(localItem);
-                            } catch (error) {
-                                console.error('Failed to sync local item to backend:', error);
-                            }
-                        }
-                    }
-                    
-                    set({ items: mergedItems, isLoading: false });
+
+                    // Guest edits still waiting for the debounce go to the guest cart first
+                    await get().flushOperations();
+
+                    const { guestToken, items } = get();
+                    // Lines that never reached the server (added offline or before guest carts existed)
+                    const localOnly = items
+                        .filter(item => !item.cartItemId)
+                        .map(item => ({
+                            product_id: item.id,
+                            quantity: item.quantity,
+                            size: item.selectedSize,
+                            color: item.selectedColor
+                        }));
+
+                    const data = guestToken || localOnly.length > 0
+                        ? await api.mergeCart(guestToken, localOnly)
+                        : await api.getCart();
+
+                    set({ items: toLocalItems(data.items), summary: null, hasLoaded: true, guestToken: null, isLoading: false });
                 } catch (error) {
                     console.error('Failed to sync cart with backend:', error);
                     set({ isLoading: false });
@@ -69,7 +78,43 @@ export const useCartStore = create(
 
             // Clear cart (used on logout)
             clearCartOnLogout: () => {
-                set({ items: [] });
+                clearTimeout(syncTimer);
+                pendingOperations = new Map();
+                set({ items: [], summary: null, hasLoaded: false, guestToken: null });
+            },
+
+            queueOperation: (operation) => {
+                const { isAuthenticated } = useAuthStore.getState();
+                const target = isAuthenticated ? null : get().guestToken;
+                if (pendingOperations.size > 0 && target !== pendingGuestToken) {
+                    get().flushOperations();
+                }
+                pendingGuestToken = target;
+                // Later changes to the same line replace earlier ones
+                pendingOperations.set(operation.item_id, operation);
+                clearTimeout(syncTimer);
+                syncTimer = setTimeout(() => get().flushOperations(), SYNC_DELAY_MS);
+            },
+
+            // Send queued changes now (also called before leaving for checkout)
+            flushOperations: async () => {
+                clearTimeout(syncTimer);
+                if (pendingOperations.size === 0) return;
+
+                const operations = [...pendingOperations.values()];
+                const guestToken = pendingGuestToken;
+                pendingOperations = new Map();
+                try {
+                    const data = guestToken
+                        ? await api.patchGuestCart(guestToken, operations)
+                        : await api.patchCart(operations);
+                    // Newer local edits are already queued; keep them instead of the server snapshot
+                    if (pendingOperations.size === 0) {
+                        set({ items: toLocalItems(data.items), summary: null, hasLoaded: true });
+                    }
+                } catch (error) {
+                    console.error('Failed to sync cart changes:', error);
+                }
             },
 
             addItem: async (product, quantity = 1, selectedSize = null, selectedColor = null) => {
@@ -86,6 +131,8 @@ export const useCartStore = create(
 
                     if (existingItem) {
                         return {
+                            summary: null,
+                            hasLoaded: true,
                             items: state.items.map((item) =>
                                 item.id === product.id &&
                                     item.selectedSize === selectedSize &&
@@ -97,6 +144,8 @@ export const useCartStore = create(
                     }
 
                     return {
+                        summary: null,
+                        hasLoaded: true,
                         items: [...state.items, { ...product, quantity, selectedSize, selectedColor }],
                     };
                 });
@@ -111,18 +160,49 @@ export const useCartStore = create(
                             color: selectedColor
                         });
                         // Refresh cart to get backend IDs
-                        await get().syncWithBackend();
+                        await get().fetchCart();
                     } catch (error) {
                         console.error('Failed to sync cart with backend:', error);
                     }
+                } else {
+                    try {
+                        const data = await api.addToGuestCart(get().guestToken, {
+                            product_id: product.id,
+                            quantity,
+                            size: selectedSize,
+                            color: selectedColor
+                        });
+                        if (data.guest_token) {
+                            // Keep the server line id so later edits can be batched like a user's cart
+                            set((state) => ({
+                                guestToken: data.guest_token,
+                                items: state.items.map((item) =>
+                                    item.id === product.id &&
+                                        item.selectedSize === selectedSize &&
+                                        item.selectedColor === selectedColor
+                                        ? { ...item, cartItemId: data.item.id }
+                                        : item
+                                ),
+                            }));
+                        }
+                    } catch (error) {
+                        console.error('Failed to save guest cart:', error);
+                    }
                 }
             },
 
             removeItem: async (productId, selectedSize = null, selectedColor = null) => {
                 const { isAuthenticated } = useAuthStore.getState();
+                const item = get().items.find(
+                    i => i.id === productId &&
+                         i.selectedSize === selectedSize &&
+                         i.selectedColor === selectedColor
+                );
 
                 // Optimistic update
                 set((state) => ({
+                    summary: null,
+                    hasLoaded: true,
                     items: state.items.filter(
                         (item) =>
                             !(item.id === productId &&
@@ -131,28 +211,22 @@ export const useCartStore = create(
                     ),
                 }));
 
+                if (item && item.cartItemId && (isAuthenticated || get().guestToken)) {
+                    get().queueOperation({ op: 'remove', item_id: item.cartItemId });
+                    return;
+                }
+
                 if (isAuthenticated) {
                     try {
-                        // Find the cart item ID from current state
-                        const item = get().items.find(
-                            i => i.id === productId &&
-                                 i.selectedSize === selectedSize &&
-                                 i.selectedColor === selectedColor
+                        // Fallback: fetch cart and find item
+                        const cart = await api.getCart();
+                        const match = cart.items.find(i =>
+                            i.product.id === productId &&
+                            i.size === selectedSize &&
+                            i.color === selectedColor
                         );
-                        
-                        if (item && item.cartItemId) {
-                            await api.removeFromCart(item.cartItemId);
-                        } else {
-                            // Fallback: fetch cart and find item
-                            const cart = await api.getCart();
-                            const match = cart.items.find(i =>
-                                i.product.id === productId &&
-                                i.size === selectedSize &&
-                                i.color === selectedColor
-                            );
-                            if (match) {
-                                await api.removeFromCart(match.id);
-                            }
+                        if (match) {
+                            await api.removeFromCart(match.id);
                         }
                     } catch (error) {
                         console.error('Failed to sync remove:', error);
@@ -169,6 +243,8 @@ export const useCartStore = create(
                 }
 
                 set((state) => ({
+                    summary: null,
+                    hasLoaded: true,
                     items: state.items.map((item) =>
                         item.id === productId &&
                             item.selectedSize === selectedSize &&
@@ -178,36 +254,31 @@ export const useCartStore = create(
                     ),
                 }));
 
-                if (isAuthenticated) {
-                    try {
-                        const item = get().items.find(
-                            i => i.id === productId &&
-                                 i.selectedSize === selectedSize &&
-                                 i.selectedColor === selectedColor
-                        );
-                        
-                        if (item && item.cartItemId) {
-                            await api.updateCartItem(item.cartItemId, { 
-                                quantity, 
-                                size: selectedSize, 
-                                color: selectedColor 
-                            });
-                        }
-                    } catch (error) {
-                        console.error('Failed to update quantity:', error);
-                    }
+                const item = get().items.find(
+                    i => i.id === productId &&
+                         i.selectedSize === selectedSize &&
+                         i.selectedColor === selectedColor
+                );
+
+                if (item && item.cartItemId && (isAuthenticated || get().guestToken)) {
+                    get().queueOperation({ op: 'update', item_id: item.cartItemId, quantity });
                 }
             },
 
             clearCart: async () => {
                 const { isAuthenticated } = useAuthStore.getState();
-                set({ items: [] });
+                clearTimeout(syncTimer);
+                pendingOperations = new Map();
+                set({ items: [], summary: null, hasLoaded: true });
                 if (isAuthenticated) {
                     try {
                         await api.clearCart();
                     } catch (error) {
                         console.error('Failed to clear cart:', error);
                     }
+                } else {
+                    // Start a fresh guest cart; the old lines expire server-side
+                    set({ guestToken: null });
                 }
             },
 
@@ -217,23 +288,45 @@ export const useCartStore = create(
 
                 try {
                     const data = await api.getCart();
-                    const localItems = data.items.map(item => ({
-                        ...item.product,
-                        id: item.product.id,
-                        cartItemId: item.id,
-                        quantity: item.quantity,
-                        selectedSize: item.size,
-                        selectedColor: item.color
-                    }));
-
-                    set({ items: localItems });
+                    set({ items: toLocalItems(data.items), summary: null, hasLoaded: true });
                 } catch (error) {
                     console.error('Failed to fetch cart:', error);
                 }
             },
 
+            // Signed-out carts keep product snapshots in localStorage; refresh price/stock in one batch call
+            refreshProducts: async () => {
+                const { isAuthenticated } = useAuthStore.getState();
+                const ids = [...new Set(get().items.map(item => item.id))];
+                if (isAuthenticated || ids.length === 0) return;
+
+                try {
+                    const { products, missing, inactive } = await api.getProductsBatch(ids);
+                    const gone = new Set([...missing, ...inactive]);
+                    const byId = new Map(products.map(product => [product.id, product]));
+                    set((state) => ({
+                        items: state.items
+                            .filter(item => !gone.has(item.id))
+                            .map(item => byId.has(item.id) ? {
+                                ...item,
+                                ...byId.get(item.id),
+                                quantity: item.quantity,
+                                selectedSize: item.selectedSize,
+                                selectedColor: item.selectedColor
+                            } : item)
+                    }));
+                } catch (error) {
+                    console.error('Failed to refresh cart products:', error);
+                }
+            },
+
             getItemCount: () => {
-                return get().items.reduce((total, item) => total + item.quantity, 0);
+                const { items, summary, hasLoaded } = get();
+                // Fall back to the server summary until the full cart has been loaded
+                if (!hasLoaded && summary) {
+                    return summary.item_count;
+                }
+                return items.reduce((total, item) => total + item.quantity, 0);
             },
 
             getTotal: () => {
@@ -252,6 +345,8 @@ export const useCartStore = create(
         }),
         {
             name: 'peckup-cart',
+            // summary and hasLoaded describe this session only
+            partialize: ({ items, guestToken }) => ({ items, guestToken }),
         }
     )
 );
@@ -139,6 +139,27 @@ export const useWishlistStore = create(
                 }
             },
 
+            // Signed-out wishlists keep product snapshots in localStorage; refresh them in one batch call
+            refreshProducts: async () => {
+                const { isAuthenticated } = useAuthStore.getState();
+                const ids = get().items.map(item => item.id);
+                if (isAuthenticated || ids.length === 0) return;
+
+                try {
+                    const { products, missing, inactive } = await api.getProductsBatch(ids);
+                    const gone = new Set([...missing, ...inactive]);
+                    const byId = new Map(products.map(product => [product.id, product]));
+                    // Products that were removed or deactivated drop out
+                    set((state) => ({
+                        items: state.items
+                            .filter(item => !gone.has(item.id))
+                            .map(item => byId.get(item.id) || item)
+                    }));
+                } catch (error) {
+                    console.error('Failed to refresh wishlist products:', error);
+                }
+            },
+
             fetchWishlist: async () => {
                 const { isAuthenticated } = useAuthStore.getState();
                 if (!isAuthenticated) return;
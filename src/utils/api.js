@@ -98,6 +98,15 @@ class Api {
         return response.json();
     }
 
+    async patch(endpoint, data, options = {}) {
+        const response = await this.request(endpoint, {
+            method: 'PATCH',
+            body: JSON.stringify(data),
+            ...options
+        });
+        return response.json();
+    }
+
     async delete(endpoint, options = {}) {
         const response = await this.request(endpoint, { method: 'DELETE', ...options });
         return response.json();
@@ -178,10 +187,35 @@ class Api {
         return this.get(ENDPOINTS.CART.BASE);
     }
 
+    // Item count and subtotal only; returns { item_count, line_count, subtotal, total }
+    async getCartSummary() {
+        return this.get(ENDPOINTS.CART.SUMMARY);
+    }
+
     async addToCart(data) {
         return this.post(ENDPOINTS.CART.BASE, data);
     }
 
+    // Several add/update/remove operations in one transaction; returns the new cart
+    async patchCart(operations) {
+        return this.patch(ENDPOINTS.CART.BASE, { operations });
+    }
+
+    // Guest cart: the token issued by addToGuestCart travels in the X-Guest-Cart header
+    async addToGuestCart(guestToken, data) {
+        const headers = guestToken ? { 'X-Guest-Cart': guestToken } : {};
+        return this.post(ENDPOINTS.CART.GUEST, data, { headers });
+    }
+
+    async patchGuestCart(guestToken, operations) {
+        return this.patch(ENDPOINTS.CART.GUEST, { operations }, { headers: { 'X-Guest-Cart': guestToken } });
+    }
+
+    // Move the guest cart (plus lines never sent to the server) into the user's cart; returns the merged cart
+    async mergeCart(guestToken, items = []) {
+        return this.post(ENDPOINTS.CART.MERGE, { guest_token: guestToken, items });
+    }
+
     async updateCartItem(id, data) {
         return this.put(ENDPOINTS.CART.BY_ID(id), data);
     }
@@ -228,6 +262,20 @@ class Api {
         return this.get(ENDPOINTS.PRODUCTS.BY_ID(id));
     }
 
+    // Resolve many products in one request; returns { products, missing, inactive, sections }
+    async getProductsBatch(ids) {
+        // Short lists use the cacheable GET, long ones go in a POST body
+        if (ids.length <= 50) {
+            return this.get(ENDPOINTS.PRODUCTS.BATCH, { ids: ids.join(',') });
+        }
+        return this.post(ENDPOINTS.PRODUCTS.BATCH, { ids });
+    }
+
+    // Typeahead; returns { query, suggestions } ranked by popularity
+    async suggestProducts(q, limit = 8) {
+        return this.get(ENDPOINTS.PRODUCTS.SUGGEST, { q, limit });
+    }
+
     async getProductBySlug(slug) {
         return this.get(ENDPOINTS.PRODUCTS.BY_SLUG(slug));
     }
@@ -236,12 +284,13 @@ class Api {
         return this.get(ENDPOINTS.PRODUCTS.BY_CATEGORY(categorySlug), params);
     }
 
-    async getFeaturedProducts(limit = 8) {
-        return this.get(ENDPOINTS.PRODUCTS.FEATURED, { limit });
+    // fields: optional sparse fieldset, e.g. 'card' for product grids
+    async getFeaturedProducts(limit = 8, fields) {
+        return this.get(ENDPOINTS.PRODUCTS.FEATURED, { limit, fields });
     }
 
-    async getNewArrivals(limit = 8) {
-        return this.get(ENDPOINTS.PRODUCTS.NEW_ARRIVALS, { limit });
+    async getNewArrivals(limit = 8, fields) {
+        return this.get(ENDPOINTS.PRODUCTS.NEW_ARRIVALS, { limit, fields });
     }
 
     // Health check